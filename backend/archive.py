@@ -0,0 +1,128 @@
+import os
+import sys
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, insert, delete, union_all
+
+import models
+import jobs
+import shards
+from database import SessionLocal
+from timeline import RESOLVED_STATUS
+
+logger = logging.getLogger("kentinsesi.archive")
+
+# Bu kadar günden eski çözülmüş bildirimler arşive taşınır
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "180"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL", "3600"))
+BATCH_SIZE = 500
+# Bir turda en fazla bu kadar parti (kalan bir sonraki tura)
+MAX_BATCHES_PER_RUN = 20
+
+COMPLAINTS = models.Complaint.__table__
+ARCHIVE = models.ComplaintArchive.__table__
+EVENTS = models.ComplaintStatusEvent.__table__
+EVENTS_ARCHIVE = models.ComplaintStatusEventArchive.__table__
+UPVOTES = models.ComplaintUpvote.__table__
+
+COLUMN_NAMES = [column.name for column in COMPLAINTS.c]
+EVENT_COLUMN_NAMES = [column.name for column in EVENTS.c]
+
+
+# --- SICAK / ARŞİV OKUMA ---
+# Okuma endpoint'leri varsayılan olarak sadece sıcak tabloya bakar; archived=true istenirse
+# iki tablonun UNION ALL'u kullanılır. Toplam sayan işler (istatistik düzeltme, sıralama,
+# rollup/SLA yeniden hesaplama) her zaman ikisini birlikte okur.
+def complaints_source(archived=False):
+    if not archived:
+        return COMPLAINTS
+    return union_all(
+        select(*COMPLAINTS.c),
+        select(*[ARCHIVE.c[name] for name in COLUMN_NAMES]),
+    ).subquery("all_complaints")
+
+
+def events_source(archived=False):
+    if not archived:
+        return EVENTS
+    return union_all(
+        select(*EVENTS.c),
+        select(*[EVENTS_ARCHIVE.c[name] for name in EVENT_COLUMN_NAMES]),
+    ).subquery("all_status_events")
+
+
+# --- ARŞİVLEME ---
+# Çözülmüş ve ARCHIVE_AFTER_DAYS'ten eski bildirimler BATCH_SIZE'lık partiler halinde taşınır.
+# Her parti tek transaction: arşive INSERT ... SELECT, durum geçmişi de aynı şekilde, sonra
+# sıcak tablodan (geçmiş ve destek kayıtlarıyla birlikte) DELETE. Sayaçlar (complaint_stats,
+# rollup, SLA) değişmez; arşivlenen bildirim istatistiklerde sayılmaya devam eder.
+def archive_batch(db, cutoff):
+    rows = db.execute(
+        select(COMPLAINTS.c.id, COMPLAINTS.c.plate_normalized)
+        .where(
+            COMPLAINTS.c.status == RESOLVED_STATUS,
+            COMPLAINTS.c.created_at < cutoff,
+            shards.not_frozen(COMPLAINTS.c.municipality),  # taşınan belediyenin satırları taşıma bitince
+        )
+        .order_by(COMPLAINTS.c.id)
+        .limit(BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not rows:
+        return []
+    ids = [row.id for row in rows]
+    db.execute(
+        insert(ARCHIVE).from_select(COLUMN_NAMES, select(*COMPLAINTS.c).where(COMPLAINTS.c.id.in_(ids)))
+    )
+    db.execute(
+        insert(EVENTS_ARCHIVE).from_select(
+            EVENT_COLUMN_NAMES, select(*EVENTS.c).where(EVENTS.c.complaint_id.in_(ids))
+        )
+    )
+    # SQLite'ta FK CASCADE kapalı olabilir; bağlı kayıtlar açıkça silinir
+    db.execute(delete(EVENTS).where(EVENTS.c.complaint_id.in_(ids)))
+    db.execute(delete(UPVOTES).where(UPVOTES.c.complaint_id.in_(ids)))
+    db.execute(delete(COMPLAINTS).where(COMPLAINTS.c.id.in_(ids)))
+    db.commit()
+    return rows
+
+
+def archive_resolved(db, older_than_days=ARCHIVE_AFTER_DAYS, max_batches=MAX_BATCHES_PER_RUN):
+    import plates  # plates -> workflow -> stats -> archive döngüsü olmasın
+    import readmodel
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    total = 0
+    for _ in range(max_batches):
+        rows = archive_batch(db, cutoff)
+        if not rows:
+            break
+        plates.invalidate(*rows)
+        readmodel.model.remove(*(row.id for row in rows))
+        total += len(rows)
+        if len(rows) < BATCH_SIZE:
+            break
+    return total
+
+
+def _archive_job():
+    db = SessionLocal()
+    try:
+        moved = sum(archive_resolved(shard_db) for shard_db in shards.each(db))
+    finally:
+        db.close()
+    if moved:
+        logger.info("%d bildirim arşive taşındı", moved)
+
+
+jobs.register("complaint-archiver", ARCHIVE_INTERVAL_SECONDS, _archive_job)
+
+
+if __name__ == "__main__":
+    session = SessionLocal()
+    try:
+        count = sum(archive_resolved(shard_db, max_batches=sys.maxsize) for shard_db in shards.each(session))
+    finally:
+        session.close()
+    print(f"{count} bildirim arşive taşındı.", file=sys.stderr)
@@ -31,6 +31,12 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+# passlib bcrypt backend'ini ilk hash/verify'da yükleyip kendi testlerini çalıştırır;
+# açılıştaki ısınmada önceden yapılır (bkz. warmup.py)
+def load_password_backend():
+    pwd_context.handler("bcrypt").get_backend()
+
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -57,4 +63,11 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     user = db.query(models.User).filter(models.User.email == email).first()
     if user is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+    return user
+
+
+# Sadece belediye yetkililerinin kullanabileceği endpoint'ler için
+def get_current_official(user: models.User = Depends(get_current_user)):
+    if user.role != "BELEDIYE_YETKILISI":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Bu işlem için yetkiniz yok")
+    return user
@@ -0,0 +1,101 @@
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import threading
+import statistics
+import subprocess
+
+# --- VERİTABANI KARŞILAŞTIRMASI: GÖMÜLÜ SQLITE / POSTGRES ---
+# Aynı karışık yük (THREADS eşzamanlı istemci, %WRITE_PERCENT yazma) uygulamanın kendisine
+# (TestClient, lifespan dahil) her veritabanı için ayrı bir süreçte uygulanır; saniyedeki istek
+# ve gecikme yüzdelikleri yazılır. SQLite her seferinde geçici bir dosyada sıfırdan kurulur.
+# Postgres için BENCH_POSTGRES_URL verilir; migration'lar uygulanıp veri eklenir, boş bir test
+# veritabanı olmalı:
+#   BENCH_POSTGRES_URL=postgresql://... python bench_database.py
+THREADS = 16
+REQUESTS_PER_THREAD = 200
+WRITE_PERCENT = 10
+SEED_COMPLAINTS = 5000
+
+
+def _complaint(i):
+    return {
+        "title": f"Bildirim {i}", "description": "Durakta beklemeden geçti.", "category": random.choice(["Ulaşım", "Yol", "Temizlik"]),
+        "location": "Kızılay, Çankaya", "plate": f"06 ABC {i % 500:03d}", "user_identifier": f"user{i % 200}@mail.com",
+    }
+
+
+def child():
+    import main
+    import migrations
+    import submissions
+    from fastapi.testclient import TestClient
+
+    migrations.migrate()
+    db = main.SessionLocal()
+    for start in range(0, SEED_COMPLAINTS, submissions.MAX_BATCH):
+        submissions.insert_complaints(db, [_complaint(i) for i in range(start, start + submissions.MAX_BATCH)])
+        db.commit()
+    db.close()
+
+    latencies = {"read": [], "write": []}
+    errors = []
+    lock = threading.Lock()
+
+    def client_loop(client, seed):
+        rng = random.Random(seed)
+        for i in range(REQUESTS_PER_THREAD):
+            started = time.perf_counter()
+            if rng.randrange(100) < WRITE_PERCENT:
+                kind, response = "write", client.post("/complaints/", json=_complaint(seed * 100000 + i))
+            else:
+                kind = "read"
+                path = rng.choice(["/complaints/?limit=20", "/stats", f"/complaints/{rng.randint(1, SEED_COMPLAINTS)}"])
+                response = client.get(path)
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies[kind].append(elapsed)
+                if response.status_code >= 400:
+                    errors.append(response.status_code)
+
+    with TestClient(main.app) as client:
+        threads = [threading.Thread(target=client_loop, args=(client, n)) for n in range(THREADS)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    result = {"req/s": round(THREADS * REQUESTS_PER_THREAD / elapsed), "hata": len(errors)}
+    for kind, values in latencies.items():
+        values.sort()
+        result[f"{kind} p50 ms"] = round(statistics.median(values), 1)
+        result[f"{kind} p99 ms"] = round(values[int(len(values) * 0.99) - 1], 1)
+    print(json.dumps(result))
+
+
+def measure(url):
+    env = dict(os.environ, DATABASE_URL=url, QUERY_BUDGET_STRICT="0")
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child"],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        child()
+        sys.exit()
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {"sqlite": measure(f"sqlite:///{os.path.join(tmp, 'bench.db')}")}
+    if os.getenv("BENCH_POSTGRES_URL"):
+        results["postgres"] = measure(os.environ["BENCH_POSTGRES_URL"])
+    print(f"{THREADS} istemci x {REQUESTS_PER_THREAD} istek, %{WRITE_PERCENT} yazma")
+    print(f"{'':14}" + "".join(f"{name:>12}" for name in results))
+    for key in next(iter(results.values())):
+        print(f"{key:14}" + "".join(f"{result[key]:>12}" for result in results.values()))
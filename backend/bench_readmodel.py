@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+import random
+import tempfile
+
+# --- OKUMA MODELİ KARŞILAŞTIRMASI ---
+# Akış / filtre / harita sorgularının veritabanından (SQLite, indeksler dahil) ve bellek içi
+# okuma modelinden (bkz. readmodel.py) cevaplanma süresi; iki yolun sonucu da karşılaştırılır.
+# Geçici bir SQLite dosyasında SEED_COMPLAINTS bildirimle: python bench_readmodel.py
+SEED_COMPLAINTS = 50000
+ROUNDS = 200
+QUERIES = {
+    "akış (ilk 20)": (0, 20, {}),
+    "akış (5. sayfa)": (80, 20, {}),
+    "durum": (0, 50, {"status": ("İşlemde",)}),
+    "belediye + durum": (0, 50, {"municipality": "Çankaya", "status": ("Beklemede", "İnceleniyor")}),
+    "harita kutusu": (0, 100, {"bbox": (39.90, 32.80, 39.95, 32.88)}),
+}
+
+
+def seed(submissions, db):
+    rng = random.Random(7)
+    statuses = ["Beklemede", "İnceleniyor", "İşlemde", "Çözüldü", "Reddedildi"]
+    for start in range(0, SEED_COMPLAINTS, submissions.MAX_BATCH):
+        submissions.insert_complaints(db, [{
+            "title": f"Bildirim {i}", "description": "Durakta beklemeden geçti.", "category": rng.choice(["Ulaşım", "Yol", "Temizlik"]),
+            "location": "Kızılay", "municipality": rng.choice(["Çankaya", "Keçiören", "Yenimahalle", "Mamak"]),
+            "lat": 39.85 + rng.random() * 0.2, "lng": 32.70 + rng.random() * 0.3, "user_identifier": f"user{i % 300}@mail.com",
+        } for i in range(start, min(start + submissions.MAX_BATCH, SEED_COMPLAINTS))])
+        db.commit()
+    db.execute(text("UPDATE complaints SET status = CASE id % 5 " + " ".join(
+        f"WHEN {n} THEN '{status}'" for n, status in enumerate(statuses)
+    ) + " END, created_at = datetime('now', '-' || (id % 20000) || ' minutes')"))
+    db.commit()
+
+
+def ms_per_query(fn):
+    fn()
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn()
+    return (time.perf_counter() - started) / ROUNDS * 1000
+
+
+if __name__ == "__main__":
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp.name, 'bench.db')}"
+    os.environ["QUERY_BUDGET_STRICT"] = "0"
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from sqlalchemy import text
+
+    import main
+    import migrations
+    import readmodel
+    import submissions
+
+    migrations.migrate()
+    db = main.SessionLocal()
+    seed(submissions, db)
+    started = time.perf_counter()
+    rows = readmodel.model.load(db)
+    print(f"{rows} bildirim {(time.perf_counter() - started) * 1000:.0f} ms'de yüklendi, "
+          f"~{readmodel.model.columns.bytes / 1024 / 1024:.1f} MB")
+
+    fields = main.COMPLAINT_ROWS.fields
+    print(f"{'':20}{'veritabanı ms':>16}{'model ms':>12}")
+    for name, (skip, limit, filters) in QUERIES.items():
+        def from_model():
+            return readmodel.model.query(fields, skip, limit, filters)
+
+        def from_db():
+            readmodel.model.usable = False
+            try:
+                return main.list_complaints(db, skip, limit, filters=filters)
+            finally:
+                readmodel.model.usable = True
+
+        assert [tuple(row) for row in from_db()] == from_model(), name
+        print(f"{name:20}{ms_per_query(from_db):>16.3f}{ms_per_query(from_model):>12.3f}")
+    db.close()
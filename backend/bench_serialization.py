@@ -0,0 +1,62 @@
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from pydantic import TypeAdapter
+
+import models
+import schemas
+import fastjson
+
+# --- LİSTE SERİLEŞTİRME KARŞILAŞTIRMASI ---
+# 100 satırlık bir /complaints/ sayfasının CPU maliyeti. Eski yol FastAPI'nin response_model yolu:
+# ORM nesnesi -> satır başına pydantic modeli -> mode="json" dump -> json.dumps. fastjson yolu:
+# tuple -> derlenmiş dict -> JSON. ORM nesnesi kurma maliyeti ölçüme dahil değil (o da fastjson lehine).
+# Veritabanına bağlanmaz: python bench_serialization.py
+PAGE_SIZE = 100
+ROUNDS = 2000
+
+
+def sample_rows():
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(PAGE_SIZE):
+        rows.append({
+            "title": f"Bildirim {i}", "description": "Durakta beklemeden geçti, şoför telefonla konuşuyordu.",
+            "category": "Ulaşım", "location": "Kızılay, Çankaya", "plate": "06 ABC 123",
+            "image_url": f"https://kentinsesi.onrender.com/uploads/{i}.jpg", "lat": 39.92 + i / 1000,
+            "lng": 32.85, "user_identifier": f"user{i % 7}@mail.com", "id": i + 1, "status": "Beklemede",
+            "upvotes": i % 13, "created_at": start + timedelta(minutes=i), "assigned_to": None,
+        })
+    return rows
+
+
+def cpu_per_page(fn):
+    fn()
+    started = time.process_time()
+    for _ in range(ROUNDS):
+        fn()
+    return (time.process_time() - started) / ROUNDS * 1000
+
+
+if __name__ == "__main__":
+    rows = sample_rows()
+    serializer = fastjson.RowSerializer(schemas.Complaint, models.Complaint.__table__)
+    orm_objects = [models.Complaint(**row) for row in rows]
+    tuples = [tuple(row[name] for name in serializer.fields) for row in rows]
+    adapter = TypeAdapter(List[schemas.Complaint])
+
+    def response_model_path():
+        validated = adapter.validate_python(orm_objects, from_attributes=True)
+        return json.dumps(adapter.dump_python(validated, mode="json"), ensure_ascii=False, separators=(",", ":")).encode()
+
+    def fast_path():
+        return serializer.render(tuples)
+
+    assert json.loads(response_model_path()) == json.loads(fast_path())
+    before = cpu_per_page(response_model_path)
+    after = cpu_per_page(fast_path)
+    encoder = "orjson" if fastjson.orjson is not None else "json"
+    print(f"{PAGE_SIZE} satırlık sayfa başına CPU: response_model {before:.3f} ms, "
+          f"fastjson ({encoder}) {after:.3f} ms, {before / after:.1f}x")
@@ -0,0 +1,64 @@
+import os
+import sys
+import json
+import time
+import statistics
+import subprocess
+
+# --- AÇILIŞ SÜRESİ KARŞILAŞTIRMASI ---
+# Render'ın uyku/uyanma döngüsünü taklit eder: her tur yeni bir süreçte main import edilir, lifespan
+# çalışır ve ilk istekler atılır. Isınmalı (varsayılan) ve ısınmasız (WARMUP=0) açılış yan yana
+# ölçülür; süreler ms, ROUNDS turun medyanı. DATABASE_URL'deki veritabanına bağlanır, şema güncel
+# olmalı (python migrations.py):
+#   DATABASE_URL=sqlite:///./bench.db python bench_startup.py
+ROUNDS = 5
+FIRST_REQUESTS = ["/complaints/", "/rank/bench@kentinsesi.local", "/stats", "/vehicles/overview"]
+# "warmup" şifresinin cost=4 bcrypt hash'i: ölçülen süre hash'in kendisi değil backend yükleme bedeli
+SAMPLE_HASH = "$2b$04$FiBrdxqoybCCira.PeN/m.MRaqCKW5fKqW8mH6NL9sXKoW.Y4STEe"
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+def child():
+    started = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+    from fastapi.testclient import TestClient
+
+    result = {"import main": _ms(imported - started)}
+    with TestClient(main.app) as client:
+        result["lifespan"] = _ms(time.perf_counter() - imported)
+        for path in FIRST_REQUESTS:
+            t = time.perf_counter()
+            client.get(path)
+            result[f"ilk GET {path}"] = _ms(time.perf_counter() - t)
+        t = time.perf_counter()
+        main.auth.verify_password("warmup", SAMPLE_HASH)
+        result["ilk bcrypt verify"] = _ms(time.perf_counter() - t)
+    print(json.dumps(result))
+
+
+def measure(warm):
+    env = dict(os.environ, WARMUP="1" if warm else "0")
+    runs = []
+    for _ in range(ROUNDS):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child"],
+            env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        child()
+        sys.exit()
+    cold = measure(warm=False)
+    warm = measure(warm=True)
+    print(f"{'':40} {'ısınmasız':>10} {'ısınmalı':>10}")
+    for key in cold:
+        print(f"{key:40} {cold[key]:>10.1f} {warm[key]:>10.1f}")
+    print(f"{'toplam (açılış + ilk istekler)':40} {sum(cold.values()):>10.1f} {sum(warm.values()):>10.1f}")
@@ -0,0 +1,56 @@
+import hashlib
+import json
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.encoders import jsonable_encoder
+
+from database import SessionLocal
+
+# Havuzdaki bağlantı sayısını (pool_size=5) aşmasın
+MAX_WORKERS = 4
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="bootstrap")
+
+
+# --- AÇILIŞ EKRANI (BOOTSTRAP) ---
+# Giriş sonrası ekranın ihtiyaç duyduğu bölümler (akış, sıralama, istatistik, araçlar) tek istekte
+# döner. Her bölüm kendi Session'ı ile (havuzdan ayrı bağlantı) paralel çalışır; toplam süre
+# sorguların toplamı değil en yavaşıdır. Her bölümün kendi ETag'i var: istemci elindeki ETag'leri
+# If-None-Match ile gönderirse değişmeyen bölümlerin verisi tekrar gönderilmez.
+def section_etag(name, data):
+    body = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return f'"{name}-{hashlib.sha1(body.encode()).hexdigest()[:16]}"'
+
+
+def parse_if_none_match(header):
+    # If-None-Match: "complaints-ab12..", "stats-cd34.."  (W/ önekleri yok sayılır)
+    if not header:
+        return set()
+    return {tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()}
+
+
+def _run_section(loader, session_factory):
+    db = session_factory()
+    try:
+        return jsonable_encoder(loader(db))
+    finally:
+        db.close()
+
+
+def load_sections(loaders, known_etags=(), session_factory=SessionLocal):
+    # loaders: {bölüm adı: fn(db)}. Sorgu sayacı (query_budget) iş parçacıklarına context kopyası ile taşınır.
+    # session_factory: okuma replikası kullanılacaksa replicas.session_factory(request)
+    futures = {
+        name: _executor.submit(contextvars.copy_context().run, _run_section, loader, session_factory)
+        for name, loader in loaders.items()
+    }
+    sections = {}
+    for name, future in futures.items():
+        data = future.result()
+        etag = section_etag(name, data)
+        if etag in known_etags:
+            sections[name] = {"etag": etag, "not_modified": True, "data": None}
+        else:
+            sections[name] = {"etag": etag, "not_modified": False, "data": data}
+    return sections
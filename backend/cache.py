@@ -0,0 +1,42 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+# --- SÜREÇ İÇİ ÖNBELLEK ---
+# Basit TTL + LRU önbellek. Değerler sürece özeldir (Render'da tek instance); yazma
+# endpoint'leri ilgili anahtarları invalidate() ile düşürür, TTL de üst sınır koyar.
+class TTLCache:
+    def __init__(self, ttl_seconds, max_entries=1024):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,186 @@
+import os
+import gzip
+import zlib
+import hashlib
+import threading
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from cache import TTLCache
+
+try:
+    import brotli
+except ImportError:  # opsiyonel
+    brotli = None
+try:
+    import zstandard
+except ImportError:  # opsiyonel
+    zstandard = None
+
+MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "500"))
+# Bu boyuttan büyük gövdeler event loop'u bloklamasın diye threadpool'da sıkıştırılır
+THREAD_MINIMUM_SIZE = 128 * 1024
+# Bu boyuta kadar olan sıkıştırılmış gövdeler önbelleğe alınır
+CACHE_MAX_BODY = 2 * 1024 * 1024
+
+# Zaten sıkışık ya da akış halinde beklenmeyen içerikler
+SKIP_CONTENT_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip", "text/event-stream")
+
+
+class _Gzip:
+    def compress(self, body):
+        return gzip.compress(body, compresslevel=6)
+
+    def stream(self):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        return (lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)), compressor.flush
+
+
+class _Brotli:
+    def compress(self, body):
+        return brotli.compress(body, quality=5)
+
+    def stream(self):
+        compressor = brotli.Compressor(quality=5)
+        return (lambda chunk: compressor.process(chunk) + compressor.flush()), compressor.finish
+
+
+class _Zstd:
+    # ZstdCompressor thread-safe değil; büyük gövdeler threadpool'da sıkıştırıldığı için thread başına bir tane
+    def __init__(self):
+        self._local = threading.local()
+
+    def compress(self, body):
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(level=3)
+        return compressor.compress(body)
+
+    def stream(self):
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+        return (
+            (lambda chunk: compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)),
+            compressor.flush,
+        )
+
+
+# Tercih sırası: en iyi oran/hız önce; kütüphanesi kurulu olmayan atlanır
+ENCODERS = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = _Zstd()
+if brotli is not None:
+    ENCODERS["br"] = _Brotli()
+ENCODERS["gzip"] = _Gzip()
+
+# (kodlama, gövde özeti) -> sıkıştırılmış gövde. Single-flight / önbellekten gelen aynı gövde
+# (ör. akışın ilk sayfası) her istekte yeniden sıkıştırılmaz.
+compressed_cache = TTLCache(ttl_seconds=int(os.getenv("COMPRESSION_CACHE_TTL", "300")), max_entries=256)
+
+
+def negotiate(accept_encoding):
+    # Accept-Encoding: "gzip, deflate, br;q=0.9, zstd" -> sunucunun tercih sırasına göre ilk uygun kodlama
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip().removeprefix("q=")
+        if name and not (q and q.replace(".", "").isdigit() and float(q) == 0):
+            accepted.add(name.strip().lower())
+    for name in ENCODERS:
+        if name in accepted or "*" in accepted:
+            return name
+    return None
+
+
+def compress_body(encoding, body):
+    if len(body) > CACHE_MAX_BODY:
+        return ENCODERS[encoding].compress(body)
+    key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+    compressed = compressed_cache.get(key)
+    if compressed is None:
+        compressed = ENCODERS[encoding].compress(body)
+        compressed_cache.set(key, compressed)
+    return compressed
+
+
+# --- YANIT SIKIŞTIRMA ---
+# Accept-Encoding'e göre zstd / br / gzip. MINIMUM_SIZE altındaki gövdeler olduğu gibi gider.
+# Tek parça yanıtlar bir kerede (ve önbellekli) sıkıştırılır; akış (StreamingResponse) yanıtlarında
+# her parça flush edilerek gönderilir, istemci veriyi beklemeden almaya devam eder.
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size=MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        buffered = None  # boyutu belli (Content-Length) ama parça parça gelen gövde
+        stream = None  # (compress_chunk, finish) akış modunda
+        passthrough = False
+
+        async def send_whole(body):
+            headers = MutableHeaders(raw=start["headers"])
+            if len(body) < self.minimum_size:
+                await send(start)
+                await send({"type": "http.response.body", "body": body})
+                return
+            if len(body) >= THREAD_MINIMUM_SIZE:
+                body = await run_in_threadpool(compress_body, encoding, body)
+            else:
+                body = compress_body(encoding, body)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        async def send_compressed(message):
+            nonlocal start, buffered, stream, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if buffered is not None:
+                buffered += body
+                if not more_body:
+                    await send_whole(bytes(buffered))
+                return
+            if stream is None:
+                headers = MutableHeaders(raw=start["headers"])
+                if "content-encoding" in headers or headers.get("content-type", "").startswith(SKIP_CONTENT_TYPES):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                if not more_body:
+                    await send_whole(body)
+                    return
+                if "content-length" in headers:
+                    # Ara katmanlar (BaseHTTPMiddleware) tek parça yanıtı da bölerek iletir; toplayıp tek seferde sıkıştır
+                    buffered = bytearray(body)
+                    return
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                stream = ENCODERS[encoding].stream()
+                await send(start)
+
+            compress_chunk, finish = stream
+            chunk = compress_chunk(body) if body else b""
+            if not more_body:
+                chunk += finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
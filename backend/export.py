@@ -0,0 +1,91 @@
+import io
+import csv
+import heapq
+from itertools import islice
+from datetime import timedelta
+
+import models
+import schemas
+import fastjson
+import archive
+import shards
+from database import SessionLocal
+from rollups import utc_day_start
+
+# Sunucu tarafı imleçten her seferinde bu kadar satır çekilir
+FETCH_SIZE = 1000
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+COMPLAINTS = models.Complaint.__table__
+ROWS = fastjson.RowSerializer(schemas.Complaint, COMPLAINTS)
+
+
+def export_query(filters, cursor=None, archived=False):
+    source = archive.complaints_source(archived)
+    c = source.c
+    # id sırası sabit: bağlantı koparsa son alınan id'den (cursor) devam edilir
+    query = ROWS.select(source).order_by(c.id)
+    if cursor is not None:
+        query = query.where(c.id > cursor)
+    for name in ("municipality", "category", "status"):
+        if filters.get(name):
+            query = query.where(c[name] == filters[name])
+    if filters.get("since"):
+        query = query.where(c.created_at >= utc_day_start(filters["since"]))
+    if filters.get("until"):
+        query = query.where(c.created_at < utc_day_start(filters["until"] + timedelta(days=1)))
+    return query
+
+
+def _ndjson(partitions):
+    for rows in partitions:
+        yield b"".join(fastjson.dumps(ROWS.to_dict(row)) + b"\n" for row in rows)
+
+
+def _csv(partitions, header):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(ROWS.fields)
+    for rows in partitions:
+        writer.writerows(ROWS.to_dict(row).values() for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+# --- AKIŞLI DIŞA AKTARIM ---
+# Satırlar sunucu tarafı imleçle (stream_results + yield_per) FETCH_SIZE'lık partiler halinde
+# okunur ve parti parti yazılır; ORM nesnesi kurulmaz, bellek tablo boyutundan bağımsızdır.
+# Her satır id'siyle gelir ve id sırasıyla akar: bağlantı koparsa istemci son aldığı id'yi
+# cursor olarak gönderip kaldığı yerden devam eder (CSV'de başlık satırı tekrar gönderilmez).
+# Generator kendi Session'ını açar; endpoint'in Session'ı yanıt akarken kapanmış olur.
+# Shard'lı kurulumda her shard ayrı imleçle okunur ve id sırasıyla birleştirilir (k-way merge);
+# id'ler shard'lar arasında tekil olduğu için cursor aynen çalışır.
+def _merged_partitions(queries):
+    rows = heapq.merge(*queries, key=lambda row: row.id)
+    while True:
+        partition = list(islice(rows, FETCH_SIZE))
+        if not partition:
+            return
+        yield partition
+
+
+def stream_export(fmt, filters, cursor=None, archived=False, session_factory=SessionLocal):
+    sessions = [session_factory()] + [shard.session_factory() for shard in shards.SHARDS[1:]]
+    try:
+        query = export_query(filters, cursor, archived).execution_options(stream_results=True, yield_per=FETCH_SIZE)
+        if len(sessions) == 1:
+            partitions = sessions[0].execute(query).partitions()
+        else:
+            partitions = _merged_partitions([db.execute(query) for db in sessions])
+        if fmt == "csv":
+            yield from _csv(partitions, header=cursor is None)
+        else:
+            yield from _ndjson(partitions)
+    finally:
+        for db in sessions:
+            db.close()
@@ -0,0 +1,103 @@
+import json
+import importlib
+import importlib.util
+from datetime import datetime
+
+from sqlalchemy import select
+
+try:
+    import orjson
+except ImportError:  # opsiyonel; yoksa standart json
+    orjson = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+CBOR = "application/cbor"
+
+
+def _datetime(value):
+    # pydantic ile aynı biçim: UTC "Z" ile biter
+    if value is None:
+        return None
+    text = value.isoformat()
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+# --- İKİLİ KODLAMA (MOBİL) ---
+# Accept: application/msgpack veya application/cbor gönderen istemciye aynı veri ikili kodlanır
+# (kütüphanesi kuruluysa). Datetime'lar JSON'daki gibi ISO metin olarak kalır.
+# Kütüphaneler açılışta sadece aranır, ilk ikili istekte import edilir (soğuk başlangıç).
+def _lazy_encoder(module, name):
+    def encode(data):
+        return getattr(importlib.import_module(module), name)(data)
+    return encode
+
+
+_ENCODERS = {JSON: dumps}
+if importlib.util.find_spec("msgpack") is not None:  # opsiyonel
+    _ENCODERS[MSGPACK] = _ENCODERS["application/x-msgpack"] = _lazy_encoder("msgpack", "packb")
+if importlib.util.find_spec("cbor2") is not None:  # opsiyonel
+    _ENCODERS[CBOR] = _lazy_encoder("cbor2", "dumps")
+
+
+def negotiate(accept):
+    # İstemcinin sırasına göre ilk desteklenen tür; yoksa JSON
+    for part in (accept or "").split(","):
+        media_type = part.split(";")[0].strip().lower()
+        if media_type in _ENCODERS:
+            return media_type
+    return JSON
+
+
+def encode(data, media_type=JSON):
+    return _ENCODERS[media_type](data)
+
+
+# --- HIZLI LİSTE SERİLEŞTİRME ---
+# Liste endpoint'leri ORM nesnesi yüklemez ve satır başına pydantic modeli kurmaz: şemanın
+# alanları tablo sütunlarıyla eşlenir, Core sorgusu tuple döner ve satır -> dict dönüşümü
+# şemadan bir kez derlenen tek bir fonksiyonla yapılır. Çıktı response_model ile aynıdır
+# (alan sırası, datetime biçimi); karşılaştırma için: python bench_serialization.py
+class RowSerializer:
+    def __init__(self, model, table, fields=None):
+        self.model = model
+        self.table = table
+        self.fields = list(fields or model.model_fields)
+        self._projections = {}
+        self.columns = [table.c[name] for name in self.fields]
+        items = []
+        for i, name in enumerate(self.fields):
+            annotation = model.model_fields[name].annotation
+            value = f"r[{i}]"
+            if annotation is datetime or datetime in getattr(annotation, "__args__", ()):
+                value = f"_datetime({value})"
+            items.append(f"{name!r}: {value}")
+        source = "lambda r: {" + ", ".join(items) + "}"
+        self.to_dict = eval(source, {"_datetime": _datetime})
+
+    def project(self, fields):
+        # Alan alt kümesi (sparse fieldset) için ayrı derlenmiş serileştirici; alan kombinasyonu başına bir kez
+        fields = tuple(name for name in self.fields if name in fields)
+        serializer = self._projections.get(fields)
+        if serializer is None:
+            serializer = self._projections[fields] = RowSerializer(self.model, self.table, fields)
+        return serializer
+
+    def select(self, source=None):
+        # source: tablo yerine aynı sütun adlarına sahip bir alt sorgu (ör. arşivle UNION ALL)
+        if source is None:
+            return select(*self.columns)
+        return select(*[source.c[name] for name in self.fields])
+
+    def to_dicts(self, rows):
+        to_dict = self.to_dict
+        return [to_dict(r) for r in rows]
+
+    def render(self, rows, media_type=JSON):
+        return encode(self.to_dicts(rows), media_type)
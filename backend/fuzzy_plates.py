@@ -0,0 +1,274 @@
+import os
+import threading
+from array import array
+from bisect import bisect_left
+
+from sqlalchemy import select, func
+
+import models
+import jobs
+import shards
+from database import SessionLocal
+
+MAX_DISTANCE = 2
+
+# Delta, ana dizinin bu oranını (en az COMPACT_MIN_ENTRIES) geçince arka planda ana diziye katılır
+COMPACT_RATIO = 0.05
+COMPACT_MIN_ENTRIES = 20000
+COMPACT_INTERVAL_SECONDS = float(os.getenv("FUZZY_PLATE_COMPACT_INTERVAL", "30"))
+
+REBUILD_INTERVAL_SECONDS = float(os.getenv("FUZZY_PLATE_REBUILD_INTERVAL", "3600"))
+
+_KEY_MASK = 0xFFFFFFFF
+_BUCKETS = 256  # tam kurulumda sıralama bu kadar parçada yapılır (hash'in üst 8 biti)
+
+
+def levenshtein(a, b, max_dist):
+    # max_dist'i aşınca erken çıkar (max_dist + 1 döner)
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > max_dist:
+        return max_dist + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_dist:
+            return max_dist + 1
+        previous = current
+    return previous[-1]
+
+
+def deletion_variants(plate, depth=MAX_DISTANCE):
+    # Kendisi + en fazla depth karakteri silinmiş halleri. Levenshtein(a, b) <= d ise
+    # d silmeye kadar olan kümeler kesişir.
+    variants = {plate}
+    frontier = {plate}
+    for _ in range(depth):
+        frontier = {v[:i] + v[i + 1:] for v in frontier for i in range(len(v))}
+        variants |= frontier
+    return variants
+
+
+def _key(variant):
+    # Süreç içi indeks olduğu için Python'un str hash'i yeterli. 32 bit: plaka numarasıyla tek
+    # 64 bitlik sayıya sığar; çakışmalar Levenshtein doğrulamasında elenir
+    return hash(variant) & _KEY_MASK
+
+
+def _sorted_packed(buckets):
+    # Kovalar (hash'in üst bitlerine göre) sırayla sıralanıp eklenir: hiçbir zaman tüm girdilerin
+    # Python int listesi oluşmaz, bellekte en fazla bir kovanın listesi olur
+    packed = array("Q")
+    for i, bucket in enumerate(buckets):
+        packed.extend(sorted(bucket))
+        buckets[i] = None
+    return packed
+
+
+def _merge(packed, delta):
+    # Sıralı delta, ana dizinin dilimleri arasına yerleştirilir. Python döngüsü sadece delta
+    # girdileri üzerinde; dilim kopyaları C'de
+    merged = array("Q")
+    previous = 0
+    for entry in sorted((key << 32) | pid for key, pids in delta.items() for pid in pids):
+        position = bisect_left(packed, entry, previous)
+        merged += packed[previous:position]
+        merged.append(entry)
+        previous = position
+    merged += packed[previous:]
+    return merged
+
+
+# --- BULANIK PLAKA İNDEKSİ ---
+# Simetrik silme (SymSpell) yaklaşımı: her plakanın iki silmeye kadar varyantlarının hash'i ve
+# plaka numarası tek sayıda ((hash << 32) | id) sıralı bir array('Q')'da tutulur. Sorgu kendi
+# varyantlarını ikili aramayla bulur, adayları sınırlı Levenshtein ile doğrular.
+# BK-tree'nin aksine sorgu maliyeti plaka sayısından bağımsızdır (sadece log n arama);
+# uzaklık 2 de komşu genişletmesi olmadan doğrudan arama. 300 bin plakada uzaklık <= 1 sorgusu
+# ~0.1 ms, uzaklık 2 ~1 ms. Bellek ~ plaka * ~33 varyant * 8 bayt + plaka listesi; tam kurulum
+# ~15 sn, ~200 MB tepe.
+# Yeni plakalar küçük bir delta sözlüğüne eklenir; delta büyüyünce arka plan işi (istek değil)
+# onu kilitsiz olarak yeni bir diziye katar ve dizi tek atamayla yerine konur. Silinen plakalar
+# referans sayısı sıfırlanınca sonuçlardan çıkar.
+class FuzzyPlateIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.plates = []  # id -> plaka
+        self.ids = {}  # plaka -> id
+        self.refs = array("I")  # id -> kaç kaynakta geçiyor (araç + bildirimler)
+        self.packed = array("Q")  # sıralı (hash << 32) | id
+        self.delta = {}  # hash -> [id, ...]
+        self.delta_size = 0
+        self.merging = {}  # ana diziye katılmakta olan delta; katılma bitene kadar aramalar buna da bakar
+        self.loaded = False
+        self._replay = None  # yeniden kurulum sürerken gelen add/remove/ensure çağrıları
+
+    def __len__(self):
+        return sum(1 for r in self.refs if r)
+
+    def add(self, plate, count=1):
+        if not plate:
+            return
+        with self._lock:
+            self._record(FuzzyPlateIndex.add, plate, count)
+            self._add(plate, count)
+
+    def _new_id(self, plate, count):
+        # Plaka biliniyorsa referansını artırır ve None döner; yeni plakaysa id'sini döner
+        pid = self.ids.get(plate)
+        if pid is not None:
+            self.refs[pid] += count
+            return None
+        pid = len(self.plates)
+        self.plates.append(plate)
+        self.ids[plate] = pid
+        self.refs.append(count)
+        return pid
+
+    def _add(self, plate, count):
+        pid = self._new_id(plate, count)
+        if pid is None:
+            return
+        for variant in deletion_variants(plate):
+            self.delta.setdefault(_key(variant), []).append(pid)
+            self.delta_size += 1
+
+    def ensure(self, plate):
+        # Toplu yüklemede plaka zaten biliniyorsa (upsert) referansı artırma
+        with self._lock:
+            self._record(FuzzyPlateIndex.ensure, plate)
+            if plate not in self.ids or not self.refs[self.ids[plate]]:
+                self._add(plate, 1)
+
+    def remove(self, plate, count=1):
+        with self._lock:
+            self._record(FuzzyPlateIndex.remove, plate, count)
+            pid = self.ids.get(plate)
+            if pid is not None:
+                self.refs[pid] = max(self.refs[pid] - count, 0)
+
+    def _record(self, method, *args):
+        if self._replay is not None:
+            self._replay.append((method, args))
+
+    # --- sıkıştırma (arka plan) ---
+    def compact(self):
+        with self._compact_lock:
+            with self._lock:
+                if not self.delta:
+                    return 0
+                packed, merging = self.packed, self.delta
+                self.merging, self.delta, self.delta_size = merging, {}, 0
+            merged = _merge(packed, merging)
+            with self._lock:
+                # Bu arada load() yeni indeksi yerine koyduysa (aradaki değişiklikler ona işlendi) sonuç atılır
+                if self.packed is packed:
+                    self.packed = merged
+                    self.merging = {}
+            return len(merged) - len(packed)
+
+    def compact_if_needed(self):
+        threshold = max(COMPACT_MIN_ENTRIES, int(len(self.packed) * COMPACT_RATIO))
+        if self.delta_size >= threshold:
+            return self.compact()
+        return 0
+
+    def _candidates(self, variant, out):
+        key = _key(variant)
+        packed = self.packed
+        position = bisect_left(packed, key << 32)
+        while position < len(packed) and packed[position] >> 32 == key:
+            out.add(packed[position] & _KEY_MASK)
+            position += 1
+        out.update(self.delta.get(key, ()))
+        out.update(self.merging.get(key, ()))
+
+    def search(self, query, max_dist=1, limit=20):
+        with self._lock:
+            candidates = set()
+            for variant in deletion_variants(query, max_dist):
+                self._candidates(variant, candidates)
+
+            results = []
+            for pid in candidates:
+                if not self.refs[pid]:
+                    continue
+                plate = self.plates[pid]
+                distance = levenshtein(query, plate, max_dist)
+                if distance <= max_dist:
+                    results.append((distance, plate))
+        results.sort()
+        return [{"plate": plate, "distance": distance} for distance, plate in results[:limit]]
+
+    def load(self, db):
+        # Tüm kaynaklardan sıfırdan kur: araç plakaları + bildirimlerdeki farklı plakalar.
+        # Kurulum sürerken gelen değişiklikler kaydedilir ve yeni indekse de uygulanır (bkz.
+        # readmodel.ReadModel.load); okumadan hemen önceki bir ekleme iki kez sayılabilir, o plaka
+        # en kötü ihtimalle bir sonraki kuruluma kadar silindikten sonra da görünür.
+        with self._lock:
+            self._replay = []
+        try:
+            fresh = self._build(db)
+        except Exception:
+            with self._lock:
+                self._replay = None
+            raise
+        with self._lock:
+            replay, self._replay = self._replay, None
+            for method, args in replay:
+                method(fresh, *args)
+            self.__dict__.update({k: v for k, v in fresh.__dict__.items() if k not in ("_lock", "_compact_lock")})
+            self.loaded = True
+
+    def _build(self, db):
+        vehicles = db.execute(select(models.Vehicle.plate)).scalars().all()
+        c = models.Complaint
+        query = (
+            select(c.plate_normalized, func.count(c.id))
+            .where(c.plate_normalized.isnot(None), c.plate_normalized != "")
+            .group_by(c.plate_normalized)
+        )
+        # Aynı plaka birden çok shard'da olabilir; _new_id referansları toplar
+        parts = shards.scatter(lambda shard_db: shard_db.execute(query).all(), db)
+        complaint_plates = [(plate, 1) for plate in vehicles if plate]
+        complaint_plates += [row for rows in parts for row in rows]
+
+        # Yeni indeks kilitsiz kurulur, sonra tek seferde yerine konur; aramalar beklemez
+        fresh = FuzzyPlateIndex()
+        buckets = [array("Q") for _ in range(_BUCKETS)]
+        for plate, count in complaint_plates:
+            pid = fresh._new_id(plate, count)
+            if pid is not None:
+                for variant in deletion_variants(plate):
+                    key = _key(variant)
+                    buckets[key >> 24].append((key << 32) | pid)
+        fresh.packed = _sorted_packed(buckets)
+        return fresh
+
+    def ensure_loaded(self, db):
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load(db)
+
+
+index = FuzzyPlateIndex()
+
+
+def _rebuild_job():
+    db = SessionLocal()
+    try:
+        index.load(db)
+    finally:
+        db.close()
+
+
+# Açılışta yüklenir; periyodik yeniden kurulum silinmiş plakaları temizler ve kaymayı düzeltir
+jobs.register("fuzzy-plate-rebuild", REBUILD_INTERVAL_SECONDS, _rebuild_job, run_on_start=True)
+jobs.register("fuzzy-plate-compact", COMPACT_INTERVAL_SECONDS, index.compact_if_needed)
@@ -0,0 +1,65 @@
+import logging
+import threading
+
+logger = logging.getLogger("kentinsesi.jobs")
+
+
+# --- PERİYODİK ARKA PLAN İŞLERİ ---
+# Sayaç yazma, istatistik düzeltme gibi işler kendi iş parçacığında belirli aralıklarla çalışır.
+# Modüller import sırasında register() ile işini kaydeder; main.py startup/shutdown'da
+# start_all()/stop_all() çağırır. run_on_start bir fonksiyon ise açılışta fn yerine o çalışır
+# (ör. açılışta sadece eksik olanı tamamlayan hafif bir sürüm).
+class PeriodicJob:
+    def __init__(self, name, interval, fn, run_on_start=False, run_on_stop=False):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.run_on_start = run_on_start
+        self.run_on_stop = run_on_stop
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self, fn=None):
+        try:
+            return (fn or self.fn)()
+        except Exception:
+            logger.exception("Arka plan işi başarısız: %s", self.name)
+
+    def _loop(self):
+        if self.run_on_start:
+            self.run_once(self.run_on_start if callable(self.run_on_start) else None)
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+        if self.run_on_stop:
+            self.run_once()
+
+
+JOBS = {}
+
+
+def register(name, interval, fn, **kwargs):
+    JOBS[name] = PeriodicJob(name, interval, fn, **kwargs)
+    return JOBS[name]
+
+
+def start_all():
+    for job in JOBS.values():
+        job.start()
+
+
+def stop_all():
+    for job in JOBS.values():
+        job.stop()
@@ -0,0 +1,164 @@
+import os
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+
+from sqlalchemy.exc import DBAPIError, InterfaceError
+
+import jobs
+import submissions
+import shards
+from database import SessionLocal
+
+logger = logging.getLogger("kentinsesi.journal")
+
+JOURNAL_PATH = os.getenv("COMPLAINT_JOURNAL_PATH", "complaint_journal.jsonl")
+DRAIN_INTERVAL_SECONDS = float(os.getenv("COMPLAINT_JOURNAL_DRAIN_INTERVAL", "30"))
+
+
+# Bağlantı kurulamadı / koptu: sadece bu hatalarda bildirim günlüğe yazılır. Kilit zaman aşımı,
+# disk dolu gibi diğer OperationalError'lar bağlantı sorunu değildir, istek hata ile döner.
+def is_unavailable(exc):
+    if not isinstance(exc, DBAPIError):
+        return False
+    if exc.connection_invalidated or isinstance(exc, InterfaceError):
+        return True
+    # Havuzdan bağlantı alınırken / bağlanırken düşen hata (Connection refused, host çözülemedi):
+    # psycopg2 bunlarda pgcode vermez, SQLAlchemy de ifade olmadan (statement=None) sarar
+    if exc.statement is None:
+        return True
+    # SQLSTATE sınıf 08: connection exception (psycopg2 pgcode, psycopg sqlstate)
+    sqlstate = getattr(exc.orig, "pgcode", None) or getattr(exc.orig, "sqlstate", None)
+    return bool(sqlstate) and sqlstate.startswith("08")
+
+
+def _commit(db, items):
+    try:
+        created = submissions.insert_complaints(db, items)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return created
+
+
+# --- YEREL BİLDİRİM GÜNLÜĞÜ (WAL) ---
+# Veritabanına (Neon) ulaşılamazken gelen bildirim kaybolmasın diye yerel, sadece-ekleme yapılan
+# bir JSONL dosyasına yazılır ve fsync edilir; vatandaşa client_id ile "pending" cevabı döner.
+# Drainer bağlantı gelince günlüğü submissions.insert_complaints ile MAX_BATCH'lik parçalar halinde
+# aktarır. Tekrar oynatma client_id üzerinden ON CONFLICT DO NOTHING olduğu için, aktarım yarıda
+# kesilip baştan oynatılsa bile her bildirim tam bir kez yazılır.
+# Aktarım öncesi dosya .draining adıyla kenara alınır; bu sırada gelen yeni kayıtlar taze dosyaya düşer.
+# Bağlantı dışı bir hatayla yazılamayan kayıt (bozuk satır, kısıt ihlali) .failed dosyasına taşınır ve
+# loglanır; geri kalanı aktarılır, .draining dosyası tek bir kötü kayıt yüzünden takılı kalmaz.
+class ComplaintJournal:
+    def __init__(self, path):
+        self.path = path
+        self.draining_path = path + ".draining"
+        self.failed_path = path + ".failed"
+        self._lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+
+    def append(self, items):
+        # created_at gönderim anı olarak saklanır; aktarımda server_default yerine bu yazılır
+        now = datetime.now(timezone.utc).isoformat()
+        lines = "".join(json.dumps(dict(item, created_at=now), ensure_ascii=False) + "\n" for item in items)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def pending(self):
+        total = 0
+        for path in (self.draining_path, self.path):
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    total += sum(1 for line in f if line.strip())
+        return total
+
+    def _read(self, path, failed):
+        entries = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    entry["created_at"] = datetime.fromisoformat(entry["created_at"])
+                except (ValueError, TypeError, KeyError):
+                    # fsync'ten önce çöken bir yazmanın yarım satırı
+                    logger.warning("Günlükte okunamayan satır .failed dosyasına taşınıyor: %r", line[:200])
+                    failed.append(line.rstrip("\n"))
+                    continue
+                entries.append(entry)
+        return entries
+
+    def _fail(self, lines):
+        with open(self.failed_path, "a", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _insert(self, shard_db, items, failed):
+        # Parça hata verirse kayıtlar tek tek denenir; bağlantı hatası dışında yazılamayanlar .failed'a
+        try:
+            return _commit(shard_db, items)
+        except Exception as exc:
+            if is_unavailable(exc):
+                raise
+        created = []
+        for item in items:
+            try:
+                created += _commit(shard_db, [item])
+            except Exception as exc:
+                if is_unavailable(exc):
+                    raise
+                logger.error("Günlükteki bildirim aktarılamadı, .failed dosyasına taşınıyor (%s): %s",
+                             item.get("client_id"), exc)
+                failed.append(json.dumps(dict(item, created_at=item["created_at"].isoformat()),
+                                         ensure_ascii=False, default=str))
+        return created
+
+    def drain(self):
+        with self._drain_lock:
+            if not os.path.exists(self.draining_path):
+                with self._lock:
+                    if not os.path.exists(self.path):
+                        return 0
+                    os.replace(self.path, self.draining_path)
+
+            # Taşınamayanlar aktarım tamamlanınca .failed'a yazılır; yarıda kalan tur tekrar ederse çift yazılmaz
+            failed = []
+            entries = self._read(self.draining_path, failed)
+            groups = submissions.by_shard(entries)
+            if None in groups:
+                # Belediyesi taşınan bildirimler var; taşıma bitince sonraki turda hepsi aktarılır
+                logger.info("Shard taşıması sürüyor, günlük aktarımı ertelendi")
+                return 0
+            replayed = 0
+            db = SessionLocal()
+            try:
+                for shard, items in groups.items():
+                    with shards.session(shard, db) as shard_db:
+                        for start in range(0, len(items), submissions.MAX_BATCH):
+                            created = self._insert(shard_db, items[start:start + submissions.MAX_BATCH], failed)
+                            submissions.after_commit(created)
+                            replayed += len(created)
+            finally:
+                db.close()
+            # Hepsi yazıldı, zaten vardı ya da .failed'a taşındı; bağlantı hatasında dosya kalır ve
+            # sonraki turda yeniden oynatılır
+            if failed:
+                self._fail(failed)
+            os.remove(self.draining_path)
+        if replayed:
+            logger.info("Günlükten %d bildirim veritabanına aktarıldı", replayed)
+        return replayed
+
+
+journal = ComplaintJournal(JOURNAL_PATH)
+
+# Açılışta önceki süreçten kalan kayıtlar da aktarılır
+jobs.register("complaint-journal-drainer", DRAIN_INTERVAL_SECONDS, journal.drain, run_on_start=True)
@@ -1,33 +1,90 @@
 import sys
 import os
+import time
+
+# Soğuk başlangıç ölçümü: modülün yüklenmesi (fastapi/sqlalchemy import'ları + route'lar) burada başlar
+IMPORT_STARTED = time.perf_counter()
 
 # Backend klasörünü path'e ekle (Import hatasını çözer)
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Request
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 # --- DÜZELTME BURADA: 'func' EKLENDİ ---
-from sqlalchemy import text, func
+from sqlalchemy import func, insert, update, delete, select, literal
+from sqlalchemy.exc import DBAPIError
 # ---------------------------------------
-from typing import List
+from typing import List, Optional
+from datetime import date, timedelta
+from contextlib import asynccontextmanager
+from collections import Counter
+from itertools import islice
+from operator import itemgetter
+import heapq
 import shutil
 import uuid
 
-from database import SessionLocal, engine, Base
+from database import SessionLocal, replica_engine, Base, dialect_insert
 import models, schemas
 from fastapi.security import OAuth2PasswordRequestForm
 import auth
+import query_budget
+import jobs
+import upvotes
+import stats
+import rollups
+import timeline
+import sla
+import workflow
+import plates
+import fuzzy_plates
+import vehicle_import
+import submissions
+import journal
+import bootstrap
+import singleflight
+import fastjson
+import compression
+import export
+import snapshots
+import archive
+import migrations
+import warmup
+import replicas
+import shards
+import readmodel
+import officials
 
 # Klasör yoksa oluştur
 if not os.path.exists("uploads"):
     os.makedirs("uploads")
 
-# Tabloları oluştur
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+# --- AÇILIŞ / KAPANIŞ ---
+# Açılışta import sırasında veritabanı işi yapılmaz; şema kontrolü tek SELECT (bkz. migrations.py).
+# Ardından bağlantı havuzu, bcrypt ve ilk ekran sorguları ısıtılır (bkz. warmup.py), en son
+# periyodik arka plan işleri (destek sayaçlarını yazma vb., bkz. jobs.py) başlar.
+@asynccontextmanager
+async def lifespan(app):
+    warmup.timings["import"] = round((time.perf_counter() - IMPORT_STARTED) * 1000, 1)
+    for shard in shards.SHARDS:
+        migrations.check_on_startup(shard.engine)
+    engines = {replica_engine} | {e for shard in shards.SHARDS for e in (shard.engine, shard.read_engine)}
+    warmup.run(engines - {None}, {
+        "feed": lambda db: COMPLAINT_ROWS.render(list_complaints(db)),
+        "rank": lambda db: compute_rank(db, ""),
+        "stats": stats.read_national_stats,
+        "fleet_overview": lambda db: plates.cache.set(plates.OVERVIEW_KEY, plates.fleet_overview(db)),
+    })
+    jobs.start_all()
+    yield
+    jobs.stop_all()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # --- CORS AYARLARI (KESİN ÇÖZÜM) ---
 app.add_middleware(
@@ -37,6 +94,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Endpoint başına SQL ifadesi sayacı (X-Query-Count header'ı + bütçe kontrolü); sadece geliştirme / CI
+if query_budget.ENABLED:
+    app.middleware("http")(query_budget.query_budget_middleware)
+# Okuma replikası: yazan istemciyi kısa süre primary'de tutar, X-Read-Source header'ı (bkz. replicas.py)
+app.middleware("http")(replicas.stickiness_middleware)
+# Mobil veri için yanıt sıkıştırma: zstd / br / gzip (bkz. compression.py)
+app.add_middleware(compression.CompressionMiddleware)
 # Resimlerin görünmesi için klasörü dışarı aç
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
@@ -50,51 +114,33 @@ def get_db():
         db.close()
 
 
-# --- DB FIX ENDPOINT (Sütunları Kontrol Et) ---
-@app.get("/fix_db")
-def fix_database(db: Session = Depends(get_db)):
-    try:
-        try:
-            db.execute(text("ALTER TABLE complaints ADD COLUMN lat FLOAT"))
-        except:
-            pass
-        try:
-            db.execute(text("ALTER TABLE complaints ADD COLUMN lng FLOAT"))
-        except:
-            pass
-        try:
-            db.execute(text("ALTER TABLE complaints ADD COLUMN user_identifier VARCHAR"))
-        except:
-            pass
-
-        db.commit()
-        return {"message": "Veritabanı güncel (lat, lng, user_identifier)."}
-    except Exception as e:
-        return {"message": str(e)}
-
-
 # --- RANKING (SIRALAMA) ENDPOINT ---
-@app.get("/rank/{user_identifier}")
-def get_user_rank(user_identifier: str, db: Session = Depends(get_db)):
+def user_counts(db):
+    # Kullanıcı başına bildirim sayısı (arşivlenen bildirimler de sayılır). Kullanıcı birden çok
+    # belediyede bildirim açmış olabilir: her shard'da GROUP BY, sayılar burada toplanır.
+    c = archive.complaints_source(archived=True).c
+    query = select(c.user_identifier, func.count(c.id).label('count')).group_by(c.user_identifier)
+    counts = Counter()
+    for rows in shards.scatter(lambda shard_db: shard_db.execute(query).all(), db):
+        for user_identifier, count in rows:
+            if user_identifier:
+                counts[user_identifier] += count
+    return counts
+
+
+def compute_rank(db, user_identifier):
     # 1. Kullanıcıları bildirim sayısına göre grupla
-    results = db.query(
-        models.Complaint.user_identifier,
-        func.count(models.Complaint.id).label('count')
-    ).group_by(models.Complaint.user_identifier).all()
+    counts = user_counts(db)
 
     # 2. Listeyi çoktan aza sırala
-    sorted_users = sorted(
-        [r for r in results if r.user_identifier],
-        key=lambda x: x.count,
-        reverse=True
-    )
+    sorted_users = sorted(counts.items(), key=itemgetter(1), reverse=True)
 
     # 3. Senin sıranı bul
     my_rank = 0
     total_users = len(sorted_users)
 
-    for index, user in enumerate(sorted_users):
-        if user.user_identifier == user_identifier:
+    for index, (identifier, _) in enumerate(sorted_users):
+        if identifier == user_identifier:
             my_rank = index + 1
             break
 
@@ -104,6 +150,47 @@ def get_user_rank(user_identifier: str, db: Session = Depends(get_db)):
     return {"rank": my_rank, "total_users": total_users}
 
 
+@app.get("/rank/{user_identifier}", response_model=schemas.UserRank)
+def get_user_rank(user_identifier: str, db: Session = Depends(replicas.get_read_db)):
+    # Uyanışta aynı kullanıcının eşzamanlı istekleri tek sorguyu paylaşır (bkz. singleflight.py)
+    return singleflight.json_response(
+        ("GET /rank/{user_identifier}", user_identifier, replicas.is_replica(db)), schemas.UserRank,
+        lambda: compute_rank(db, user_identifier),
+    )
+
+
+# --- LİDERLİK TABLOSU ---
+# En çok bildirim açan kullanıcılar (tüm belediyeler). Kullanıcı kimliği maskelenerek döner.
+LEADERBOARD_MAX = 100
+
+
+def mask_identifier(identifier):
+    name, at, domain = identifier.partition("@")
+    return f"{name[:2]}***{at}{domain}"
+
+
+def compute_leaderboard(db, limit):
+    counts = user_counts(db)
+    top = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    return {
+        "total_users": len(counts),
+        "entries": [
+            {"rank": index + 1, "user": mask_identifier(identifier), "count": count}
+            for index, (identifier, count) in enumerate(top)
+        ],
+    }
+
+
+@app.get("/leaderboard", response_model=schemas.Leaderboard)
+def get_leaderboard(limit: int = 10, db: Session = Depends(replicas.get_read_db)):
+    if not 1 <= limit <= LEADERBOARD_MAX:
+        raise HTTPException(status_code=400, detail=f"limit 1 ile {LEADERBOARD_MAX} arası olmalı")
+    return singleflight.json_response(
+        ("GET /leaderboard", limit, replicas.is_replica(db)), schemas.Leaderboard,
+        lambda: compute_leaderboard(db, limit),
+    )
+
+
 # --- RESİM YÜKLEME ---
 @app.post("/upload/")
 async def upload_image(request: Request, file: UploadFile = File(...)):
@@ -120,77 +207,627 @@ async def upload_image(request: Request, file: UploadFile = File(...)):
 
 # --- CRUD ENDPOINTLERİ ---
 
-@app.post("/complaints/", response_model=schemas.Complaint)
+# Yazma endpoint'leri tek ifade ile çalışır: INSERT/UPDATE/DELETE ... RETURNING.
+# commit sonrası refresh veya işlem öncesi SELECT yok (bkz. query_budget.ENDPOINT_BUDGETS).
+# Panel sayaçları (stats.bump) aynı transaction içinde tek bir upsert ile güncellenir.
+COMPLAINT_COLUMNS = models.Complaint.__table__.c
+VEHICLE_COLUMNS = models.Vehicle.__table__.c
+
+# Liste endpoint'leri için şemadan derlenmiş satır serileştiricileri (bkz. fastjson.py)
+COMPLAINT_ROWS = fastjson.RowSerializer(schemas.Complaint, models.Complaint.__table__)
+VEHICLE_ROWS = fastjson.RowSerializer(schemas.Vehicle, models.Vehicle.__table__)
+
+
+def journal_complaints(db, items):
+    # Veritabanı yok: bildirimi yerel günlüğe yaz, drainer bağlantı gelince aktarır
+    try:
+        db.rollback()
+    except Exception:
+        pass
+    try:
+        journal.journal.append(items)
+    except OSError:
+        raise HTTPException(status_code=503, detail="Bildirim şu an kaydedilemiyor, lütfen tekrar deneyin")
+
+
+def submit_complaints(db, items):
+    # Bildirimler belediyelerinin shard'ına yazılır (tek shard'da hepsi db'ye). Belediyesi
+    # taşınmakta olan ya da veritabanına ulaşılamayan bildirimler günlüğe düşer: pending.
+    created, duplicates, pending = [], [], []
+    items = [submissions.with_municipality(item) for item in items]
+    for shard, shard_items in submissions.by_shard(items).items():
+        if shard is None:
+            journal_complaints(db, shard_items)
+            pending += shard_items
+            continue
+        with shards.session(shard, db) as shard_db:
+            try:
+                rows = submissions.insert_complaints(shard_db, shard_items)
+                inserted = {row.client_id for row in rows}
+                missing = [item["client_id"] for item in shard_items if item["client_id"] not in inserted]
+                # Aynı client_id ile daha önce kaydedilmiş (mobil tekrar denedi); mevcut kayıtlar döner
+                if missing:
+                    duplicates += submissions.find_by_client_ids(shard_db, missing)
+                shard_db.commit()
+            except DBAPIError as exc:
+                if not journal.is_unavailable(exc):
+                    raise
+                journal_complaints(shard_db, shard_items)
+                pending += shard_items
+                continue
+        created += rows
+    submissions.after_commit(created)
+    return created, duplicates, pending
+
+
+@app.post("/complaints/", response_model=schemas.Complaint,
+          responses={202: {"model": schemas.ComplaintPending}})
 def create_complaint(complaint: schemas.ComplaintCreate, db: Session = Depends(get_db)):
-    db_complaint = models.Complaint(**complaint.dict())
-    db.add(db_complaint)
-    db.commit()
-    db.refresh(db_complaint)
-    return db_complaint
+    item = complaint.dict()
+    # client_id'siz gönderimlere de id verilir ki günlükten aktarım tam bir kez yazsın
+    item["client_id"] = item["client_id"] or uuid.uuid4().hex
+    created, duplicates, pending = submit_complaints(db, [item])
+    if pending:
+        return JSONResponse(status_code=202, content={"client_id": item["client_id"], "status": "pending"})
+    return (created or duplicates)[0]
+
+
+# --- TOPLU GÖNDERİM (ÇEVRİMDIŞI SENKRONİZASYON) ---
+# Çekim gücü zayıfken biriken bildirimler tek istekte, shard başına tek çok satırlı INSERT ile yazılır.
+# client_id'ler sayesinde bağlantı koparken tekrar gönderilen kuyruk çift kayıt açmaz.
+@app.post("/complaints/batch", response_model=schemas.ComplaintBatchResult)
+def create_complaints_batch(batch: schemas.ComplaintBatch, db: Session = Depends(get_db)):
+    if not batch.complaints:
+        return {"results": []}
+    if len(batch.complaints) > submissions.MAX_BATCH:
+        raise HTTPException(status_code=400, detail=f"En fazla {submissions.MAX_BATCH} bildirim gönderilebilir")
+    # Aynı istekte tekrarlanan client_id'lerden ilki geçerli
+    items = {}
+    for item in batch.complaints:
+        items.setdefault(item.client_id, item.dict())
+
+    created, duplicates, pending = submit_complaints(db, list(items.values()))
+    results = {item["client_id"]: {"client_id": item["client_id"], "status": "pending"} for item in pending}
+    for row in duplicates:
+        results[row.client_id] = {"client_id": row.client_id, "id": row.id, "status": "duplicate"}
+    for row in created:
+        results[row.client_id] = {"client_id": row.client_id, "id": row.id, "status": "created"}
+    return {"results": [results[client_id] for client_id in items if client_id in results]}
+
+
+# --- LİSTE PROJEKSİYONLARI ---
+# Akış kartı sadece başlık/durum/küçük resim gösterir, harita sadece nokta. Sadece istenen sütunlar
+# SELECT edilir ve serileştirilir; tam kayıt için GET /complaints/{id}.
+COMPLAINT_PROJECTIONS = {
+    "summary": ("id", "title", "category", "status", "image_url", "upvotes", "created_at"),
+    "map": ("id", "lat", "lng", "status"),
+    "full": tuple(COMPLAINT_ROWS.fields),
+}
+
+
+def complaint_projection(projection, fields):
+    # fields=title,status gibi açık liste projeksiyondan önceliklidir; id her zaman döner
+    if fields:
+        names = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = names - set(COMPLAINT_ROWS.fields)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Bilinmeyen alan: {', '.join(sorted(unknown))}")
+        return COMPLAINT_ROWS.project(names | {"id"})
+    if projection not in COMPLAINT_PROJECTIONS:
+        raise HTTPException(status_code=400, detail="projection summary, map veya full olmalı")
+    return COMPLAINT_ROWS.project(COMPLAINT_PROJECTIONS[projection])
+
+
+def complaint_filters(status=None, municipality=None, category=None, bbox=None):
+    # status=Beklemede,İşlemde gibi liste; bbox=minLat,minLng,maxLat,maxLng (harita görünümü)
+    filters = {}
+    if status:
+        statuses = tuple(dict.fromkeys(s.strip() for s in status.split(",") if s.strip()))
+        unknown = set(statuses) - workflow.STATUSES
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Geçersiz durum: {', '.join(sorted(unknown))}")
+        filters["status"] = statuses
+    if municipality:
+        filters["municipality"] = municipality
+    if category:
+        filters["category"] = category
+    if bbox:
+        try:
+            min_lat, min_lng, max_lat, max_lng = (float(v) for v in bbox.split(","))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="bbox minLat,minLng,maxLat,maxLng olmalı")
+        if min_lat > max_lat or min_lng > max_lng:
+            raise HTTPException(status_code=400, detail="bbox minLat,minLng,maxLat,maxLng olmalı")
+        filters["bbox"] = (min_lat, min_lng, max_lat, max_lng)
+    return filters
+
+
+def filter_clauses(source, filters):
+    # readmodel ile aynı koşullar, veritabanı yolu için
+    c = source.c
+    clauses = []
+    if filters.get("status"):
+        clauses.append(c.status.in_(filters["status"]))
+    for name in ("municipality", "category"):
+        if filters.get(name):
+            clauses.append(c[name] == filters[name])
+    if filters.get("bbox"):
+        min_lat, min_lng, max_lat, max_lng = filters["bbox"]
+        clauses += [c.lat.between(min_lat, max_lat), c.lng.between(min_lng, max_lng)]
+    return clauses
+
+
+def list_complaints(db, skip=0, limit=100, serializer=COMPLAINT_ROWS, archived=False, filters=None):
+    filters = filters or {}
+    # Sıcak tablo okumaları önce bellek içi modelden; kesin cevap veremezse veritabanı (bkz. readmodel.py)
+    if not archived:
+        rows = readmodel.model.query(serializer.fields, skip, limit, filters)
+        if rows is not None:
+            return rows
+    source = archive.complaints_source(archived)
+    clauses = filter_clauses(source, filters)
+    # Aynı saniyede açılan bildirimler id ile sıralanır: sayfalar ve iki yolun sonucu kararlı
+    order = (source.c.created_at.desc(), source.c.id.desc())
+    if not shards.enabled():
+        return db.execute(
+            serializer.select(source).where(*clauses).order_by(*order).offset(skip).limit(limit)
+        ).all()
+    # Her shard'ın ilk skip+limit satırı (created_at, id)'ye göre birleştirilip kesilir. Sıralama
+    # sütunları satırın sonuna eklenir; serileştirici sadece kendi alanlarını okuduğu için çıktıya girmez.
+    query = (
+        serializer.select(source).add_columns(source.c.created_at, source.c.id).where(*clauses)
+        .order_by(*order).limit(skip + limit)
+    )
+    parts = shards.scatter(lambda shard_db: shard_db.execute(query).all(), db)
+    return list(islice(heapq.merge(*parts, key=itemgetter(-2, -1), reverse=True), skip, skip + limit))
 
 
+# response_model tam kaydı belgeler; gövde satırlardan doğrudan JSON'a (veya Accept'e göre
+# MessagePack / CBOR'a) yazılır (bkz. fastjson.py). archived=true ise arşiv de dahil edilir.
+# Eşzamanlı aynı istekler tek sorgu + tek serileştirme paylaşır (bkz. singleflight.py)
 @app.get("/complaints/", response_model=List[schemas.Complaint])
-def read_complaints(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    complaints = db.query(models.Complaint).order_by(models.Complaint.created_at.desc()).offset(skip).limit(limit).all()
-    return complaints
+def read_complaints(request: Request, skip: int = 0, limit: int = 100, projection: str = "full",
+                    fields: Optional[str] = None, archived: bool = False,
+                    status: Optional[str] = None, municipality: Optional[str] = None,
+                    category: Optional[str] = None, bbox: Optional[str] = None,
+                    db: Session = Depends(replicas.get_read_db)):
+    serializer = complaint_projection(projection, fields)
+    filters = complaint_filters(status, municipality, category, bbox)
+    media_type = fastjson.negotiate(request.headers.get("accept"))
+    body = singleflight.group.do(
+        ("GET /complaints/", skip, limit, tuple(serializer.fields), media_type, archived,
+         tuple(sorted(filters.items())), replicas.is_replica(db)),
+        lambda: serializer.render(list_complaints(db, skip, limit, serializer, archived, filters), media_type),
+    )
+    return Response(content=body, media_type=media_type, headers={"Vary": "Accept"})
+
+
+# --- TOPLU DURUM DEĞİŞİKLİĞİ (YETKİLİ) ---
+# Birden çok bildirime aynı geçiş tek UPDATE ile uygulanır; durum makinesine uymayanlar atlanır
+# (bkz. workflow.ALLOWED_TRANSITIONS).
+@app.post("/complaints/bulk_status", response_model=schemas.BulkStatusResult)
+def bulk_update_status(payload: schemas.BulkStatusUpdate, db: Session = Depends(get_db),
+                       official: models.User = Depends(auth.get_current_official)):
+    if payload.status not in workflow.STATUSES:
+        raise HTTPException(status_code=400, detail="Geçersiz durum")
+    if not payload.ids or len(payload.ids) > workflow.MAX_BULK_IDS:
+        raise HTTPException(status_code=400, detail=f"1 ile {workflow.MAX_BULK_IDS} arası bildirim seçilmeli")
+    # Yetkili sadece kendi belediyesinin bildirimlerini değiştirebilir (iş kuyruğu gibi); başka
+    # belediyenin id'leri bulunamadı sayılır
+    if not official.municipality:
+        raise HTTPException(status_code=400, detail="Kullanıcıya bağlı bir belediye tanımlı değil")
+    shards.ensure_writable(official.municipality)
+    with shards.session(shards.shard_for(official.municipality), db) as shard_db:
+        rows, previous, not_found, invalid = workflow.bulk_transition(
+            shard_db, payload.ids, payload.status, official.municipality, payload.note
+        )
+        shard_db.commit()
+    for row in rows:
+        rollups.buffer.add(rollups.status_change_deltas(row, previous[row.id]))
+        sla.observe_status_change(row, previous[row.id])
+    plates.invalidate(*rows)
+    readmodel.model.apply(*rows)
+    return {"updated": [row.id for row in rows], "not_found": not_found, "invalid_transition": invalid}
+
+
+# --- İŞ KUYRUĞU (YETKİLİ) ---
+# Yetkilinin belediyesindeki sıradaki bildirimi üstlenir; birden çok yetkili aynı anda
+# birbirini beklemeden kuyruğu eritebilir. Boş kuyrukta 204 döner.
+@app.get("/queue/next", response_model=schemas.Complaint, responses={204: {"description": "Kuyruk boş"}})
+def claim_next_complaint(db: Session = Depends(get_db),
+                         official: models.User = Depends(auth.get_current_official)):
+    if not official.municipality:
+        raise HTTPException(status_code=400, detail="Kullanıcıya bağlı bir belediye tanımlı değil")
+    shards.ensure_writable(official.municipality)
+    with shards.session(shards.shard_for(official.municipality), db) as shard_db:
+        claimed = workflow.claim_next(shard_db, official)
+        if claimed is None:
+            return Response(status_code=204)
+        shard_db.commit()
+    readmodel.model.apply(claimed)
+    return claimed
+
+
+# Bildirim detayı + durum geçmişi (zaman çizelgesi), tek sorgu. Bildirim id'sine göre shard bulunur
+# (bkz. shards.find): önce id aralığının shard'ı, taşınmışsa diğerleri.
+def complaint_detail(db, complaint_id, archived):
+    detail = timeline.read_complaint_detail(db, complaint_id)
+    if detail is None and archived:
+        detail = timeline.read_complaint_detail(db, complaint_id, archive.ARCHIVE, archive.EVENTS_ARCHIVE)
+    return detail
+
+
+@app.get("/complaints/{complaint_id}", response_model=schemas.ComplaintDetail)
+def read_complaint(complaint_id: int, archived: bool = False, db: Session = Depends(replicas.get_read_db)):
+    detail = shards.find(complaint_id, db, lambda shard, shard_db: complaint_detail(shard_db, complaint_id, archived))
+    if detail is None:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    return detail
 
 
+# Tekil yazmalar taşınmakta olan belediyenin satırına dokunmaz (shards.not_frozen); satır
+# bulunamazsa 404'ten önce taşıma kontrolü yapılır (503).
 @app.put("/complaints/{complaint_id}/status", response_model=schemas.Complaint)
 def update_complaint_status(complaint_id: int, status_update: schemas.ComplaintStatusUpdate,
                             db: Session = Depends(get_db)):
-    db_complaint = db.query(models.Complaint).filter(models.Complaint.id == complaint_id).first()
-    if not db_complaint:
+    def apply(shard, shard_db):
+        old_status = stats.bump_status_change(shard_db, complaint_id, status_update.status)
+        db_complaint = shard_db.execute(
+            update(models.Complaint)
+            .where(models.Complaint.id == complaint_id, shards.not_frozen(models.Complaint.municipality))
+            .values(status=status_update.status)
+            .returning(*COMPLAINT_COLUMNS)
+        ).first()
+        if not db_complaint:
+            shard_db.rollback()
+            return None
+        # Durum gerçekten değiştiyse veya not eklendiyse geçmişe yaz (üzerine yazmak yok)
+        if old_status is not None or status_update.note:
+            timeline.record_status_event(shard_db, complaint_id, db_complaint.status, status_update.note)
+        shard_db.commit()
+        return db_complaint, old_status
+
+    result = shards.find(complaint_id, db, apply)
+    if result is None:
+        shards.ensure_not_moving(complaint_id, db)
         raise HTTPException(status_code=404, detail="Complaint not found")
-    db_complaint.status = status_update.status
-    db.commit()
-    db.refresh(db_complaint)
+    db_complaint, old_status = result
+    rollups.buffer.add(rollups.status_change_deltas(db_complaint, old_status))
+    sla.observe_status_change(db_complaint, old_status)
+    plates.invalidate(db_complaint)
+    readmodel.model.apply(db_complaint)
     return db_complaint
 
 
 @app.delete("/complaints/{complaint_id}")
 def delete_complaint(complaint_id: int, db: Session = Depends(get_db)):
-    db_complaint = db.query(models.Complaint).filter(models.Complaint.id == complaint_id).first()
-    if not db_complaint:
+    def apply(shard, shard_db):
+        deleted = shard_db.execute(
+            delete(models.Complaint)
+            .where(models.Complaint.id == complaint_id, shards.not_frozen(models.Complaint.municipality))
+            .returning(*COMPLAINT_COLUMNS)
+        ).first()
+        if deleted is None:
+            return None
+        stats.bump(shard_db, stats.complaint_deltas(deleted, -1))
+        shard_db.commit()
+        return deleted
+
+    deleted = shards.find(complaint_id, db, apply)
+    if deleted is None:
+        shards.ensure_not_moving(complaint_id, db)
         raise HTTPException(status_code=404, detail="Complaint not found")
-    db.delete(db_complaint)
-    db.commit()
+    rollups.buffer.add(rollups.complaint_deltas(deleted, -1))
+    plates.invalidate(deleted)
+    fuzzy_plates.index.remove(deleted.plate_normalized)
+    readmodel.model.remove(deleted.id)
     return {"message": "Complaint deleted"}
 
 
+# --- PANEL İSTATİSTİKLERİ ---
+# Yönetim panelindeki sayılar için tüm bildirimleri indirmeye gerek yok:
+# complaint_stats tablosundan tek sorguyla okunur (shard başına bir sorgu, sonra toplanır).
+@app.get("/stats", response_model=schemas.DashboardStats)
+def read_stats(db: Session = Depends(replicas.get_read_db)):
+    return singleflight.json_response(
+        ("GET /stats", replicas.is_replica(db)), schemas.DashboardStats, lambda: stats.read_national_stats(db)
+    )
+
+
+# Açık (çözülmemiş, reddedilmemiş) bildirimlerin dağılımı; bellek içi modelden (bkz. readmodel.py)
+@app.get("/stats/open", response_model=schemas.OpenStats)
+def read_open_stats(db: Session = Depends(replicas.get_read_db)):
+    return singleflight.json_response(
+        ("GET /stats/open", replicas.is_replica(db)), schemas.OpenStats, lambda: readmodel.read_open_stats(db)
+    )
+
+
+# Tek uçuş sayaçları: route başına kaç sorgu çalıştı, kaç istek bekleyip sonucu paylaştı
+@app.get("/metrics/singleflight")
+def read_singleflight_metrics():
+    return singleflight.group.metrics()
+
+
+# Açılış süreleri: import, ısınma aşamaları (ms); bench_startup.py ile karşılaştırılır
+@app.get("/metrics/startup")
+def read_startup_metrics():
+    return {"ready": warmup.ready, "timings": warmup.timings}
+
+
+# Okuma replikası durumu: tanımlı mı, son ölçülen gecikme, okumalar replikaya gidiyor mu
+@app.get("/metrics/replica")
+def read_replica_metrics():
+    return {"enabled": replicas.enabled(), **replicas.state}
+
+
+# Shard'lar ve belediye dizini (hangi belediye nerede, taşınan var mı)
+@app.get("/metrics/shards")
+def read_shard_metrics():
+    return {
+        "shards": [shard.name for shard in shards.SHARDS],
+        "municipalities": {m: {"shard": name, "moving": moving} for m, (name, moving) in shards.directory().items()},
+    }
+
+
+# Bellek içi okuma modeli: satır sayısı, bellek, kapsanan pencere, modelden / veritabanından cevaplanan okumalar
+@app.get("/metrics/readmodel")
+def read_readmodel_metrics():
+    return readmodel.model.metrics()
+
+
+# --- AÇILIŞ EKRANI ---
+# App.tsx'in girişte ayrı ayrı attığı fetchComplaints / fetchRank / fetchVehicles yerine tek istek.
+# Bölümler role göre seçilir ve paralel yüklenir; değişmeyen bölümlerin verisi dönmez (bkz. bootstrap.py).
+@app.get("/bootstrap", response_model=schemas.Bootstrap)
+def read_bootstrap(request: Request, response: Response,
+                   user: models.User = Depends(auth.get_current_user)):
+    loaders = {
+        "complaints": lambda db: COMPLAINT_ROWS.to_dicts(list_complaints(db)),
+        "stats": stats.read_national_stats,
+    }
+    if user.role == "BELEDIYE_YETKILISI":
+        loaders["vehicles"] = lambda db: VEHICLE_ROWS.to_dicts(list_vehicles(db))
+    else:
+        loaders["rank"] = lambda db: compute_rank(db, user.email)
+
+    known_etags = bootstrap.parse_if_none_match(request.headers.get("if-none-match"))
+    sections = bootstrap.load_sections(loaders, known_etags, replicas.session_factory(request))
+    if all(section["not_modified"] for section in sections.values()):
+        return Response(status_code=304)
+    media_type = fastjson.negotiate(request.headers.get("accept"))
+    headers = {"Cache-Control": "private, no-cache", "Vary": "Accept"}
+    if media_type != fastjson.JSON:
+        payload = {"role": user.role, "sections": sections}
+        return Response(content=fastjson.encode(payload, media_type), media_type=media_type, headers=headers)
+    response.headers.update(headers)
+    return {"role": user.role, "sections": sections}
+
+
+# --- ANALİTİK (ZAMAN SERİSİ) ---
+# Grafikler ham tabloda GROUP BY yapmaz; sadece complaint_rollups okunur (bkz. rollups.py).
+# bucket: hour / day / week, dimension: total / status / category / municipality
+TIMESERIES_DEFAULT_DAYS = {"hour": 2, "day": 30, "week": 84}
+
+
+@app.get("/analytics/timeseries", response_model=schemas.Timeseries)
+def read_timeseries(bucket: str = "day", dimension: str = "category",
+                    since: Optional[date] = None, until: Optional[date] = None,
+                    db: Session = Depends(replicas.get_read_db)):
+    if bucket not in TIMESERIES_DEFAULT_DAYS:
+        raise HTTPException(status_code=400, detail="bucket hour, day veya week olmalı")
+    if dimension not in rollups.DIMENSIONS:
+        raise HTTPException(status_code=400, detail="Geçersiz dimension")
+    until = until or stats.local_date(None)
+    since = since or until - timedelta(days=TIMESERIES_DEFAULT_DAYS[bucket] - 1)
+    points = rollups.read_timeseries(db, bucket, dimension, since, until)
+    return {"bucket": bucket, "dimension": dimension, "points": points}
+
+
+# --- ÇÖZÜLME SÜRESİ (SLA) ---
+# Belediye/kategori bazında çözülme süresi yüzdelikleri (saat). Aylık t-digest'ler
+# birleştirilerek hesaplanır, durum geçmişi taranmaz (bkz. sla.py).
+@app.get("/analytics/sla", response_model=schemas.ResolutionStats)
+def read_resolution_stats(group_by: Optional[str] = None, municipality: Optional[str] = None,
+                          category: Optional[str] = None, months: int = 6,
+                          db: Session = Depends(replicas.get_read_db)):
+    if group_by not in (None, "municipality", "category"):
+        raise HTTPException(status_code=400, detail="group_by municipality veya category olmalı")
+    today = stats.local_date(None)
+    first_month = today.year * 12 + today.month - 1 - (months - 1)
+    since_period = f"{first_month // 12:04d}-{first_month % 12 + 1:02d}"
+    groups = sla.read_resolution_stats(db, group_by, municipality, category, since_period)
+    return {"group_by": group_by, "groups": groups}
+
+
+# --- DIŞA AKTARIM (YETKİLİ) ---
+# Tüm bildirimler NDJSON veya CSV olarak akıtılır (bkz. export.py). Yetkilinin belediyesi
+# tanımlıysa sadece o belediyenin bildirimleri; cursor = son alınan id (kaldığı yerden devam).
+@app.get("/export/complaints")
+def export_complaints(request: Request, format: str = "ndjson", municipality: Optional[str] = None,
+                      category: Optional[str] = None, status: Optional[str] = None,
+                      since: Optional[date] = None, until: Optional[date] = None,
+                      cursor: Optional[int] = None, archived: bool = False,
+                      official: models.User = Depends(auth.get_current_official)):
+    if format not in export.FORMATS:
+        raise HTTPException(status_code=400, detail="format ndjson veya csv olmalı")
+    filters = {
+        "municipality": official.municipality or municipality,
+        "category": category, "status": status, "since": since, "until": until,
+    }
+    filename = f"bildirimler.{format}"
+    return StreamingResponse(
+        export.stream_export(format, filters, cursor, archived, replicas.session_factory(request)),
+        media_type=export.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# --- KOLONSAL SNAPSHOT'LAR (YETKİLİ) ---
+# Aylık Parquet bölümleri (bkz. snapshots.py); iş periyodik çalışır, bu endpoint elle tetikler.
+@app.post("/snapshots", response_model=List[schemas.SnapshotPartition])
+def write_snapshots(db: Session = Depends(get_db), official: models.User = Depends(auth.get_current_official)):
+    if not snapshots.available():
+        raise HTTPException(status_code=503, detail="pyarrow kurulu değil")
+    return snapshots.write_snapshots(db)
+
+
+@app.get("/snapshots", response_model=List[schemas.SnapshotPartition])
+def read_snapshots(official: models.User = Depends(auth.get_current_official)):
+    return snapshots.list_snapshots()
+
+
+# --- DESTEK (UPVOTE) ---
+# Kullanıcı başına bir destek: (complaint_id, kullanıcının email'i) ON CONFLICT DO NOTHING ile eklenir.
+# Kimlik istemcinin gönderdiği metin değil, token'daki kullanıcı; aksi halde herkes sınırsız destek verebilir.
+# Sayaç `complaints` satırında hemen güncellenmez; upvotes.buffer'da toplanıp toplu yazılır.
+@app.post("/complaints/{complaint_id}/upvote", response_model=schemas.UpvoteResult)
+def upvote_complaint(complaint_id: int, db: Session = Depends(get_db),
+                     user: models.User = Depends(auth.get_current_user)):
+    table = models.ComplaintUpvote.__table__
+    # Bildirim yoksa (ya da belediyesi taşınıyorsa) SELECT boş döner ve hiçbir satır eklenmez
+    source = select(literal(complaint_id), literal(user.email)).where(
+        models.Complaint.id == complaint_id, shards.not_frozen(models.Complaint.municipality)
+    )
+
+    def apply(shard, shard_db):
+        inserted = shard_db.execute(
+            dialect_insert(shard_db, table)
+            .from_select([table.c.complaint_id, table.c.user_identifier], source)
+            .on_conflict_do_nothing(index_elements=[table.c.complaint_id, table.c.user_identifier])
+            .returning(table.c.complaint_id)
+        ).first()
+        if inserted is None:
+            # Ya zaten desteklenmiş ya da bildirim bu shard'da yok; ayrımı sadece bu yolda yapıyoruz
+            exists = shard_db.execute(select(models.Complaint.id).where(models.Complaint.id == complaint_id)).first()
+            return (shard, False) if exists else None
+        shard_db.commit()
+        return shard, True
+
+    result = shards.find(complaint_id, db, apply)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    shard, upvoted = result
+    if upvoted:
+        upvotes.buffers[shard.name].add(complaint_id)
+    else:
+        shards.ensure_not_moving(complaint_id, db)
+    return {"upvoted": upvoted}
+
+
 # --- ARAÇ ENDPOINTLERİ ---
 
 @app.post("/vehicles/", response_model=schemas.Vehicle)
 def create_vehicle(vehicle: schemas.VehicleCreate, db: Session = Depends(get_db)):
-    db_vehicle = models.Vehicle(**vehicle.dict())
-    db.add(db_vehicle)
+    # Plaka bildirimlerdeki plate_normalized ile eşleşsin diye normalize edilerek saklanır
+    values = vehicle.dict()
+    values["plate"] = plates.normalize_plate(vehicle.plate) or vehicle.plate
+    db_vehicle = db.execute(
+        insert(models.Vehicle).values(**values).returning(*VEHICLE_COLUMNS)
+    ).one()
     db.commit()
-    db.refresh(db_vehicle)
+    plates.cache.invalidate(plates.OVERVIEW_KEY)
+    fuzzy_plates.index.add(db_vehicle.plate)
     return db_vehicle
 
 
+def list_vehicles(db):
+    return db.execute(VEHICLE_ROWS.select()).all()
+
+
 @app.get("/vehicles/", response_model=List[schemas.Vehicle])
-def read_vehicles(db: Session = Depends(get_db)):
-    return db.query(models.Vehicle).all()
+def read_vehicles(db: Session = Depends(replicas.get_read_db)):
+    return Response(content=VEHICLE_ROWS.render(list_vehicles(db)), media_type="application/json")
 
 
 @app.delete("/vehicles/{vehicle_id}")
 def delete_vehicle(vehicle_id: int, db: Session = Depends(get_db)):
-    vehicle = db.query(models.Vehicle).filter(models.Vehicle.id == vehicle_id).first()
-    if not vehicle:
+    deleted = db.execute(
+        delete(models.Vehicle).where(models.Vehicle.id == vehicle_id).returning(models.Vehicle.plate)
+    ).first()
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Vehicle not found")
-    db.delete(vehicle)
     db.commit()
+    plates.cache.invalidate(plates.OVERVIEW_KEY)
+    fuzzy_plates.index.remove(deleted.plate)
     return {"message": "Vehicle deleted"}
 
+
+# --- CSV İLE TOPLU ARAÇ YÜKLEME ---
+# Başlık: plate,serial_no. Postgres'te COPY, SQLite'ta toplu upsert (bkz. vehicle_import.py).
+@app.post("/vehicles/import", response_model=schemas.VehicleImportResult)
+def import_vehicles(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    try:
+        result, imported_plates = vehicle_import.import_vehicles(db, file.file)
+    except vehicle_import.UnreadableCSV as e:
+        # Okunamayan satırdan önceki parçalar commit edilmiş olabilir
+        refresh_imported_plates(e.plates)
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    refresh_imported_plates(imported_plates)
+    return result
+
+
+def refresh_imported_plates(imported_plates):
+    if imported_plates:
+        plates.cache.invalidate(plates.OVERVIEW_KEY)
+    for plate in imported_plates:
+        fuzzy_plates.index.ensure(plate)
+
+
+# --- FİLO ÖZETİ VE ARAÇ GEÇMİŞİ ---
+# Her araç + bildirim sayıları tek toplu sorguyla; sonuç önbellekte tutulur (bkz. plates.cache).
+@app.get("/vehicles/overview", response_model=List[schemas.FleetVehicle])
+def read_fleet_overview(db: Session = Depends(get_db)):
+    overview = plates.cache.get(plates.OVERVIEW_KEY)
+    if overview is None:
+        overview = plates.fleet_overview(db)
+        plates.cache.set(plates.OVERVIEW_KEY, overview)
+    return overview
+
+
+# --- BULANIK PLAKA ARAMA ---
+# "34ABC123" yazılınca "34ABC128" gibi yakın plakaları da bulur (araçlar + bildirimlerdeki
+# plakalar). Veritabanına gitmez; bellek içi indeks (bkz. fuzzy_plates.py).
+@app.get("/plates/fuzzy", response_model=List[schemas.FuzzyPlateMatch])
+def fuzzy_plate_search(q: str, max_dist: int = 1, limit: int = 20, db: Session = Depends(get_db)):
+    normalized = plates.normalize_plate(q)
+    if not normalized:
+        raise HTTPException(status_code=400, detail="Geçersiz plaka")
+    if not 0 <= max_dist <= fuzzy_plates.MAX_DISTANCE:
+        raise HTTPException(status_code=400, detail=f"max_dist 0 ile {fuzzy_plates.MAX_DISTANCE} arası olmalı")
+    fuzzy_plates.index.ensure_loaded(db)
+    return fuzzy_plates.index.search(normalized, max_dist, limit)
+
+
+@app.get("/vehicles/{plate}/complaints", response_model=List[schemas.Complaint])
+def read_vehicle_complaints(plate: str, archived: bool = False, db: Session = Depends(get_db)):
+    normalized = plates.normalize_plate(plate)
+    if not normalized:
+        raise HTTPException(status_code=400, detail="Geçersiz plaka")
+    if archived:
+        # Arşivli geçmiş nadiren istenir; önbelleğe alınmaz
+        return [dict(row._mapping) for row in plates.complaints_for_plate(db, normalized, archived=True)]
+    history = plates.cache.get(normalized)
+    if history is None:
+        history = [dict(row._mapping) for row in plates.complaints_for_plate(db, normalized)]
+        plates.cache.set(normalized, history)
+    return history
+
 # --- MEVCUT IMPORTLARIN ALTINA, EN SONA EKLE ---
 
 @app.get("/reset_db")
 def reset_database():
     try:
-        # Tüm tabloları sil
-        Base.metadata.drop_all(bind=engine)
-        # Tabloları modellerdeki en güncel haliyle tekrar oluştur
-        Base.metadata.create_all(bind=engine)
+        for shard in shards.SHARDS:
+            # Tüm tabloları sil
+            Base.metadata.drop_all(bind=shard.engine)
+            # Tabloları modellerdeki en güncel haliyle tekrar oluştur
+            Base.metadata.create_all(bind=shard.engine)
+            migrations.stamp_head(shard.engine)
+            with shard.engine.begin() as conn:
+                shards.set_id_floor(conn)
+        readmodel.model.reload()
         return {"message": "Veritabanı tamamen sıfırlandı ve tüm sütunlar (user_identifier dahil) eklendi!"}
     except Exception as e:
         return {"message": f"Hata: {str(e)}"}
@@ -200,21 +837,19 @@ def reset_database():
 
 @app.post("/register", response_model=schemas.UserOut)
 def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    # Email daha önce alınmış mı kontrol et
-    existing_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Bu email adresi zaten kullanımda.")
-
-    # Şifreyi hashle ve kaydet
+    # Şifreyi hashle ve kaydet. Email kontrolü ayrı bir SELECT değil: ON CONFLICT DO NOTHING
+    # ile tek ifadede yapılır, aynı anda gelen iki kayıt isteği de yarışa girmez.
     hashed_pwd = auth.get_password_hash(user.password)
-    new_user = models.User(
-        email=user.email,
-        hashed_password=hashed_pwd,
-        role=user.role
-    )
-    db.add(new_user)
+    users = models.User.__table__
+    new_user = db.execute(
+        dialect_insert(db, users)
+        .values(email=user.email, hashed_password=hashed_pwd, role=officials.CITIZEN_ROLE)
+        .on_conflict_do_nothing(index_elements=[users.c.email])
+        .returning(*users.c)
+    ).first()
+    if new_user is None:
+        raise HTTPException(status_code=400, detail="Bu email adresi zaten kullanımda.")
     db.commit()
-    db.refresh(new_user)
     return new_user
 
 
@@ -0,0 +1,192 @@
+import os
+import sys
+import logging
+
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, inspect, select, func, text
+from sqlalchemy.exc import ProgrammingError, OperationalError
+from sqlalchemy.orm import Session
+
+import models  # noqa: F401  (Base.metadata tüm tabloları tanısın)
+from database import Base, engine
+
+logger = logging.getLogger("kentinsesi.migrations")
+
+# Açılışta bekleyen migration varsa uygulansın mı (varsayılan: açılmayı reddet, elle: python migrations.py)
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "0") == "1"
+
+# Modellerden ayrı metadata: create_all / drop_all (reset_db) bu tabloya dokunmaz
+_metadata = MetaData()
+schema_version = Table(
+    "schema_version", _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+# --- ADIMLAR ---
+def create_tables(conn):
+    # Eksik tabloları (ve onların indekslerini) oluşturur; var olan tablolara dokunmaz
+    Base.metadata.create_all(bind=conn)
+
+
+# Sonradan modele eklenen sütunlar (eski /fix_db listesi)
+ADDED_COLUMNS = [
+    ("complaints", "lat", "FLOAT"),
+    ("complaints", "lng", "FLOAT"),
+    ("complaints", "user_identifier", "VARCHAR"),
+    ("complaints", "assigned_to", "VARCHAR"),
+    ("complaints", "assigned_at", "TIMESTAMP WITH TIME ZONE"),
+    ("complaints", "plate_normalized", "VARCHAR"),
+    ("complaints", "client_id", "VARCHAR"),
+    ("users", "municipality", "VARCHAR"),
+]
+
+
+def add_columns(conn):
+    inspector = inspect(conn)
+    existing = {}
+    for table, column, ddl in ADDED_COLUMNS:
+        if table not in existing:
+            existing[table] = {c["name"] for c in inspector.get_columns(table)}
+        if column not in existing[table]:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def _has_unique(inspector, table, column):
+    unique_sets = [c["column_names"] for c in inspector.get_unique_constraints(table)]
+    unique_sets += [i["column_names"] for i in inspector.get_indexes(table) if i.get("unique")]
+    return [column] in unique_sets
+
+
+def create_index(conn, name, table, columns, unique=False):
+    # Postgres'te CONCURRENTLY: tablo yazmaya kilitlenmez. Yarıda kalan bir CONCURRENTLY
+    # geçersiz (INVALID) indeks bırakır; IF NOT EXISTS onu atlamasın diye önce silinir.
+    unique_sql = "UNIQUE " if unique else ""
+    if conn.dialect.name == "postgresql":
+        invalid = conn.execute(text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ), {"name": name}).first()
+        if invalid:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        conn.execute(text(
+            f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+        ))
+    else:
+        conn.execute(text(f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
+
+
+def create_indexes(conn):
+    create_index(conn, "ix_complaints_plate_normalized", "complaints", ["plate_normalized"])
+    create_index(conn, "ix_complaints_queue", "complaints", ["municipality", "status", "created_at"])
+    # Yeni kurulumda client_id zaten UNIQUE; sütunu sonradan eklenen tabloda indeksle sağlanır
+    if not _has_unique(inspect(conn), "complaints", "client_id"):
+        create_index(conn, "ix_complaints_client_id", "complaints", ["client_id"], unique=True)
+
+
+def backfill_plates(conn):
+    import plates  # plates -> workflow -> stats zinciri sadece bu adımda gerekli
+
+    with Session(bind=conn) as session:
+        plates.backfill(session)
+
+
+def normalize_vehicle_plates(conn):
+    import plates
+
+    renamed, removed = plates.normalize_vehicle_plates(conn)
+    logger.info("%d araç plakası normalize edildi, %d kopya silindi", renamed, removed)
+
+
+def set_complaint_id_floor(conn):
+    import shards  # shard listesi (DATABASE_SHARDS) sadece bu adımda gerekli
+
+    shards.set_id_floor(conn)
+
+
+# --- MIGRATION LİSTESİ ---
+# (sürüm, ad, fonksiyon, transaction). Sadece sona eklenir; uygulanmış bir adım değiştirilmez.
+# transaction=False olan adımlar AUTOCOMMIT bağlantıda çalışır (CREATE INDEX CONCURRENTLY
+# transaction içinde çalışamaz); bu yüzden yarıda kalırsa tekrar çalıştırılabilir olmalı.
+MIGRATIONS = [
+    (1, "create_tables", create_tables, True),
+    (2, "add_columns", add_columns, True),
+    (3, "create_indexes", create_indexes, False),
+    (4, "backfill_plate_normalized", backfill_plates, False),
+    (5, "create_replica_heartbeat", create_tables, True),
+    (6, "create_municipality_shards", create_tables, True),
+    (7, "set_complaint_id_floor", set_complaint_id_floor, True),
+    (8, "normalize_vehicle_plates", normalize_vehicle_plates, True),
+]
+HEAD = MIGRATIONS[-1][0]
+
+
+def current_version(bind=engine):
+    # Açılıştaki tek kontrol: tek satırlık SELECT (tablo yoksa sürüm 0)
+    with bind.connect() as conn:
+        try:
+            return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+        except (ProgrammingError, OperationalError):
+            # schema_version henüz yok
+            return 0
+
+
+def _record(conn, version, name):
+    conn.execute(schema_version.insert().values(version=version, name=name))
+
+
+def migrate(bind=engine):
+    _metadata.create_all(bind=bind)
+    applied = []
+    version = current_version(bind)
+    for number, name, step, transactional in MIGRATIONS:
+        if number <= version:
+            continue
+        logger.info("Migration %d uygulanıyor: %s", number, name)
+        if transactional:
+            with bind.begin() as conn:
+                step(conn)
+                _record(conn, number, name)
+        else:
+            with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                step(conn)
+                _record(conn, number, name)
+        applied.append(name)
+    return applied
+
+
+def stamp_head(bind=engine):
+    # Şema modellerden sıfırdan kurulduysa (reset_db) tüm adımlar uygulanmış sayılır
+    _metadata.create_all(bind=bind)
+    with bind.begin() as conn:
+        conn.execute(schema_version.delete())
+        conn.execute(schema_version.insert(), [{"version": n, "name": name} for n, name, _, _ in MIGRATIONS])
+
+
+# --- AÇILIŞ KONTROLÜ ---
+# main.py her soğuk başlangıçta create_all ile tüm tabloları Neon'a karşı yansıtmak yerine sadece
+# sürümü okur. Geride ise MIGRATE_ON_STARTUP=1 değilse uygulama açılmaz (eksik sütunla trafik almak
+# yerine deploy başarısız olsun); migration'lar deploy'da başlatmadan önce uygulanır:
+#   python migrations.py && uvicorn main:app ...
+def check_on_startup(bind=engine):
+    version = current_version(bind)
+    if version >= HEAD:
+        return version
+    if MIGRATE_ON_STARTUP:
+        migrate(bind)
+        return HEAD
+    raise RuntimeError(
+        f"Veritabanı şeması geride (sürüm {version}, güncel {HEAD}): önce python migrations.py çalıştırın "
+        "ya da MIGRATE_ON_STARTUP=1 verin"
+    )
+
+
+if __name__ == "__main__":
+    import shards
+
+    logging.basicConfig(level=logging.INFO)
+    # Her shard aynı şemayla kurulur (kullanıcı/araç tabloları sadece ana shard'da dolu)
+    for shard in shards.SHARDS:
+        done = migrate(shard.engine)
+        print(f"{shard.name}: {len(done)} migration uygulandı, şema sürümü {HEAD}.", file=sys.stderr)
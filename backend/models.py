@@ -1,11 +1,10 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Float
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Float, Text, Index
 from sqlalchemy.sql import func
 from database import Base
 
 
-class Complaint(Base):
-    __tablename__ = "complaints"
-
+# Bildirim sütunları hem sıcak tabloda (complaints) hem arşivde (complaints_archive) aynı
+class ComplaintColumns:
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     description = Column(String)
@@ -16,6 +15,7 @@ class Complaint(Base):
 
     # Detaylar
     plate = Column(String, nullable=True)
+    plate_normalized = Column(String, index=True, nullable=True)  # plates.normalize_plate(plate)
     firm_name = Column(String, nullable=True)
     municipality = Column(String, nullable=True)
 
@@ -23,10 +23,31 @@ class Complaint(Base):
     lat = Column(Float, nullable=True)
     lng = Column(Float, nullable=True)
     user_identifier = Column(String, index=True, nullable=True)  # <-- YENİ EKLENDİ (Anonim ID)
+    client_id = Column(String, unique=True, nullable=True)  # Mobilin ürettiği id (tekrar gönderimde idempotency)
 
     upvotes = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # İş kuyruğu: bildirimi üstlenen yetkili (email) ve üstlenme zamanı
+    assigned_to = Column(String, nullable=True)
+    assigned_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class Complaint(ComplaintColumns, Base):
+    __tablename__ = "complaints"
+    # AUTOINCREMENT: SQLite shard'ında id'ler shard'ın aralığından başlasın (bkz. shards.py)
+    __table_args__ = (
+        Index("ix_complaints_queue", "municipality", "status", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
+
+
+class ComplaintArchive(ComplaintColumns, Base):
+    # Eski ve çözülmüş bildirimler (bkz. archive.py); id'ler sıcak tablodakiyle aynı kalır
+    __tablename__ = "complaints_archive"
+
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
 
 class Vehicle(Base):
     __tablename__ = "vehicles"
@@ -44,4 +65,94 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     role = Column(String, default="VATANDAS") # VATANDAS veya BELEDIYE_YETKILISI
     is_verified = Column(Boolean, default=False) # İleride e-mail onayı için kullanacağız
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    municipality = Column(String, nullable=True) # Belediye yetkilisinin bağlı olduğu belediye
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ComplaintUpvote(Base):
+    # Kim hangi bildirimi desteklemiş; (complaint_id, user_identifier) birincil anahtar
+    # olduğu için aynı kullanıcı bir bildirimi ancak bir kez destekleyebilir.
+    __tablename__ = "complaint_upvotes"
+
+    complaint_id = Column(Integer, ForeignKey("complaints.id", ondelete="CASCADE"), primary_key=True)
+    user_identifier = Column(String, primary_key=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ComplaintStat(Base):
+    # Panel istatistikleri için önceden hesaplanmış sayaçlar. dimension: status / category /
+    # municipality / total / day; key: ilgili değer (day için YYYY-MM-DD, Türkiye saati).
+    __tablename__ = "complaint_stats"
+
+    dimension = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class ComplaintRollup(Base):
+    # Grafikler için zaman dilimli özet: bildirimin oluşturulduğu saat/gün başına sayılar.
+    # granularity: hour / day; bucket: "YYYY-MM-DDTHH" veya "YYYY-MM-DD" (Türkiye saati).
+    __tablename__ = "complaint_rollups"
+
+    granularity = Column(String, primary_key=True)
+    bucket = Column(String, primary_key=True)
+    dimension = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+
+class ComplaintStatusEvent(Base):
+    # Durum geçmişi (sadece ekleme yapılır, güncellenmez). Bildirimin oluşturulma anı ayrıca
+    # yazılmaz; zaman çizelgesinde Complaint.created_at'ten türetilir.
+    __tablename__ = "complaint_status_events"
+    __table_args__ = (Index("ix_complaint_status_events_complaint_ts", "complaint_id", "ts"),)
+
+    id = Column(Integer, primary_key=True)
+    complaint_id = Column(Integer, ForeignKey("complaints.id", ondelete="CASCADE"), nullable=False)
+    status = Column(String, nullable=False)
+    note = Column(String, nullable=True)
+    is_official = Column(Boolean, default=True)
+    ts = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ComplaintStatusEventArchive(Base):
+    # Arşivlenen bildirimlerin durum geçmişi; complaints'e FK yok (bildirim artık orada değil)
+    __tablename__ = "complaint_status_events_archive"
+    __table_args__ = (Index("ix_complaint_status_events_archive_complaint_ts", "complaint_id", "ts"),)
+
+    id = Column(Integer, primary_key=True)
+    complaint_id = Column(Integer, nullable=False)
+    status = Column(String, nullable=False)
+    note = Column(String, nullable=True)
+    is_official = Column(Boolean, default=True)
+    ts = Column(DateTime(timezone=True))
+
+
+class ResolutionSketch(Base):
+    # Çözülme süresi dağılımı (saat), t-digest olarak. Ay + belediye + kategori başına bir satır;
+    # sketch'ler birleştirilebilir olduğu için panel istediği aralığı/grubu okuyup birleştirir.
+    __tablename__ = "resolution_sketches"
+
+    period = Column(String, primary_key=True)  # YYYY-MM (çözülme ayı, Türkiye saati)
+    municipality = Column(String, primary_key=True)  # bilinmiyorsa ""
+    category = Column(String, primary_key=True)  # bilinmiyorsa ""
+    count = Column(Integer, nullable=False, default=0)
+    digest = Column(Text, nullable=False)
+
+
+class ReplicaHeartbeat(Base):
+    # Primary'ye periyodik yazılan tek satır; replikadaki değeriyle karşılaştırılarak gecikme ölçülür
+    __tablename__ = "replica_heartbeat"
+
+    id = Column(Integer, primary_key=True)
+    written_at = Column(Float, nullable=False)  # time.time()
+
+
+class MunicipalityShard(Base):
+    # Belediye -> shard dizini (sadece ana veritabanında). Listede olmayan belediye ana shard'da.
+    # moving: taşıma sürüyor, bu belediyenin bildirimlerine yazma geçici olarak kapalı (bkz. rebalance.py)
+    __tablename__ = "municipality_shards"
+
+    municipality = Column(String, primary_key=True)
+    shard = Column(String, nullable=False)
+    moving = Column(Boolean, nullable=False, default=False)
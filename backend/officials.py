@@ -0,0 +1,56 @@
+import sys
+import argparse
+
+from sqlalchemy import update
+
+import models
+from database import SessionLocal
+
+OFFICIAL_ROLE = "BELEDIYE_YETKILISI"
+CITIZEN_ROLE = "VATANDAS"
+
+USERS = models.User.__table__
+
+
+# --- BELEDİYE YETKİLİLERİ ---
+# /register herkese vatandaş hesabı açar; rol ve belediye istemciden alınmaz. Yetkili hesabı,
+# kullanıcı kaydolduktan sonra sunucuya erişimi olan biri tarafından buradan verilir:
+#   python officials.py grant yetkili@cankaya.bel.tr Çankaya
+#   python officials.py revoke yetkili@cankaya.bel.tr
+def grant(db, email, municipality):
+    updated = db.execute(
+        update(USERS).where(USERS.c.email == email).values(role=OFFICIAL_ROLE, municipality=municipality)
+    ).rowcount
+    db.commit()
+    return bool(updated)
+
+
+def revoke(db, email):
+    updated = db.execute(
+        update(USERS).where(USERS.c.email == email).values(role=CITIZEN_ROLE, municipality=None)
+    ).rowcount
+    db.commit()
+    return bool(updated)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Belediye yetkilisi hesaplarını yönetir")
+    sub = parser.add_subparsers(dest="command", required=True)
+    grant_parser = sub.add_parser("grant", help="Kullanıcıyı bir belediyenin yetkilisi yap")
+    grant_parser.add_argument("email")
+    grant_parser.add_argument("municipality")
+    revoke_parser = sub.add_parser("revoke", help="Yetkiliyi vatandaş hesabına döndür")
+    revoke_parser.add_argument("email")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        if args.command == "grant":
+            found = grant(session, args.email, args.municipality)
+        else:
+            found = revoke(session, args.email)
+    finally:
+        session.close()
+    if not found:
+        sys.exit(f"{args.email} kayıtlı değil")
+    print(f"{args.email} güncellendi.", file=sys.stderr)
@@ -0,0 +1,161 @@
+import os
+import re
+import sys
+import heapq
+import logging
+from itertools import islice
+
+from sqlalchemy import select, update, func, and_, bindparam
+
+import models
+import archive
+import shards
+from cache import TTLCache
+from database import SessionLocal
+from workflow import RESOLVED_STATUS, REJECTED_STATUS
+
+logger = logging.getLogger("kentinsesi.plates")
+
+# --- PLAKA NORMALİZASYONU ---
+# Frontend'deki formatAndValidatePlate (src/App.tsx) ile aynı kural, ikisi birlikte değişmeli: büyük
+# harf, Türkçe harfler ASCII karşılığına çevrilir (atılmaz), kalan harf/rakam dışı her şey atılır.
+# "34 abc 123", "34-ABC-123" ve "34abç123" aynı plakaya (34ABC123) düşer.
+_TURKISH = str.maketrans({"Ş": "S", "Ğ": "G", "Ü": "U", "Ö": "O", "Ç": "C", "İ": "I"})
+_NON_ALNUM = re.compile(r"[^A-Z0-9]")
+
+# (01-81 arası il kodu) + (1-3 harf) + (3-4 rakam)
+PLATE_REGEX = re.compile(r"^(0[1-9]|[1-7][0-9]|8[0-1])[A-Z]{1,3}[0-9]{3,4}$")
+
+
+def normalize_plate(text):
+    if not text:
+        return None
+    # "ı".upper() == "I", "i".upper() == "I"; Türkçe büyük harfler ayrıca çevrilir
+    clean = _NON_ALNUM.sub("", text.upper().translate(_TURKISH))
+    return clean or None
+
+
+def is_valid_plate(plate):
+    return bool(plate) and PLATE_REGEX.match(plate) is not None
+
+
+# --- ARAÇ GEÇMİŞİ ÖNBELLEĞİ ---
+# Anahtar: normalize plaka (araç geçmişi) veya OVERVIEW_KEY (filo özeti). Bir plakaya ait
+# bildirim eklenince/silinince/durumu değişince o plakanın girdisi ve filo özeti düşürülür.
+OVERVIEW_KEY = "__overview__"
+cache = TTLCache(ttl_seconds=int(os.getenv("PLATE_CACHE_TTL", "60")), max_entries=4096)
+
+
+def invalidate(*rows):
+    plates = {row.plate_normalized for row in rows if row.plate_normalized}
+    if plates:
+        cache.invalidate(OVERVIEW_KEY, *plates)
+
+
+def complaints_for_plate(db, plate, limit=100, archived=False):
+    c = archive.complaints_source(archived).c
+    query = select(*c).where(c.plate_normalized == plate).order_by(c.created_at.desc()).limit(limit)
+    # Araç birden çok belediyede bildirilmiş olabilir: her shard'ın son `limit` kaydı birleştirilir
+    parts = shards.scatter(lambda shard_db: shard_db.execute(query).all(), db)
+    if len(parts) == 1:
+        return parts[0]
+    return list(islice(heapq.merge(*parts, key=lambda row: row.created_at, reverse=True), limit))
+
+
+def _overview_row(vehicle, counts):
+    complaint_count, open_count, last_complaint_at = counts
+    return dict(vehicle._mapping, complaint_count=complaint_count, open_count=open_count,
+                last_complaint_at=last_complaint_at)
+
+
+def fleet_overview(db):
+    v = models.Vehicle.__table__
+    c = models.Complaint.__table__
+    open_count = func.count(c.c.id).filter(c.c.status.notin_([RESOLVED_STATUS, REJECTED_STATUS]))
+    if not shards.enabled():
+        # Araçlar + bildirim sayıları tek GROUP BY sorgusunda (plate_normalized indeksi üzerinden join)
+        rows = db.execute(
+            select(
+                *v.c,
+                func.count(c.c.id).label("complaint_count"),
+                open_count.label("open_count"),
+                func.max(c.c.created_at).label("last_complaint_at"),
+            )
+            .select_from(v.outerjoin(c, c.c.plate_normalized == v.c.plate))
+            .group_by(*v.c)
+            .order_by(func.count(c.c.id).desc(), v.c.plate)
+        ).all()
+        return [dict(row._mapping) for row in rows]
+
+    # Araçlar ana shard'da, bildirimler her shard'da: plaka başına sayılar shard'larda toplanıp
+    # araç listesiyle bellekte birleştirilir
+    counts = {}
+    plate_counts = select(c.c.plate_normalized, func.count(c.c.id), open_count, func.max(c.c.created_at)).where(
+        c.c.plate_normalized.isnot(None)
+    ).group_by(c.c.plate_normalized)
+    for rows in shards.scatter(lambda shard_db: shard_db.execute(plate_counts).all(), db):
+        for plate, total, still_open, last in rows:
+            previous = counts.get(plate, (0, 0, None))
+            latest = max(filter(None, (previous[2], last)), default=None)
+            counts[plate] = (previous[0] + total, previous[1] + still_open, latest)
+    overview = [_overview_row(vehicle, counts.get(vehicle.plate, (0, 0, None))) for vehicle in db.execute(select(*v.c))]
+    overview.sort(key=lambda row: (-row["complaint_count"], row["plate"]))
+    return overview
+
+
+def backfill(db, batch_size=1000):
+    # plate_normalized eklenmeden önce yazılmış bildirimleri doldurur
+    c = models.Complaint.__table__
+    stmt = update(c).where(c.c.id == bindparam("cid")).values(plate_normalized=bindparam("normalized"))
+    total = 0
+    while True:
+        rows = db.execute(
+            select(c.c.id, c.c.plate)
+            .where(and_(c.c.plate.isnot(None), c.c.plate_normalized.is_(None)))
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        # Normalize edilemeyen plaka ("---" gibi) boş string olarak işaretlenir ki tekrar seçilmesin
+        db.execute(stmt, [{"cid": row.id, "normalized": normalize_plate(row.plate) or ""} for row in rows])
+        db.commit()
+        total += len(rows)
+    return total
+
+
+def normalize_vehicle_plates(db):
+    # Normalizasyondan önce kaydedilmiş araç plakaları ("34 abc 123") bildirimlerle eşleşmiyordu.
+    # Aynı plakaya düşen kayıtlar çakışır (plate tekil): zaten normalize olan ya da en eski kayıt
+    # plakayı alır; seri numarası aynı olan kopyalar silinir, farklı olanlar elle bakılsın diye
+    # olduğu gibi bırakılır ve loglanır. Çağıranın transaction'ında çalışır.
+    v = models.Vehicle.__table__
+    rows = db.execute(select(v.c.id, v.c.plate, v.c.serial_no).order_by(v.c.id)).all()
+    groups = {}
+    for row in rows:
+        normalized = normalize_plate(row.plate)
+        if normalized:
+            groups.setdefault(normalized, []).append(row)
+    renamed = removed = 0
+    for normalized, group in groups.items():
+        group.sort(key=lambda row: (row.plate != normalized, row.id))
+        keeper, duplicates = group[0], group[1:]
+        for row in duplicates:
+            if row.serial_no == keeper.serial_no:
+                db.execute(v.delete().where(v.c.id == row.id))
+                removed += 1
+            else:
+                logger.warning("Araç %d (%r) %s plakasıyla çakışıyor (araç %d), normalize edilmedi",
+                               row.id, row.plate, normalized, keeper.id)
+        if keeper.plate != normalized:
+            db.execute(update(v).where(v.c.id == keeper.id).values(plate=normalized))
+            renamed += 1
+    return renamed, removed
+
+
+if __name__ == "__main__":
+    session = SessionLocal()
+    try:
+        count = backfill(session)
+    finally:
+        session.close()
+    print(f"{count} bildirimin plakası normalize edildi.", file=sys.stderr)
@@ -0,0 +1,119 @@
+import os
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import shards
+
+logger = logging.getLogger("kentinsesi.query_budget")
+
+# --- ENDPOINT BAŞINA SORGU BÜTÇESİ ---
+# Her endpoint'in bir istekte en fazla kaç SQL ifadesi çalıştırabileceği.
+# Neon'a her gidiş-dönüş 20-80 ms; bir endpoint'e fazladan SELECT/refresh eklenirse
+# burada yakalanır. Anahtar: (HTTP metodu, route path'i).
+ENDPOINT_BUDGETS = {
+    ("POST", "/complaints/"): 2,
+    ("POST", "/complaints/batch"): 3,  # INSERT + sayaç + (varsa) tekrarların id'leri
+    ("GET", "/complaints/"): 1,  # okuma modelinden cevaplanırsa 0 (bkz. readmodel.py)
+    ("GET", "/complaints/{complaint_id}"): 2,  # archived=true ise sıcak tablodan sonra arşiv
+    ("POST", "/complaints/bulk_status"): 5,  # kullanıcı + kilit + UPDATE + sayaç + geçmiş
+    ("GET", "/queue/next"): 2,  # kullanıcı + üstlenme
+    ("PUT", "/complaints/{complaint_id}/status"): 4,  # kilit + sayaç + UPDATE + geçmiş
+    ("DELETE", "/complaints/{complaint_id}"): 2,
+    ("POST", "/complaints/{complaint_id}/upvote"): 3,  # kullanıcı + INSERT (+ zaten desteklediyse varlık kontrolü)
+    ("POST", "/vehicles/"): 1,
+    ("GET", "/vehicles/"): 1,
+    ("DELETE", "/vehicles/{vehicle_id}"): 1,
+    ("GET", "/vehicles/overview"): 1,
+    ("GET", "/vehicles/{plate}/complaints"): 1,
+    ("GET", "/plates/fuzzy"): 2,  # sadece indeks ilk kez yüklenirken
+    ("GET", "/rank/{user_identifier}"): 1,
+    ("GET", "/leaderboard"): 1,
+    ("GET", "/stats"): 1,
+    ("GET", "/stats/open"): 1,  # okuma modeli hazırsa 0
+    ("GET", "/bootstrap"): 4,  # kullanıcı + paralel bölümler (akış, istatistik, sıralama / araçlar)
+    ("GET", "/analytics/timeseries"): 1,
+    ("GET", "/analytics/sla"): 1,
+    ("GET", "/export/complaints"): 2,  # kullanıcı + akışlı SELECT
+    ("POST", "/register"): 1,
+    ("POST", "/login"): 1,
+}
+
+# Shard'lı kurulumda bütçeler shard başınadır: ülke geneli okumalar her shard'a gider, id ile
+# bulunan bildirim için sıradaki shard'lara bakılabilir (bkz. shards.py).
+SHARD_COUNT = len(shards.SHARDS)
+
+# Sayaç sadece geliştirme / CI'da açılır (QUERY_BUDGET=1): üretimde her ifadeye dinleyici ve
+# istek başına ifade listesi tutulmaz. QUERY_BUDGET_STRICT=1 sayacı da açar ve bütçe aşımında
+# 500 döndürür; aksi halde sadece log'a uyarı yazılır. Bütçeler testlerde de kontrol edilir
+# (bkz. tests/test_query_budgets.py).
+STRICT = os.getenv("QUERY_BUDGET_STRICT", "0") == "1"
+ENABLED = STRICT or os.getenv("QUERY_BUDGET", "0") == "1"
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class _Counter:
+    def __init__(self, parent):
+        self.count = 0
+        self.statements = []
+        self.parent = parent  # iç içe sayaçlarda dıştaki de sayar (test + middleware)
+
+
+# Threadpool'a geçen sync endpoint'ler context'in kopyasını alır; sayaç mutable
+# bir nesne olduğu için artışlar istek sahibine geri yansır.
+_current = ContextVar("query_budget_counter", default=None)
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _current.get()
+    while counter is not None:
+        counter.count += 1
+        counter.statements.append(statement)
+        counter = counter.parent
+
+
+def install():
+    if not event.contains(Engine, "before_cursor_execute", _count_statement):
+        event.listen(Engine, "before_cursor_execute", _count_statement)
+
+
+@contextmanager
+def count_statements():
+    # Blok içinde çalışan SQL ifadelerini sayar: `with count_statements() as c: ...; c.count`
+    # (dinleyici install() ile kurulmuş olmalı)
+    counter = _Counter(_current.get())
+    token = _current.set(counter)
+    try:
+        yield counter
+    finally:
+        _current.reset(token)
+
+
+def check_budget(method, path, counter):
+    budget = ENDPOINT_BUDGETS.get((method, path))
+    if budget is None or counter.count <= budget * SHARD_COUNT:
+        return
+    message = f"{method} {path} {counter.count} sorgu çalıştırdı (bütçe: {budget}): {counter.statements}"
+    if STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+if ENABLED:
+    install()
+
+
+async def query_budget_middleware(request, call_next):
+    with count_statements() as counter:
+        response = await call_next(request)
+    route = request.scope.get("route")
+    if route is not None:
+        check_budget(request.method, route.path, counter)
+    response.headers["X-Query-Count"] = str(counter.count)
+    return response
@@ -0,0 +1,482 @@
+import os
+import sys
+import math
+import heapq
+import logging
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, func, and_, not_
+
+import models
+import jobs
+import shards
+from database import SessionLocal
+from workflow import RESOLVED_STATUS, REJECTED_STATUS
+
+logger = logging.getLogger("kentinsesi.readmodel")
+
+ENABLED = os.getenv("READ_MODEL", "1") == "1"
+# Son WINDOW_DAYS günün tüm bildirimleri + yaşına bakılmaksızın açık olanlar
+WINDOW_DAYS = int(os.getenv("READ_MODEL_WINDOW_DAYS", "30"))
+MEMORY_BUDGET_BYTES = int(os.getenv("READ_MODEL_MEMORY_MB", "256")) * 1024 * 1024
+# Başka süreçlerin (diğer worker'lar, archive.py / rebalance.py komutları) yazmaları en geç bu
+# aralıkta görünür; bu süreçteki yazmalar anında uygulanır
+RELOAD_INTERVAL_SECONDS = float(os.getenv("READ_MODEL_RELOAD_INTERVAL", "60"))
+FETCH_SIZE = 2000
+
+# Harita hücresi ~2 km; bbox bundan fazla hücre kaplıyorsa hücre indeksi yerine tarama
+CELL_DEGREES = 0.02
+MAX_CELLS = 400
+
+CLOSED_STATUSES = (RESOLVED_STATUS, REJECTED_STATUS)
+COMPLAINTS = models.Complaint.__table__
+
+# Kodlanmış (interned) sütunlar, serbest metin sütunları
+CODED = ("category", "status", "municipality", "user_identifier", "assigned_to")
+TEXT = ("title", "description", "location", "plate", "image_url")
+COLUMNS = ("id", "created_at", "lat", "lng", "upvotes") + CODED + TEXT
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Pencere dışında kalan bildirim yoksa: sıcak tablonun tamamı modelde
+EVERYTHING = -(1 << 63)
+_ROW_BYTES = 8 * 4 + 4 * len(CODED) + 8 * len(TEXT) + 8 * 4  # sayısal + kod + liste işaretçisi + indeksler
+
+
+def _micros(value):
+    # SQLite naive (UTC), Postgres aware datetime döner; ikisi de UTC mikro saniyeye
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def _text_bytes(value):
+    return sys.getsizeof(value) if value is not None else 0
+
+
+def is_open(status):
+    return status is not None and status not in CLOSED_STATUSES
+
+
+def cell_of(lat, lng):
+    return (math.floor(lat / CELL_DEGREES), math.floor(lng / CELL_DEGREES))
+
+
+class _Codes:
+    # Düşük kardinaliteli metinler bir kez saklanır: değer -> kod, kod -> değer (0 = None)
+    def __init__(self):
+        self.codes = {None: 0}
+        self.values = [None]
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+# --- SÜTUNLAR ---
+# Satırlar "slot" numarasıyla paralel dizilerde: sayılar array'de, düşük kardinaliteli metinler
+# kod olarak array('I')'da, serbest metin listede. Güncellenen/silinen bildirimin slotu boşaltılır
+# (alive=0) ve bildirim yeni slota yazılır; boşluklar bir sonraki tam yüklemede kapanır.
+# Sıralama ve ikincil indeksler slot numaralarının (created_at, id) sırasındaki array('q')'ları:
+# akış ve filtreler en yeniden geriye doğru okunur, ilk skip+limit eşleşmede durulur.
+class _Columns:
+    def __init__(self, aware):
+        self.aware = aware
+        self.ids = array("q")
+        self.created = array("q")
+        self.lat = array("d")
+        self.lng = array("d")
+        self.upvotes = array("q")
+        self.alive = bytearray()
+        self.codes = {name: _Codes() for name in CODED}
+        self.coded = {name: array("I") for name in CODED}
+        self.text = {name: [] for name in TEXT}
+        self.slot_of = {}
+        self.order = array("q")
+        self.by_status = {}
+        self.by_municipality = {}
+        self.by_cell = {}
+        self.open_counts = Counter()  # (boyut, değer kodu) -> açık bildirim sayısı
+        self.bytes = 0
+        self.key = lambda slot: (self.created[slot], self.ids[slot])
+
+    def __len__(self):
+        return len(self.slot_of)
+
+    def append(self, row):
+        slot = len(self.ids)
+        self.ids.append(row.id)
+        self.created.append(_micros(row.created_at))
+        self.lat.append(row.lat if row.lat is not None else math.nan)
+        self.lng.append(row.lng if row.lng is not None else math.nan)
+        self.upvotes.append(row.upvotes or 0)
+        self.alive.append(1)
+        for name in CODED:
+            self.coded[name].append(self.codes[name].code(getattr(row, name)))
+        size = _ROW_BYTES
+        for name in TEXT:
+            value = getattr(row, name)
+            self.text[name].append(value)
+            size += _text_bytes(value)
+        self.bytes += size
+        self.slot_of[row.id] = slot
+        self._count(slot, 1)
+        return slot
+
+    def _count(self, slot, sign):
+        status = self.coded["status"][slot]
+        if not is_open(self.codes["status"].values[status]):
+            return
+        self.open_counts[("status", status)] += sign
+        self.open_counts[("category", self.coded["category"][slot])] += sign
+        self.open_counts[("municipality", self.coded["municipality"][slot])] += sign
+
+    def _indexes(self, slot):
+        indexes = [
+            self.by_status.setdefault(self.coded["status"][slot], array("q")),
+            self.by_municipality.setdefault(self.coded["municipality"][slot], array("q")),
+        ]
+        if not math.isnan(self.lat[slot]) and not math.isnan(self.lng[slot]):
+            indexes.append(self.by_cell.setdefault(cell_of(self.lat[slot], self.lng[slot]), array("q")))
+        return indexes
+
+    def build_indexes(self):
+        # Tam yüklemede: sırala, sonra her indeks sıralı dolaşımla sırayla dolar
+        self.order = array("q", sorted(range(len(self.ids)), key=self.key))
+        for slot in self.order:
+            for index in self._indexes(slot):
+                index.append(slot)
+
+    def insert(self, row):
+        slot = self.append(row)
+        key = self.key(slot)
+        for index in [self.order] + self._indexes(slot):
+            index.insert(bisect_left(index, key, key=self.key), slot)
+
+    def remove(self, complaint_id):
+        slot = self.slot_of.pop(complaint_id, None)
+        if slot is None:
+            return
+        key = self.key(slot)
+        for index in [self.order] + self._indexes(slot):
+            position = bisect_left(index, key, key=self.key)
+            if position < len(index) and index[position] == slot:
+                del index[position]
+        self._count(slot, -1)
+        self.alive[slot] = 0
+        for name in TEXT:
+            self.bytes -= _text_bytes(self.text[name][slot])
+            self.text[name][slot] = None
+
+    def getter(self, name):
+        # Sütun başına özel okuyucu; satır kurarken isim karşılaştırması yapılmaz
+        if name == "id":
+            return self.ids.__getitem__
+        if name == "created_at":
+            created, start = self.created, EPOCH if self.aware else EPOCH.replace(tzinfo=None)
+            return lambda slot: start + timedelta(microseconds=created[slot])
+        if name in ("lat", "lng"):
+            values = getattr(self, name)
+            return lambda slot: None if math.isnan(values[slot]) else values[slot]
+        if name == "upvotes":
+            return self.upvotes.__getitem__
+        if name in self.coded:
+            coded, values = self.coded[name], self.codes[name].values
+            return lambda slot: values[coded[slot]]
+        return self.text[name].__getitem__
+
+
+def _filters_match(columns, filters):
+    # Seçilen indeks dışındaki koşullar satır satır kontrol edilir
+    checks = []
+    if filters.get("status"):
+        wanted = {columns.codes["status"].codes.get(s, -1) for s in filters["status"]}
+        status = columns.coded["status"]
+        checks.append(lambda slot: status[slot] in wanted)
+    for name in ("municipality", "category"):
+        if filters.get(name):
+            code = columns.codes[name].codes.get(filters[name], -1)
+            values = columns.coded[name]
+            checks.append(lambda slot, values=values, code=code: values[slot] == code)
+    if filters.get("bbox"):
+        min_lat, min_lng, max_lat, max_lng = filters["bbox"]
+        lat, lng = columns.lat, columns.lng
+        checks.append(lambda slot: min_lat <= lat[slot] <= max_lat and min_lng <= lng[slot] <= max_lng)
+    return checks
+
+
+def _candidates(columns, filters):
+    # En küçük indeksten en yeniye doğru slotlar; birden çok dizi varsa (durum listesi, hücreler)
+    # heapq.merge ile sıralı birleşir
+    options = []
+    if filters.get("status"):
+        codes = [columns.codes["status"].codes.get(s) for s in filters["status"]]
+        options.append([columns.by_status.get(code, ()) for code in codes])
+    if filters.get("municipality"):
+        code = columns.codes["municipality"].codes.get(filters["municipality"])
+        options.append([columns.by_municipality.get(code, ())])
+    if filters.get("bbox"):
+        min_lat, min_lng, max_lat, max_lng = filters["bbox"]
+        (low_i, low_j), (high_i, high_j) = cell_of(min_lat, min_lng), cell_of(max_lat, max_lng)
+        if (high_i - low_i + 1) * (high_j - low_j + 1) <= MAX_CELLS:
+            options.append([
+                columns.by_cell[(i, j)]
+                for i in range(low_i, high_i + 1) for j in range(low_j, high_j + 1)
+                if (i, j) in columns.by_cell
+            ])
+    if not options:
+        return reversed(columns.order)
+    arrays = min(options, key=lambda indexes: sum(len(index) for index in indexes))
+    if len(arrays) == 1:
+        return reversed(arrays[0])
+    return heapq.merge(*[reversed(index) for index in arrays], key=columns.key, reverse=True)
+
+
+# --- BELLEK İÇİ OKUMA MODELİ ---
+# Akış (GET /complaints/), filtreler (durum / belediye / kategori / harita kutusu) ve açık bildirim
+# istatistikleri (GET /stats/open) veritabanına gitmeden bu süreçteki sütunlardan cevaplanır.
+# Kapsam: son WINDOW_DAYS günün bütün bildirimleri + tüm açık bildirimler (arşiv hariç).
+# Model kesin cevap veremiyorsa (yüklenmedi, bütçe aşıldı, sayfa pencerenin dışına taşıyor)
+# None döner ve çağıran veritabanına gider; sonuç ikisinde de aynıdır.
+# Güncel tutma: bu süreçteki her yazma (oluşturma, durum, toplu durum, üstlenme, silme, arşiv,
+# destek sayaçlarının yazılması) satırı modele de uygular; ayrıca RELOAD_INTERVAL_SECONDS'ta bir
+# tüm shard'lardan baştan yüklenir. Yükleme sırasında gelen değişiklikler kaydedilip yeni
+# sütunlara tekrar uygulanır.
+# Bellek: satırlar en yeniden eskiye yüklenir; MEMORY_BUDGET_BYTES dolarsa yükleme orada kesilir
+# ve pencere kısalır (cutoff), açık bildirim istatistikleri veritabanından okunur. Çalışırken
+# bütçe aşılırsa model bir sonraki yüklemeye kadar devre dışı kalır.
+class ReadModel:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.columns = None
+        self.cutoff = None  # bu andan (mikro sn) yeni bildirimlerin tamamı modelde
+        self.open_complete = False  # bütün açık bildirimler modelde mi
+        self.usable = False
+        self.loaded_at = None
+        self.reloads = 0
+        self.hits = 0
+        self.misses = 0
+        self._replay = None
+
+    # --- yükleme ---
+    def load(self, db):
+        with self._lock:
+            self._replay = []
+        try:
+            columns, cutoff, complete = self._build(db)
+        except Exception:
+            with self._lock:
+                self._replay = None
+            raise
+        with self._lock:
+            replay, self._replay = self._replay, None
+            self.columns, self.cutoff, self.open_complete = columns, cutoff, complete
+            self.usable = True
+            self.loaded_at = datetime.now(timezone.utc)
+            self.reloads += 1
+            for method, args in replay:
+                method(*args)
+        return len(columns)
+
+    def _build(self, db):
+        c = COMPLAINTS.c
+        window = datetime.now(timezone.utc) - timedelta(days=WINDOW_DAYS)
+        outside = and_(c.created_at < window, c.status.in_(CLOSED_STATUSES))
+        query = (
+            select(*[c[name] for name in COLUMNS])
+            .where(not_(outside))
+            .order_by(c.created_at.desc(), c.id.desc())
+            .execution_options(yield_per=FETCH_SIZE)
+        )
+        # Shard'lar en yeniden eskiye birleşerek okunur ki bütçe dolunca en yeniler modelde kalsın
+        sessions = [db] + [shard.session_factory() for shard in shards.SHARDS[1:]]
+        columns, last, complete, everything = None, None, True, False
+        try:
+            streams = [session.execute(query) for session in sessions]
+            for row in heapq.merge(*streams, key=lambda r: (_micros(r.created_at), r.id), reverse=True):
+                if columns is None:
+                    columns = _Columns(aware=row.created_at.tzinfo is not None)
+                if columns.bytes >= MEMORY_BUDGET_BYTES:
+                    complete = False
+                    break
+                columns.append(row)
+                last = row
+            if complete:
+                # Küçük kurulumlarda pencere dışında bildirim olmayabilir; o zaman derin sayfalar da modelden
+                everything = not any(
+                    session.execute(select(c.id).where(outside).limit(1)).first() for session in sessions
+                )
+        finally:
+            for session in sessions[1:]:
+                session.close()
+        if columns is None:
+            columns = _Columns(aware=db.get_bind().dialect.name == "postgresql")
+        columns.build_indexes()
+        if complete:
+            return columns, EVERYTHING if everything else _micros(window), True
+        logger.warning("Okuma modeli bellek bütçesine sığmadı (%d satır); pencere kısaldı", len(columns))
+        # Kesilen zaman damgasıyla aynı anda açılmış ama yüklenmemiş satır olabilir: dahil değil
+        return columns, _micros(last.created_at) + 1, False
+
+    def reload(self):
+        if not ENABLED:
+            return 0
+        db = SessionLocal()
+        try:
+            return self.load(db)
+        finally:
+            db.close()
+
+    # --- değişiklikler ---
+    def _record(self, method, *args):
+        if self._replay is not None:
+            self._replay.append((method, args))
+
+    def apply(self, *rows):
+        # Oluşturulan / güncellenen bildirimler (tam satır); kapsam dışına düşen modelden çıkar
+        with self._lock:
+            self._record(self._apply, rows)
+            self._apply(rows)
+
+    def _apply(self, rows):
+        columns = self.columns
+        if columns is None:
+            return
+        for row in rows:
+            columns.remove(row.id)
+            if is_open(row.status) or _micros(row.created_at) >= self.cutoff:
+                columns.insert(row)
+        self._check_budget()
+
+    def remove(self, *ids):
+        with self._lock:
+            self._record(self._remove, ids)
+            self._remove(ids)
+
+    def _remove(self, ids):
+        if self.columns is None:
+            return
+        for complaint_id in ids:
+            self.columns.remove(complaint_id)
+
+    def add_upvotes(self, counts):
+        # Sayaçlar veritabanına yazıldığında (bkz. upvotes.py). Yükleme sırasındakiler tekrar
+        # uygulanmaz (yüklenen satırda zaten olabilir); fark en geç bir sonraki yüklemede kapanır.
+        with self._lock:
+            columns = self.columns
+            if columns is None:
+                return
+            for complaint_id, count in counts.items():
+                slot = columns.slot_of.get(complaint_id)
+                if slot is not None:
+                    columns.upvotes[slot] += count
+
+    def _check_budget(self):
+        if self.usable and self.columns.bytes > MEMORY_BUDGET_BYTES:
+            logger.warning("Okuma modeli bellek bütçesini aştı; bir sonraki yüklemeye kadar kapalı")
+            self.usable = False
+
+    # --- okumalar ---
+    def query(self, fields, skip=0, limit=100, filters=None):
+        # fields sırasında tuple listesi (fastjson.RowSerializer ile aynı) ya da None
+        filters = filters or {}
+        with self._lock:
+            if not self.usable:
+                self.misses += 1
+                return None
+            columns = self.columns
+            # Sadece açık durumlarla filtrelenmişse pencere dışındaki satırlar da modelde
+            covered = self.open_complete and bool(filters.get("status")) and all(map(is_open, filters["status"]))
+            checks = _filters_match(columns, filters)
+            getters = [columns.getter(name) for name in fields]
+            rows, seen, needed = [], 0, skip + limit
+            for slot in _candidates(columns, filters):
+                if checks and not all(check(slot) for check in checks):
+                    continue
+                if not covered and columns.created[slot] < self.cutoff:
+                    self.misses += 1
+                    return None
+                seen += 1
+                if seen > skip:
+                    rows.append(tuple(get(slot) for get in getters))
+                if seen >= needed:
+                    break
+            else:
+                # Model bitti ama sayfa dolmadı: pencereden eski (kapalı) bildirimler modelde yok
+                if not covered and needed and self.cutoff != EVERYTHING:
+                    self.misses += 1
+                    return None
+            self.hits += 1
+            return rows
+
+    def open_stats(self):
+        with self._lock:
+            if not self.usable or not self.open_complete:
+                self.misses += 1
+                return None
+            columns = self.columns
+            result = {"total": 0, "by_status": {}, "by_category": {}, "by_municipality": {}}
+            for (dimension, code), count in columns.open_counts.items():
+                if count <= 0:
+                    continue
+                if dimension == "status":
+                    result["total"] += count
+                value = columns.codes[dimension].values[code]
+                if value:  # stats.read_stats gibi: boş belediye / kategori gruplanmaz
+                    result[f"by_{dimension}"][value] = count
+            self.hits += 1
+            return result
+
+    def metrics(self):
+        with self._lock:
+            columns = self.columns
+            return {
+                "enabled": ENABLED,
+                "usable": self.usable,
+                "rows": len(columns) if columns is not None else 0,
+                "slots": len(columns.ids) if columns is not None else 0,
+                "approx_bytes": columns.bytes if columns is not None else 0,
+                "budget_bytes": MEMORY_BUDGET_BYTES,
+                "open_complete": self.open_complete,
+                "window_start": None if self.cutoff in (None, EVERYTHING) else (EPOCH + timedelta(microseconds=self.cutoff)).isoformat(),
+                "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+                "reloads": self.reloads,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+model = ReadModel()
+
+
+def read_open_stats(db):
+    # Açık bildirimlerin durum / kategori / belediye dağılımı: modelden, olmazsa shard başına
+    # tek GROUP BY
+    result = model.open_stats()
+    if result is not None:
+        return result
+    c = COMPLAINTS.c
+    query = (
+        select(c.status, c.category, c.municipality, func.count(c.id))
+        .where(c.status.notin_(CLOSED_STATUSES))
+        .group_by(c.status, c.category, c.municipality)
+    )
+    counts = {"status": Counter(), "category": Counter(), "municipality": Counter()}
+    for rows in shards.scatter(lambda shard_db: shard_db.execute(query).all(), db):
+        for status, category, municipality, count in rows:
+            for dimension, value in (("status", status), ("category", category), ("municipality", municipality)):
+                if value:
+                    counts[dimension][value] += count
+    return {
+        "total": sum(counts["status"].values()),
+        **{f"by_{dimension}": dict(counter) for dimension, counter in counts.items()},
+    }
+
+if ENABLED:
+    jobs.register("read-model-reload", RELOAD_INTERVAL_SECONDS, model.reload, run_on_start=True)
@@ -0,0 +1,203 @@
+import sys
+import time
+import logging
+import argparse
+
+from sqlalchemy import select, insert, delete, func
+
+import archive
+import stats
+import upvotes
+import shards
+from database import SessionLocal, dialect_insert
+
+logger = logging.getLogger("kentinsesi.rebalance")
+
+BATCH_SIZE = 500
+# Dizinde "taşınıyor" işaretlendikten sonra beklenen süre: her süreç dizini yenilesin (yazmalar
+# dursun) ve tamponda bekleyen destek sayaçları kaynak shard'a yazılsın
+FREEZE_WAIT_SECONDS = 2 * shards.DIRECTORY_REFRESH_SECONDS + upvotes.FLUSH_INTERVAL_SECONDS
+
+DIRECTORY = shards.DIRECTORY
+UPVOTES = archive.UPVOTES
+
+
+def set_directory(db, municipality, shard_name, moving):
+    stmt = dialect_insert(db, DIRECTORY).values(municipality=municipality, shard=shard_name, moving=moving)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[DIRECTORY.c.municipality], set_={"shard": shard_name, "moving": moving}
+    ))
+    db.commit()
+
+
+def check_id_space(source_db, target, municipality):
+    # SQLite yeni id'yi tablodaki en büyük id'den türetir: hedefin aralığından büyük id'ler
+    # taşınırsa hedefin sonraki bildirimleri başka bir shard'ın aralığına taşar
+    if target.engine.dialect.name != "sqlite":
+        return
+    limit = (target.index + 1) * shards.ID_RANGE
+    for table in (archive.COMPLAINTS, archive.ARCHIVE):
+        highest = source_db.execute(
+            select(func.max(table.c.id)).where(table.c.municipality == municipality)
+        ).scalar()
+        if highest is not None and highest >= limit:
+            raise ValueError(f"{target.name} SQLite shard'ı {highest} id'sini alamaz (aralık sınırı {limit})")
+
+
+def _deltas(rows, sign):
+    deltas = []
+    for row in rows:
+        deltas += stats.complaint_deltas(row, sign)
+    return deltas
+
+
+def move_batch(source_db, target_db, municipality, complaints, events, with_upvotes):
+    # Bir parti: hedefe yaz + commit, sonra kaynaktan sil + commit. Bildirim hiçbir an iki shard'da
+    # da eksik olmaz. Sayaçlar (complaint_stats) iki tarafta aynı transaction'larda düzeltilir.
+    rows = source_db.execute(
+        select(*complaints.c).where(complaints.c.municipality == municipality).order_by(complaints.c.id).limit(BATCH_SIZE)
+    ).all()
+    if not rows:
+        return 0
+    ids = [row.id for row in rows]
+    event_columns = [column for column in events.c if column.name != "id"]  # geçmiş id'leri hedefte yeniden verilir
+    event_rows = source_db.execute(select(*event_columns).where(events.c.complaint_id.in_(ids))).all()
+    upvote_rows = source_db.execute(select(*UPVOTES.c).where(UPVOTES.c.complaint_id.in_(ids))).all() if with_upvotes else []
+
+    # Yarıda kalmış önceki bir çalıştırmanın kopyaları (kaynak hâlâ asıl kayıt) önce silinir
+    target_db.execute(delete(events).where(events.c.complaint_id.in_(ids)))
+    if with_upvotes:
+        target_db.execute(delete(UPVOTES).where(UPVOTES.c.complaint_id.in_(ids)))
+    stale = target_db.execute(delete(complaints).where(complaints.c.id.in_(ids)).returning(*complaints.c)).all()
+    target_db.execute(insert(complaints), [dict(row._mapping) for row in rows])
+    if event_rows:
+        target_db.execute(insert(events), [dict(row._mapping) for row in event_rows])
+    if upvote_rows:
+        target_db.execute(insert(UPVOTES), [dict(row._mapping) for row in upvote_rows])
+    stats.bump(target_db, _deltas(rows, 1) + _deltas(stale, -1))
+    target_db.commit()
+
+    source_db.execute(delete(events).where(events.c.complaint_id.in_(ids)))
+    if with_upvotes:
+        source_db.execute(delete(UPVOTES).where(UPVOTES.c.complaint_id.in_(ids)))
+    source_db.execute(delete(complaints).where(complaints.c.id.in_(ids)))
+    stats.bump(source_db, _deltas(rows, -1))
+    source_db.commit()
+    return len(rows)
+
+
+# --- BELEDİYE TAŞIMA (REBALANCING) ---
+# Bir belediyenin tüm bildirimleri (sıcak + arşiv, durum geçmişi ve destekleriyle) başka shard'a
+# uygulama çalışırken taşınır:
+#   1. dizinde "taşınıyor" işaretlenir; FREEZE_WAIT_SECONDS sonra hiçbir süreç o belediyenin
+#      satırlarına yazmaz (yeni bildirimler günlüğe düşer, durum/silme/destek 503 döner).
+#      Okumalar kesilmez: id ile okuma ve ülke geneli listeler iki shard'a da bakar.
+#   2. satırlar BATCH_SIZE'lık partilerle, id'leri korunarak kopyalanır ve kaynaktan silinir
+#   3. dizin hedef shard'ı gösterir ve yazmalar açılır; günlükteki bildirimler hedefe aktarılır
+# Yarıda kesilirse belediye "taşınıyor" kalır (yazmalar kapalı) ve hata loglanır; aynı komut tekrar
+# çalıştırılınca kaldığı yerden devam eder. Henüz hiçbir şey kopyalanmadıysa --abort yazmaları açar.
+# Dizinde olmayan belediyeyi boş bir shard'a atamak için de kullanılır.
+#   python rebalance.py "Çankaya" ankara
+#   python rebalance.py "Çankaya" --abort
+def move(municipality, target_name, wait=FREEZE_WAIT_SECONDS):
+    target = shards.by_name(target_name)
+    shards.refresh_directory()
+    source = shards.shard_for(municipality)
+    if source is target:
+        return 0
+    db = SessionLocal()
+    source_db = source.session_factory()
+    target_db = target.session_factory()
+    moved = 0
+    try:
+        check_id_space(source_db, target, municipality)
+        set_directory(db, municipality, source.name, moving=True)
+        try:
+            logger.info("%s yazmaya kapatıldı, %.0f sn bekleniyor", municipality, wait)
+            time.sleep(wait)
+
+            for complaints, events, with_upvotes in (
+                (archive.COMPLAINTS, archive.EVENTS, True),
+                (archive.ARCHIVE, archive.EVENTS_ARCHIVE, False),
+            ):
+                while True:
+                    count = move_batch(source_db, target_db, municipality, complaints, events, with_upvotes)
+                    if not count:
+                        break
+                    moved += count
+                    logger.info("%s: %d bildirim %s -> %s", municipality, moved, source.name, target.name)
+
+            set_directory(db, municipality, target.name, moving=False)
+        except BaseException:
+            logger.exception(
+                "%s taşıması yarıda kaldı (%d bildirim %s -> %s taşındı), belediye yazmaya kapalı: komutu "
+                "tekrar çalıştırın ya da hiçbir şey kopyalanmadıysa --abort ile açın",
+                municipality, moved, source.name, target.name,
+            )
+            raise
+    finally:
+        target_db.close()
+        source_db.close()
+        db.close()
+    return moved
+
+
+def copied_elsewhere(municipality, source):
+    # Kaynak dışındaki shard'larda bu belediyenin satırı varsa kopyalama başlamış demektir
+    counts = {}
+    for shard in shards.SHARDS:
+        if shard is source:
+            continue
+        shard_db = shard.session_factory()
+        try:
+            count = sum(
+                shard_db.execute(select(func.count()).select_from(table).where(table.c.municipality == municipality)).scalar()
+                for table in (archive.COMPLAINTS, archive.ARCHIVE)
+            )
+        finally:
+            shard_db.close()
+        if count:
+            counts[shard.name] = count
+    return counts
+
+
+def abort(municipality):
+    # Yarıda kalan taşımanın dondurmasını kaldırır; sadece hiçbir bildirim kopyalanmamışsa
+    shards.refresh_directory()
+    if not shards.is_frozen(municipality):
+        return False
+    source = shards.shard_for(municipality)
+    copied = copied_elsewhere(municipality, source)
+    if copied:
+        where = ", ".join(f"{name}: {count}" for name, count in copied.items())
+        raise ValueError(f"{municipality} bildirimleri kopyalanmaya başlamış ({where}); taşımayı tekrar çalıştırıp tamamlayın")
+    db = SessionLocal()
+    try:
+        set_directory(db, municipality, source.name, moving=False)
+    finally:
+        db.close()
+    logger.info("%s taşıması iptal edildi, yazmalar %s shard'ında açıldı", municipality, source.name)
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bir belediyenin bildirimlerini başka bir shard'a taşır")
+    parser.add_argument("municipality")
+    parser.add_argument("shard", nargs="?", help=f"Hedef shard: {', '.join(s.name for s in shards.SHARDS)}")
+    parser.add_argument("--wait", type=float, default=FREEZE_WAIT_SECONDS, help="Yazmaları durdurduktan sonra bekleme (sn)")
+    parser.add_argument("--abort", action="store_true",
+                        help="Yarıda kalan taşımada yazmaları aç (sadece hiçbir bildirim kopyalanmadıysa)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.abort:
+        try:
+            cleared = abort(args.municipality)
+        except ValueError as e:
+            sys.exit(str(e))
+        print(f"{args.municipality}: " + ("taşıma iptal edildi, yazmalar açık." if cleared else "taşınmıyordu."), file=sys.stderr)
+        sys.exit(0)
+    if not args.shard:
+        parser.error("hedef shard gerekli (ya da --abort)")
+    count = move(args.municipality, args.shard, args.wait)
+    print(f"{count} bildirim {args.shard} shard'ına taşındı.", file=sys.stderr)
@@ -0,0 +1,123 @@
+import os
+import time
+import logging
+
+from fastapi import Request
+from sqlalchemy import select
+
+import models
+import jobs
+from cache import TTLCache
+from database import SessionLocal, ReplicaSessionLocal, replica_engine, dialect_insert
+
+logger = logging.getLogger("kentinsesi.replicas")
+
+# Replika bundan fazla geride ise okumalar primary'ye döner
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG", "5"))
+# Yazan istemcinin okumaları bu süre boyunca primary'den (kendi yazdığını görsün)
+STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+CHECK_INTERVAL_SECONDS = float(os.getenv("REPLICA_CHECK_INTERVAL", "2"))
+
+HEARTBEAT = models.ReplicaHeartbeat.__table__
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# İlk ölçüme kadar replika kullanılmaz
+state = {"healthy": False, "lag_seconds": None, "checked_at": None}
+
+# istemci anahtarı -> son yazma zamanı
+_recent_writers = TTLCache(ttl_seconds=STICKY_SECONDS, max_entries=10000)
+
+
+def enabled():
+    return replica_engine is not None
+
+
+def client_key(request):
+    # Giriş yapmışsa token, değilse IP (Render'ın proxy'si arkasında X-Forwarded-For)
+    authorization = request.headers.get("authorization")
+    if authorization:
+        return authorization
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else ""
+
+
+def use_replica(request):
+    return enabled() and state["healthy"] and _recent_writers.get(client_key(request)) is None
+
+
+def session_factory(request):
+    replica = use_replica(request)
+    request.state.read_source = "replica" if replica else "primary"
+    return ReplicaSessionLocal if replica else SessionLocal
+
+
+def is_replica(db):
+    # Single-flight anahtarlarında: replikadan okuyan bir uçuşa primary'den okuması gereken istek binmesin
+    return enabled() and db.get_bind() is replica_engine
+
+
+# --- OKUMA REPLİKASI YÖNLENDİRME ---
+# Sadece okuyan endpoint'ler get_db yerine get_read_db kullanır: replika tanımlı ve yeterince
+# güncelse Session replikaya bağlanır, değilse her zamanki (primary) Session döner. Yazan endpoint'ler
+# ve yazdıktan sonra okuyan akışlar get_db'de kalır. Başarılı bir yazma isteğinden sonra aynı
+# istemcinin okumaları STICKY_SECONDS boyunca primary'ye gider (read-your-writes).
+def get_read_db(request: Request):
+    db = session_factory(request)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def stickiness_middleware(request, call_next):
+    response = await call_next(request)
+    if not enabled():
+        return response
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        _recent_writers.set(client_key(request), time.time())
+    read_source = getattr(request.state, "read_source", None)
+    if read_source:
+        response.headers["X-Read-Source"] = read_source
+    return response
+
+
+# --- GECİKME ÖLÇÜMÜ ---
+# Primary'deki heartbeat satırı her turda güncellenir. Önce iki taraftaki değer okunur: replika
+# primary'nin son yazdığı değere ulaştıysa gecikme 0, ulaşmadıysa replikadaki değerin yaşı.
+# Sürücüye/replikasyon türüne bağlı değil (Postgres streaming replica, ayrı SQLite dosyası).
+def _measure_lag(now):
+    db = SessionLocal()
+    try:
+        primary_seen = db.execute(select(HEARTBEAT.c.written_at).where(HEARTBEAT.c.id == 1)).scalar()
+        stmt = dialect_insert(db, HEARTBEAT).values(id=1, written_at=now)
+        db.execute(stmt.on_conflict_do_update(index_elements=[HEARTBEAT.c.id], set_={"written_at": now}))
+        db.commit()
+    finally:
+        db.close()
+    with replica_engine.connect() as conn:
+        replica_seen = conn.execute(select(HEARTBEAT.c.written_at).where(HEARTBEAT.c.id == 1)).scalar()
+    if replica_seen is None:
+        return None
+    if primary_seen is None or replica_seen >= primary_seen:
+        return 0.0
+    return now - replica_seen
+
+
+def check_lag():
+    now = time.time()
+    try:
+        lag = _measure_lag(now)
+    except Exception as e:
+        # Replika (ya da primary) erişilemiyorsa okumalar primary'ye döner
+        logger.warning("Replika gecikmesi ölçülemedi: %s", e)
+        lag = None
+    healthy = lag is not None and lag <= REPLICA_MAX_LAG_SECONDS
+    if healthy != state["healthy"]:
+        logger.warning("Replika %s (gecikme: %s sn)", "kullanılıyor" if healthy else "devre dışı", lag)
+    state.update(healthy=healthy, lag_seconds=lag, checked_at=now)
+
+
+if enabled():
+    jobs.register("replica-lag-monitor", CHECK_INTERVAL_SECONDS, check_lag, run_on_start=True)
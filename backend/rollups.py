@@ -0,0 +1,194 @@
+import os
+import sys
+import logging
+import argparse
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, date, time, timedelta, timezone
+
+from sqlalchemy import select, delete
+
+import models
+import jobs
+import archive
+import shards
+from database import SessionLocal, dialect_insert
+from stats import TURKEY_TZ, STAT_DIMENSIONS, local_datetime
+
+logger = logging.getLogger("kentinsesi.rollups")
+
+FLUSH_INTERVAL_SECONDS = float(os.getenv("ROLLUP_FLUSH_INTERVAL", "5"))
+
+GRANULARITIES = ("hour", "day")
+DIMENSIONS = ("total",) + STAT_DIMENSIONS
+
+# Tek upsert ifadesine konacak en fazla satır
+UPSERT_CHUNK = 500
+
+
+def bucket_keys(created_at):
+    local = local_datetime(created_at)
+    return {"hour": local.strftime("%Y-%m-%dT%H"), "day": local.strftime("%Y-%m-%d")}
+
+
+def complaint_deltas(row, sign):
+    deltas = []
+    for granularity, bucket in bucket_keys(row.created_at).items():
+        deltas.append((granularity, bucket, "total", "all", sign))
+        for dimension in STAT_DIMENSIONS:
+            value = getattr(row, dimension)
+            if value:
+                deltas.append((granularity, bucket, dimension, value, sign))
+    return deltas
+
+
+def status_change_deltas(row, old_status):
+    # Bildirim oluşturulduğu dilimde kalır, sadece "status" anahtarı eskiden yeniye taşınır
+    if not old_status or old_status == row.status:
+        return []
+    deltas = []
+    for granularity, bucket in bucket_keys(row.created_at).items():
+        deltas.append((granularity, bucket, "status", old_status, -1))
+        deltas.append((granularity, bucket, "status", row.status, 1))
+    return deltas
+
+
+def _upsert_rows(db, counts):
+    table = models.ComplaintRollup.__table__
+    rows = [
+        {"granularity": g, "bucket": b, "dimension": d, "key": k, "count": n}
+        for (g, b, d, k), n in counts.items() if n
+    ]
+    for i in range(0, len(rows), UPSERT_CHUNK):
+        stmt = dialect_insert(db, table).values(rows[i:i + UPSERT_CHUNK])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.granularity, table.c.bucket, table.c.dimension, table.c.key],
+            set_={"count": table.c.count + stmt.excluded["count"]},
+        )
+        db.execute(stmt)
+
+
+# --- ARTIMSAL DOLDURMA ---
+# Yazma endpoint'leri rollup tablosuna doğrudan yazmaz (fazladan round trip olurdu); değişiklikler
+# bellekte birleştirilir ve periyodik olarak tek upsert ile yazılır. Süreç çökerse kaybolan
+# artışlar `python rollups.py --app-stopped reaggregate` ile (uygulama durdurulup) düzeltilir.
+class RollupBuffer:
+    def __init__(self):
+        self._pending = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, deltas):
+        with self._lock:
+            for granularity, bucket, dimension, key, n in deltas:
+                self._pending[(granularity, bucket, dimension, key)] += n
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, Counter()
+        if not batch:
+            return 0
+        db = SessionLocal()
+        try:
+            _upsert_rows(db, batch)
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self._pending.update(batch)
+            logger.exception("Rollup'lar yazılamadı")
+            return 0
+        finally:
+            db.close()
+        return len(batch)
+
+
+buffer = RollupBuffer()
+
+jobs.register("rollup-flusher", FLUSH_INTERVAL_SECONDS, buffer.flush, run_on_stop=True)
+
+
+def utc_day_start(day):
+    # Türkiye saatiyle günün başlangıcı, UTC olarak
+    return datetime.combine(day, time.min, tzinfo=TURKEY_TZ).astimezone(timezone.utc)
+
+
+# --- GERİ DOLDURMA / YENİDEN HESAPLAMA ---
+# [since, until] günleri arasındaki rollup'ları siler ve ham tablodan yeniden hesaplar.
+# since/until verilmezse tüm geçmiş yeniden hesaplanır (ilk kurulumda backfill).
+# Uygulama DURDURULMUŞKEN çalıştırılmalı: çalışan sürecin tamponundaki artışlar yeniden sayımın
+# üstüne yazılır ve iki kez sayılır. Buradaki flush sadece aynı sürecin tamponunu boşaltır.
+def rebuild(db, since=None, until=None):
+    buffer.flush()
+    c = archive.complaints_source(archived=True).c
+    query = select(c.created_at, c.status, c.category, c.municipality)
+    table = models.ComplaintRollup.__table__
+    wipe = delete(table)
+    if since:
+        query = query.where(c.created_at >= utc_day_start(since))
+        wipe = wipe.where(table.c.bucket >= since.isoformat())
+    if until:
+        query = query.where(c.created_at < utc_day_start(until + timedelta(days=1)))
+        wipe = wipe.where(table.c.bucket < (until + timedelta(days=1)).isoformat())
+
+    # Rollup'lar ana veritabanında; bildirimler her shard'dan okunur
+    counts = Counter()
+    for shard_db in shards.each(db):
+        for row in shard_db.execute(query.execution_options(yield_per=1000)):
+            for granularity, bucket, dimension, key, n in complaint_deltas(row, 1):
+                counts[(granularity, bucket, dimension, key)] += n
+
+    db.execute(wipe)
+    _upsert_rows(db, counts)
+    db.commit()
+    return len(counts)
+
+
+# --- OKUMA ---
+def read_timeseries(db, bucket, dimension, since, until):
+    granularity = "hour" if bucket == "hour" else "day"
+    table = models.ComplaintRollup.__table__
+    rows = db.execute(
+        select(table.c.bucket, table.c.key, table.c.count)
+        .where(
+            table.c.granularity == granularity,
+            table.c.dimension == dimension,
+            table.c.bucket >= since.isoformat(),
+            table.c.bucket < (until + timedelta(days=1)).isoformat(),
+        )
+        .order_by(table.c.bucket)
+    ).all()
+
+    series = defaultdict(Counter)
+    for key_bucket, key, count in rows:
+        if bucket == "week":
+            day = date.fromisoformat(key_bucket)
+            key_bucket = (day - timedelta(days=day.weekday())).isoformat()
+        series[key_bucket][key] += count
+
+    return [
+        {"bucket": b, "counts": {k: n for k, n in counts.items() if n}}
+        for b, counts in sorted(series.items())
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bildirim rollup tablolarını doldurur / yeniden hesaplar. "
+                                                 "API süreçleri durdurulmuşken çalıştırın (bkz. rebuild).")
+    parser.add_argument("--app-stopped", action="store_true", required=True,
+                        help="API'nin durdurulduğunu onaylar; tamponlanmış artışlar iki kez sayılmaz")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("backfill", help="Tüm geçmişi sıfırdan hesapla")
+    reaggregate = sub.add_parser("reaggregate", help="Belirli gün aralığını yeniden hesapla")
+    reaggregate.add_argument("--since", type=date.fromisoformat, required=True)
+    reaggregate.add_argument("--until", type=date.fromisoformat, required=True)
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        if args.command == "backfill":
+            written = rebuild(session)
+        else:
+            written = rebuild(session, args.since, args.until)
+    finally:
+        session.close()
+    print(f"{written} rollup satırı yazıldı.", file=sys.stderr)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 class ComplaintBase(BaseModel):
@@ -14,20 +14,62 @@ class ComplaintBase(BaseModel):
     user_identifier: Optional[str] = None # <-- YENİ EKLENDİ
 
 class ComplaintCreate(ComplaintBase):
-    pass
+    client_id: Optional[str] = None  # Aynı client_id ile tekrar gönderilirse yeni kayıt açılmaz
+    municipality: Optional[str] = None  # Bildirim bu belediyenin shard'ına yazılır
+
+class ComplaintBatchItem(ComplaintBase):
+    client_id: str
+    municipality: Optional[str] = None
+
+class ComplaintBatch(BaseModel):
+    complaints: List[ComplaintBatchItem]
+
+class ComplaintBatchItemResult(BaseModel):
+    client_id: str
+    id: Optional[int] = None  # pending ise henüz yok
+    status: str  # created / duplicate / pending
+
+class ComplaintPending(BaseModel):
+    client_id: str
+    status: str = "pending"
+
+class ComplaintBatchResult(BaseModel):
+    results: List[ComplaintBatchItemResult]
 
 class ComplaintStatusUpdate(BaseModel):
     status: str
+    note: Optional[str] = None
 
 class Complaint(ComplaintBase):
     id: int
     status: str
     upvotes: int
     created_at: datetime
+    assigned_to: Optional[str] = None
 
     class Config:
         from_attributes = True
 
+class TimelineEvent(BaseModel):
+    id: Optional[int] = None  # oluşturulma olayı tabloda tutulmaz, id'si yok
+    status: str
+    note: Optional[str] = None
+    timestamp: datetime
+    is_official: bool
+
+class BulkStatusUpdate(BaseModel):
+    ids: List[int]
+    status: str
+    note: Optional[str] = None
+
+class BulkStatusResult(BaseModel):
+    updated: List[int]
+    not_found: List[int]
+    invalid_transition: List[int]
+
+class ComplaintDetail(Complaint):
+    timeline: List[TimelineEvent]
+
 # --- ARAÇ ŞEMALARI ---
 
 class VehicleBase(BaseModel):
@@ -44,13 +86,35 @@ class Vehicle(VehicleBase):
     class Config:
         from_attributes = True
 
+class VehicleImportError(BaseModel):
+    row: int
+    plate: Optional[str] = None
+    error: str
+
+class VehicleImportResult(BaseModel):
+    imported: int
+    error_count: int
+    errors: List[VehicleImportError]
+
+class FuzzyPlateMatch(BaseModel):
+    plate: str
+    distance: int
+
+class FleetVehicle(Vehicle):
+    complaint_count: int
+    open_count: int
+    last_complaint_at: Optional[datetime] = None
+
 # --- KULLANICI VE AUTH ŞEMALARI ---
 
 class UserBase(BaseModel):
     email: str
     role: Optional[str] = "VATANDAS"
+    municipality: Optional[str] = None
 
-class UserCreate(UserBase):
+class UserCreate(BaseModel):
+    # Rol ve belediye istemciden alınmaz (bkz. officials.py)
+    email: str
     password: str
 
 class UserOut(UserBase):
@@ -63,4 +127,81 @@ class UserOut(UserBase):
 
 class Token(BaseModel):
     access_token: str
-    token_type: str
\ No newline at end of file
+    token_type: str
+
+# --- DESTEK (UPVOTE) ŞEMALARI ---
+
+class UpvoteResult(BaseModel):
+    upvoted: bool
+
+# --- PANEL İSTATİSTİKLERİ ---
+
+class DashboardStats(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+    by_category: Dict[str, int]
+    by_municipality: Dict[str, int]
+    today: int
+    this_week: int
+
+class OpenStats(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+    by_category: Dict[str, int]
+    by_municipality: Dict[str, int]
+
+# --- SIRALAMA VE LİDERLİK TABLOSU ---
+
+class UserRank(BaseModel):
+    rank: int
+    total_users: int
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user: str  # maskelenmiş kullanıcı (ör. ay***@gmail.com)
+    count: int
+
+class Leaderboard(BaseModel):
+    total_users: int
+    entries: List[LeaderboardEntry]
+
+# --- AYLIK ANLIK GÖRÜNTÜLER (SNAPSHOT) ---
+
+class SnapshotPartition(BaseModel):
+    table: str
+    month: str
+    rows: Optional[int] = None  # yazma sonucunda
+    bytes: Optional[int] = None  # listelemede
+
+# --- AÇILIŞ PAKETİ (BOOTSTRAP) ---
+
+class BootstrapSection(BaseModel):
+    etag: str
+    not_modified: bool = False
+    data: Optional[Any] = None  # not_modified ise boş; istemci elindekini kullanır
+
+class Bootstrap(BaseModel):
+    role: str
+    sections: Dict[str, BootstrapSection]
+
+# --- ANALİTİK (ZAMAN SERİSİ) ---
+
+class TimeseriesPoint(BaseModel):
+    bucket: str
+    counts: Dict[str, int]
+
+class Timeseries(BaseModel):
+    bucket: str
+    dimension: str
+    points: List[TimeseriesPoint]
+
+# --- ÇÖZÜLME SÜRESİ (SLA) ---
+
+class ResolutionPercentiles(BaseModel):
+    key: str
+    count: int
+    percentiles: Dict[str, Optional[float]]  # saat cinsinden: p50, p90, p95, p99
+
+class ResolutionStats(BaseModel):
+    group_by: Optional[str] = None
+    groups: List[ResolutionPercentiles]
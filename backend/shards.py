@@ -0,0 +1,240 @@
+import os
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from sqlalchemy import select, text, true, or_
+
+import models
+import jobs
+from database import SessionLocal, engine, read_engine, create_engines, routing_sessionmaker
+
+# Ek shard'lar: DATABASE_SHARDS="izmir=postgresql://...,ege=sqlite:///./ege.db". Ana veritabanı
+# (DATABASE_URL) her zaman "main" adıyla 0. shard. Sıra id aralıklarını belirler: yeni shard
+# sadece sona eklenir, var olanların sırası değiştirilmez.
+SHARD_URLS = os.getenv("DATABASE_SHARDS", "")
+MAIN_SHARD = "main"
+
+# Shard k'nin bildirim id'leri k * ID_RANGE'den başlar; id'ler tüm shard'larda tekil kalır ve
+# id'den bildirimin (taşınmadıysa) hangi shard'da olduğu bilinir. Integer sütun: 21 shard'a yeter.
+ID_RANGE = 100_000_000
+
+# Belediye dizini bu aralıkla yeniden okunur; istekler dizin için sorgu atmaz
+DIRECTORY_REFRESH_SECONDS = float(os.getenv("SHARD_DIRECTORY_REFRESH", "5"))
+
+DIRECTORY = models.MunicipalityShard.__table__
+
+
+class Shard:
+    def __init__(self, index, name, engine, read_engine, session_factory):
+        self.index = index
+        self.name = name
+        self.engine = engine
+        self.read_engine = read_engine
+        self.session_factory = session_factory
+
+
+def _parse(spec):
+    shards = [Shard(0, MAIN_SHARD, engine, read_engine, SessionLocal)]
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, url = part.partition("=")
+        name, url = name.strip(), url.strip()
+        if not name or not url or name in {s.name for s in shards}:
+            raise ValueError(f"DATABASE_SHARDS içinde geçersiz girdi: {part!r}")
+        shard_engine, shard_read_engine = create_engines(url)
+        shards.append(Shard(
+            len(shards), name, shard_engine, shard_read_engine,
+            routing_sessionmaker(shard_engine, shard_read_engine),
+        ))
+    return shards
+
+
+SHARDS = _parse(SHARD_URLS)
+MAIN = SHARDS[0]
+BY_NAME = {shard.name: shard for shard in SHARDS}
+
+
+def enabled():
+    return len(SHARDS) > 1
+
+
+def by_name(name):
+    shard = BY_NAME.get(name)
+    if shard is None:
+        raise ValueError(f"Tanımsız shard: {name}")
+    return shard
+
+
+# --- BELEDİYE DİZİNİ ---
+# municipality_shards tablosu ana veritabanında; bellekte {belediye: (shard adı, taşınıyor mu)}
+# olarak tutulur ve DIRECTORY_REFRESH_SECONDS'ta bir yenilenir. Tek shard'lı kurulumda hiç okunmaz.
+_directory = None
+_directory_lock = threading.Lock()
+
+
+def refresh_directory():
+    global _directory
+    db = SessionLocal()
+    try:
+        rows = db.execute(select(DIRECTORY.c.municipality, DIRECTORY.c.shard, DIRECTORY.c.moving)).all()
+    finally:
+        db.close()
+    _directory = {row.municipality: (row.shard, bool(row.moving)) for row in rows}
+    return len(_directory)
+
+
+def directory():
+    if not enabled():
+        return {}
+    if _directory is None:
+        with _directory_lock:
+            if _directory is None:
+                refresh_directory()
+    return _directory
+
+
+def shard_for(municipality):
+    # Dizinde olmayan (ya da belediyesi boş) bildirim ana shard'a yazılır
+    entry = directory().get(municipality)
+    if entry is None or entry[0] not in BY_NAME:
+        return MAIN
+    return BY_NAME[entry[0]]
+
+
+def frozen():
+    return {municipality for municipality, (_, moving) in directory().items() if moving}
+
+
+def is_frozen(municipality):
+    entry = directory().get(municipality)
+    return entry is not None and entry[1]
+
+
+def not_frozen(column):
+    # Yazma ifadelerine eklenir: taşınmakta olan belediyenin satırlarına dokunulmaz.
+    # Taşıma yoksa true() döner ve SQL değişmez.
+    moving = frozen()
+    if not moving:
+        return true()
+    return or_(column.is_(None), column.notin_(moving))
+
+
+def ensure_writable(municipality):
+    if is_frozen(municipality):
+        raise HTTPException(status_code=503, detail="Bu belediyenin verisi taşınıyor, lütfen biraz sonra tekrar deneyin")
+
+
+# --- SHARD OTURUMLARI ---
+@contextmanager
+def session(shard, db):
+    # Ana shard için isteğin kendi Session'ı (replika yönlendirmesi dahil), diğerleri için yenisi
+    if shard is MAIN:
+        yield db
+        return
+    shard_db = shard.session_factory()
+    try:
+        yield shard_db
+    finally:
+        shard_db.close()
+
+
+def each(db):
+    for shard in SHARDS:
+        with session(shard, db) as shard_db:
+            yield shard_db
+
+
+def candidates(complaint_id):
+    # Önce id aralığının shard'ı; taşınmış bildirim için diğerleri sırayla
+    home = complaint_id // ID_RANGE if complaint_id is not None and complaint_id >= 0 else 0
+    if home >= len(SHARDS):
+        home = 0
+    return [SHARDS[home]] + [shard for shard in SHARDS if shard.index != home]
+
+
+def find(complaint_id, db, fn):
+    # fn(shard, shard_db) None dönerse bildirim o shard'da değil; ilk bulunan sonuç döner
+    for shard in candidates(complaint_id):
+        with session(shard, db) as shard_db:
+            result = fn(shard, shard_db)
+        if result is not None:
+            return result
+    return None
+
+
+def ensure_not_moving(complaint_id, db):
+    # Yazma ifadesi satır bulamadıysa: bildirim yok mu, yoksa belediyesi mi taşınıyor?
+    # Sadece bir taşıma sürerken ek sorgu atılır.
+    if not frozen():
+        return
+    c = models.Complaint.__table__
+    municipality = find(complaint_id, db, lambda shard, shard_db: shard_db.execute(
+        select(c.c.municipality).where(c.c.id == complaint_id)
+    ).first())
+    if municipality is not None:
+        ensure_writable(municipality[0])
+
+
+# --- SCATTER-GATHER ---
+# Ülke geneli okumalar (akış, sıralama, istatistik) her shard'da paralel çalışır, sonuçlar
+# çağıranda birleştirilir. Ana shard isteğin kendi iş parçacığında; sorgu sayacı (query_budget)
+# diğerlerine context kopyası ile taşınır. Tek shard'da doğrudan fn(db).
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="scatter")
+
+
+def _run(shard, fn):
+    shard_db = shard.session_factory()
+    try:
+        return fn(shard_db)
+    finally:
+        shard_db.close()
+
+
+def scatter(fn, db):
+    if not enabled():
+        return [fn(db)]
+    futures = [
+        _executor.submit(contextvars.copy_context().run, _run, shard, fn)
+        for shard in SHARDS[1:]
+    ]
+    return [fn(db)] + [future.result() for future in futures]
+
+
+# --- ID ARALIĞI (MIGRATION ADIMI) ---
+# Yeni shard'ın bildirim id'leri kendi aralığından başlar. Ana shard (0) için işlem yok.
+def id_floor(bind_engine):
+    for shard in SHARDS:
+        if shard.engine is bind_engine:
+            return shard.index * ID_RANGE
+    return 0
+
+
+def set_id_floor(conn):
+    floor = id_floor(conn.engine)
+    if not floor:
+        return
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(
+            "SELECT setval(pg_get_serial_sequence('complaints', 'id'), "
+            "GREATEST(:floor, (SELECT COALESCE(MAX(id), 0) FROM complaints)))"
+        ), {"floor": floor})
+        return
+    ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'complaints'")).scalar()
+    if "AUTOINCREMENT" not in (ddl or "").upper():
+        raise RuntimeError("complaints tablosu AUTOINCREMENT değil; SQLite shard'ı boş bir dosyada kurulmalı")
+    set_sqlite_sequence(conn, floor)
+
+
+def set_sqlite_sequence(conn, value):
+    # SQLite AUTOINCREMENT sayacı sqlite_sequence'ta; satır yoksa eklenir
+    updated = conn.execute(
+        text("UPDATE sqlite_sequence SET seq = :value WHERE name = 'complaints'"), {"value": value}
+    ).rowcount
+    if not updated:
+        conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('complaints', :value)"), {"value": value})
+
+
+if enabled():
+    jobs.register("shard-directory-refresh", DIRECTORY_REFRESH_SECONDS, refresh_directory, run_on_start=True)
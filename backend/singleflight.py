@@ -0,0 +1,78 @@
+import threading
+from collections import Counter
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# --- TEK UÇUŞ (SINGLE-FLIGHT) ---
+# Render instance'ı uyanınca onlarca telefon aynı anda /complaints/ ve /rank/... ister. Aynı anahtarla
+# (route + normalize parametreler) gelen eşzamanlı istekler tek sorguyu ve tek serileştirilmiş
+# sonucu paylaşır: ilk gelen (lider) çalıştırır, diğerleri onu bekler. Sonuç saklanmaz; lider
+# bitince bir sonraki istek yeniden sorgular (önbellek değil, sadece eşzamanlılık birleştirme).
+# Veritabanına giden endpoint'lerin hepsi sync (threadpool'da); takipçiler Event ile bekler.
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = Counter()
+        self.coalesced = Counter()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed[key[0]] += 1
+            else:
+                self.coalesced[key[0]] += 1
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def metrics(self):
+        with self._lock:
+            routes = set(self.executed) | set(self.coalesced)
+            return {
+                route: {"executed": self.executed[route], "coalesced": self.coalesced[route]}
+                for route in sorted(routes)
+            }
+
+
+group = SingleFlight()
+
+_adapters = {}
+
+
+def serialize(model, data):
+    # Sonuç lider tarafından bir kez response_model'e göre doğrulanıp JSON bayta çevrilir
+    adapter = _adapters.get(model)
+    if adapter is None:
+        adapter = _adapters[model] = TypeAdapter(model)
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+def json_response(key, model, fn):
+    # Her istek paylaşılan baytlardan kendi Response'unu alır (header'lar istek başına)
+    body = group.do(key, lambda: serialize(model, fn()))
+    return Response(content=body, media_type="application/json")
+
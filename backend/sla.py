@@ -0,0 +1,175 @@
+import os
+import sys
+import logging
+import argparse
+import threading
+
+from sqlalchemy import select, delete
+
+import models
+import jobs
+import archive
+import shards
+from database import SessionLocal, dialect_insert
+from stats import local_datetime
+from tdigest import TDigest
+from timeline import INITIAL_STATUS, RESOLVED_STATUS
+
+logger = logging.getLogger("kentinsesi.sla")
+
+FLUSH_INTERVAL_SECONDS = float(os.getenv("SLA_FLUSH_INTERVAL", "30"))
+
+PERCENTILES = {"p50": 0.50, "p90": 0.90, "p95": 0.95, "p99": 0.99}
+
+SKETCHES = models.ResolutionSketch.__table__
+
+
+def sketch_key(resolved_at, municipality, category):
+    return (local_datetime(resolved_at).strftime("%Y-%m"), municipality or "", category or "")
+
+
+def resolution_hours(created_at, resolved_at):
+    return (local_datetime(resolved_at) - local_datetime(created_at)).total_seconds() / 3600
+
+
+# --- ÇÖZÜLME SÜRESİ SKETCH'LERİ ---
+# Bir bildirim "Çözüldü"ye geçtiğinde süresi bellekteki digest'e eklenir; periyodik olarak
+# veritabanındaki digest ile birleştirilip yazılır. Panel hiçbir zaman geçmişi taramaz.
+class SketchBuffer:
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def add(self, key, hours):
+        with self._lock:
+            self._pending.setdefault(key, TDigest()).add(hours)
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+        db = SessionLocal()
+        try:
+            for key, digest in batch.items():
+                _merge_into_db(db, key, digest)
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                for key, digest in batch.items():
+                    self._pending.setdefault(key, TDigest()).merge(digest)
+            logger.exception("Çözülme süresi sketch'leri yazılamadı")
+            return 0
+        finally:
+            db.close()
+        return len(batch)
+
+
+def _merge_into_db(db, key, digest):
+    period, municipality, category = key
+    stored = db.execute(
+        select(SKETCHES.c.digest)
+        .where(SKETCHES.c.period == period, SKETCHES.c.municipality == municipality, SKETCHES.c.category == category)
+        .with_for_update()
+    ).scalar()
+    if stored is not None:
+        digest = TDigest.from_json(stored).merge(digest)
+    _write(db, key, digest)
+
+
+def _write(db, key, digest):
+    period, municipality, category = key
+    stmt = dialect_insert(db, SKETCHES).values(
+        period=period, municipality=municipality, category=category,
+        count=digest.count, digest=digest.to_json(),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SKETCHES.c.period, SKETCHES.c.municipality, SKETCHES.c.category],
+        set_={"count": stmt.excluded["count"], "digest": stmt.excluded["digest"]},
+    )
+    db.execute(stmt)
+
+
+buffer = SketchBuffer()
+
+jobs.register("sla-flusher", FLUSH_INTERVAL_SECONDS, buffer.flush, run_on_stop=True)
+
+
+def observe_status_change(row, old_status, resolved_at=None):
+    # Sadece "Çözüldü"ye geçiş sayılır; zaten çözülmüş bildirime not eklemek sayılmaz
+    if old_status is None or old_status == RESOLVED_STATUS or row.status != RESOLVED_STATUS:
+        return
+    hours = resolution_hours(row.created_at, resolved_at)
+    buffer.add(sketch_key(resolved_at, row.municipality, row.category), hours)
+
+
+def read_resolution_stats(db, group_by=None, municipality=None, category=None, since_period=None):
+    query = select(SKETCHES.c.municipality, SKETCHES.c.category, SKETCHES.c.digest)
+    if municipality is not None:
+        query = query.where(SKETCHES.c.municipality == municipality)
+    if category is not None:
+        query = query.where(SKETCHES.c.category == category)
+    if since_period:
+        query = query.where(SKETCHES.c.period >= since_period)
+
+    groups = {}
+    for row in db.execute(query):
+        key = getattr(row, group_by) if group_by else "all"
+        groups.setdefault(key, TDigest()).merge(TDigest.from_json(row.digest))
+
+    return [
+        {
+            "key": key,
+            "count": digest.count,
+            "percentiles": {name: digest.quantile(q) for name, q in PERCENTILES.items()},
+        }
+        for key, digest in sorted(groups.items())
+    ]
+
+
+# --- YENİDEN HESAPLAMA ---
+# Sketch'leri durum geçmişinden sıfırdan üretir (ilk kurulum veya düzeltme için). Uygulama
+# DURDURULMUŞKEN çalıştırılmalı: çalışan sürecin tamponundaki süreler yeniden hesabın üstüne
+# birleştirilir ve iki kez sayılır. Buradaki flush sadece aynı sürecin tamponunu boşaltır.
+def rebuild(db):
+    buffer.flush()
+    c = archive.complaints_source(archived=True)
+    e = archive.events_source(archived=True)
+    query = (
+        select(c.c.id, c.c.created_at, c.c.municipality, c.c.category, e.c.status, e.c.ts)
+        .join(e, e.c.complaint_id == c.c.id)
+        .order_by(c.c.id, e.c.ts, e.c.id)
+        .execution_options(yield_per=1000)
+    )
+    # Sketch'ler ana veritabanında; bildirim + geçmiş aynı shard'da olduğu için join shard başına
+    digests = {}
+    for shard_db in shards.each(db):
+        current_id, previous = None, INITIAL_STATUS
+        for row in shard_db.execute(query):
+            if row.id != current_id:
+                current_id, previous = row.id, INITIAL_STATUS
+            if row.status == RESOLVED_STATUS and previous != RESOLVED_STATUS:
+                key = sketch_key(row.ts, row.municipality, row.category)
+                digests.setdefault(key, TDigest()).add(resolution_hours(row.created_at, row.ts))
+            previous = row.status
+
+    db.execute(delete(SKETCHES))
+    for key, digest in digests.items():
+        _write(db, key, digest)
+    db.commit()
+    return len(digests)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Çözülme süresi sketch'lerini durum geçmişinden yeniden "
+                                                 "hesaplar. API süreçleri durdurulmuşken çalıştırın.")
+    parser.add_argument("--app-stopped", action="store_true", required=True,
+                        help="API'nin durdurulduğunu onaylar; tamponlanmış süreler iki kez sayılmaz")
+    parser.parse_args()
+    session = SessionLocal()
+    try:
+        written = rebuild(session)
+    finally:
+        session.close()
+    print(f"{written} sketch yazıldı.", file=sys.stderr)
@@ -0,0 +1,185 @@
+import os
+import sys
+import logging
+import importlib.util
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy import select, func, Integer, Float, Boolean, DateTime
+
+import models
+import jobs
+import shards
+from database import SessionLocal
+from stats import TURKEY_TZ, local_datetime
+
+# pyarrow opsiyonel (yoksa snapshot alınmaz) ve ağır; API açılışını yavaşlatmasın diye ilk
+# snapshot'ta import edilir (bkz. _load_pyarrow)
+pa = pq = None
+
+logger = logging.getLogger("kentinsesi.snapshots")
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("SNAPSHOT_INTERVAL", str(6 * 3600)))
+FETCH_SIZE = 5000
+# Ay bittikten bu kadar sonra yazılmış bölüm kapanmış sayılır; günlükten (bkz. journal.py) geç aktarılan
+# bildirimler de son yazıma girsin
+CLOSE_GRACE = timedelta(hours=float(os.getenv("SNAPSHOT_CLOSE_GRACE_HOURS", "6")))
+
+# tablo -> ayın belirlendiği zaman sütunu
+TABLES = {
+    "complaints": (models.Complaint.__table__, "created_at"),
+    "vehicles": (models.Vehicle.__table__, "created_at"),
+    "complaint_status_events": (models.ComplaintStatusEvent.__table__, "ts"),
+}
+
+# Az sayıda farklı değeri olan sütunlar Arrow'da da sözlük (dictionary) tipiyle tutulur
+DICTIONARY_COLUMNS = {"status", "category", "municipality", "assigned_to"}
+
+
+def available():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _load_pyarrow():
+    global pa, pq
+    if pa is None:
+        import pyarrow
+        import pyarrow.parquet
+        pa, pq = pyarrow, pyarrow.parquet
+
+
+def _arrow_type(column):
+    if column.name in DICTIONARY_COLUMNS:
+        return pa.dictionary(pa.int32(), pa.string())
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us", tz="UTC")
+    return pa.string()
+
+
+def _schema(table):
+    return pa.schema([(column.name, _arrow_type(column)) for column in table.columns])
+
+
+def _month_start(year, month):
+    # Türkiye saatiyle ayın başlangıcı, UTC olarak
+    return datetime(year, month, 1, tzinfo=TURKEY_TZ).astimezone(timezone.utc)
+
+
+def _next_month(year, month):
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def partition_path(name, year, month):
+    return os.path.join(SNAPSHOT_DIR, name, f"month={year:04d}-{month:02d}", "part-0.parquet")
+
+
+def is_closed(name, year, month):
+    # Ay içindeyken yazılmış bölüm eksiktir: ay bitip yeniden yazılana kadar kapanmış sayılmaz
+    path = partition_path(name, year, month)
+    if not os.path.exists(path):
+        return False
+    closes_at = _month_start(*_next_month(year, month)) + CLOSE_GRACE
+    return os.path.getmtime(path) >= closes_at.timestamp()
+
+
+def _utc(value):
+    # SQLite saat dilimsiz (UTC) döndürür
+    return value.replace(tzinfo=timezone.utc) if value is not None and value.tzinfo is None else value
+
+
+def _write_partition(db, name, table, ts_column, year, month):
+    ts = table.c[ts_column]
+    query = (
+        select(*table.c)
+        .where(ts >= _month_start(year, month), ts < _month_start(*_next_month(year, month)))
+        .order_by(table.c.id)
+        .execution_options(stream_results=True, yield_per=FETCH_SIZE)
+    )
+    schema = _schema(table)
+    datetime_columns = [i for i, field in enumerate(schema) if pa.types.is_timestamp(field.type)]
+    columns = [[] for _ in schema]
+    # Bölüm tüm shard'ların satırlarını içerir; shard'lar sırayla okunur (her biri kendi içinde id sıralı)
+    for shard_db in shards.each(db):
+        for row in shard_db.execute(query):
+            for i, value in enumerate(row):
+                columns[i].append(_utc(value) if i in datetime_columns else value)
+
+    path = partition_path(name, year, month)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    arrays = [pa.array(values, type=field.type) for values, field in zip(columns, schema)]
+    pq.write_table(pa.Table.from_arrays(arrays, schema=schema), tmp_path, compression="zstd")
+    # Okuyucular yarım dosya görmesin
+    os.replace(tmp_path, path)
+    return len(columns[0])
+
+
+# --- KOLONSAL SNAPSHOT'LAR ---
+# complaints, vehicles ve durum geçmişi aylık bölümler (Türkiye saatiyle) halinde Parquet'e yazılır:
+# snapshots/<tablo>/month=YYYY-MM/part-0.parquet (Hive düzeni; pyarrow/duckdb/pandas doğrudan okur).
+# Artımlıdır: içinde bulunulan ay her turda yeniden yazılır; ay bittikten sonra bir kez daha yazılan
+# bölüm kapanır ve bir daha dokunulmaz (bkz. is_closed). Shard'lı kurulumda (DATABASE_SHARDS) bölümler
+# tüm shard'lardan toplanır. Analizler üretim veritabanına değil bu dosyalara gider.
+def write_snapshots(db):
+    _load_pyarrow()
+    now = local_datetime(None)
+    current = (now.year, now.month)
+    written = []
+    for name, (table, ts_column) in TABLES.items():
+        firsts = [shard_db.execute(select(func.min(table.c[ts_column]))).scalar() for shard_db in shards.each(db)]
+        firsts = [_utc(value) for value in firsts if value is not None]
+        if not firsts:
+            continue
+        first = local_datetime(min(firsts))
+        year, month = first.year, first.month
+        while (year, month) <= current:
+            if not is_closed(name, year, month):
+                rows = _write_partition(db, name, table, ts_column, year, month)
+                written.append({"table": name, "month": f"{year:04d}-{month:02d}", "rows": rows})
+            year, month = _next_month(year, month)
+    return written
+
+
+def list_snapshots():
+    partitions = []
+    for name in TABLES:
+        root = os.path.join(SNAPSHOT_DIR, name)
+        if not os.path.isdir(root):
+            continue
+        for entry in sorted(os.listdir(root)):
+            path = os.path.join(root, entry, "part-0.parquet")
+            if entry.startswith("month=") and os.path.exists(path):
+                partitions.append({"table": name, "month": entry[len("month="):], "bytes": os.path.getsize(path)})
+    return partitions
+
+
+def _snapshot_job():
+    if not available():
+        return
+    db = SessionLocal()
+    try:
+        written = write_snapshots(db)
+    finally:
+        db.close()
+    logger.info("%d snapshot bölümü yazıldı", len(written))
+
+
+jobs.register("columnar-snapshots", SNAPSHOT_INTERVAL_SECONDS, _snapshot_job)
+
+
+if __name__ == "__main__":
+    if not available():
+        sys.exit("pyarrow kurulu değil: pip install pyarrow")
+    session = SessionLocal()
+    try:
+        result = write_snapshots(session)
+    finally:
+        session.close()
+    for item in result:
+        print(f"{item['table']} {item['month']}: {item['rows']} satır", file=sys.stderr)
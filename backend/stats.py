@@ -0,0 +1,225 @@
+import os
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update, delete, func, or_, and_, literal, union_all, text, false
+
+import models
+import jobs
+import archive
+import shards
+from database import SessionLocal, dialect_insert
+
+# Türkiye 2016'dan beri sabit UTC+3; "bugün" ve "bu hafta" bu saate göre hesaplanır
+TURKEY_TZ = timezone(timedelta(hours=3))
+
+# Sayaçların gerçek tabloyla karşılaştırılıp düzeltilme aralığı (saniye)
+RECONCILE_INTERVAL_SECONDS = float(os.getenv("STATS_RECONCILE_INTERVAL", "3600"))
+
+# Bu kadar günden eski "day" satırları tutulmaz
+DAY_BUCKET_RETENTION_DAYS = 14
+
+# Son desteği bundan eski bildirimlerin sayacı complaint_upvotes'tan düzeltilebilir: bu sürede
+# tampondaki artışlar (bkz. upvotes.py) çoktan yazılmış olur
+UPVOTE_QUIET_SECONDS = 300
+
+STAT_DIMENSIONS = ("status", "category", "municipality")
+
+
+def local_datetime(dt):
+    # SQLite saat dilimi bilgisi olmadan UTC döndürür
+    if dt is None:
+        dt = datetime.now(timezone.utc)
+    elif dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(TURKEY_TZ)
+
+
+def local_date(dt):
+    return local_datetime(dt).date()
+
+
+def in_day_retention(created_at):
+    # reconcile ile aynı sınır: bundan eski bildirimlerin "day" satırı yok
+    return local_datetime(created_at) >= local_datetime(None) - timedelta(days=DAY_BUCKET_RETENTION_DAYS)
+
+
+def complaint_deltas(row, sign):
+    # Bir bildirimin eklenmesi (+1) / silinmesi (-1) hangi sayaçları etkiler. Saklama süresi dışındaki
+    # bir bildirim silinince silinmiş "day" satırı eksi değerle yeniden açılmasın.
+    deltas = [("total", "all", sign)]
+    if in_day_retention(row.created_at):
+        deltas.append(("day", local_date(row.created_at).isoformat(), sign))
+    for dimension in STAT_DIMENSIONS:
+        value = getattr(row, dimension)
+        if value:
+            deltas.append((dimension, value, sign))
+    return deltas
+
+
+def _upsert(stmt):
+    table = models.ComplaintStat.__table__
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.dimension, table.c.key],
+        set_={"count": table.c.count + stmt.excluded["count"]},
+    )
+
+
+def bump(db, deltas):
+    # Tek bir çok satırlı upsert: count = count + excluded.count. Çağıranın transaction'ında
+    # çalışır, commit'i çağıran yapar (bildirim yazımıyla aynı transaction).
+    merged = Counter()
+    for dimension, key, n in deltas:
+        merged[(dimension, key)] += n
+    rows = [{"dimension": d, "key": k, "count": n} for (d, k), n in merged.items() if n]
+    if not rows:
+        return
+    stmt = dialect_insert(db, models.ComplaintStat.__table__).values(rows)
+    db.execute(_upsert(stmt))
+
+
+def bump_status_change(db, complaint_id, new_status):
+    # Durum değişikliğinden ÖNCE çağrılır. Önce satır kilitlenir (SELECT ... FOR UPDATE): aynı
+    # bildirime eşzamanlı iki PUT'ta ikincisi birincinin commit'ini bekler ve eski durumu onun
+    # yazdığı değerden okur, eski durum iki kez düşülmez. Eski durum upsert'in kaynağı olan
+    # INSERT ... SELECT içinde okunur (eski -1, yeni +1). Bildirim yoksa veya durum aynıysa hiçbir
+    # satır eklenmez. Eski durumu (yoksa None) döndürür.
+    c = models.Complaint.__table__
+    db.execute(select(c.c.id).where(c.c.id == complaint_id).with_for_update())
+    changed = and_(c.c.id == complaint_id, c.c.status != new_status)
+    source = union_all(
+        select(literal("status"), c.c.status, literal(-1)).where(changed),
+        select(literal("status"), literal(new_status), literal(1)).where(changed),
+    )
+    table = models.ComplaintStat.__table__
+    stmt = dialect_insert(db, table).from_select(["dimension", "key", "count"], source)
+    keys = db.execute(_upsert(stmt).returning(table.c.key)).scalars().all()
+    return next((key for key in keys if key != new_status), None)
+
+
+def read_stats(db):
+    today = local_date(None)
+    week_start = today - timedelta(days=today.weekday())
+    table = models.ComplaintStat.__table__
+    rows = db.execute(
+        select(table.c.dimension, table.c.key, table.c.count).where(
+            or_(table.c.dimension != "day", table.c.key >= week_start.isoformat())
+        )
+    ).all()
+
+    result = {"total": 0, "by_status": {}, "by_category": {}, "by_municipality": {}, "today": 0, "this_week": 0}
+    for dimension, key, count in rows:
+        if dimension == "total":
+            result["total"] = count
+        elif dimension == "day":
+            result["this_week"] += count
+            if key == today.isoformat():
+                result["today"] = count
+        elif dimension in STAT_DIMENSIONS and count:
+            result[f"by_{dimension}"][key] = count
+    return result
+
+
+def merge_stats(results):
+    # Shard'lardan gelen read_stats sonuçlarının toplamı (ülke geneli panel)
+    merged = {"total": 0, "by_status": Counter(), "by_category": Counter(), "by_municipality": Counter(),
+              "today": 0, "this_week": 0}
+    for result in results:
+        for name, value in result.items():
+            if isinstance(value, dict):
+                merged[name].update(value)
+            else:
+                merged[name] += value
+    return {name: dict(value) if isinstance(value, Counter) else value for name, value in merged.items()}
+
+
+def read_national_stats(db):
+    results = shards.scatter(read_stats, db)
+    return results[0] if len(results) == 1 else merge_stats(results)
+
+
+# --- DÜZELTME (RECONCILIATION) ---
+# Sayaçlar transaction içinde güncellense de elle yapılan veritabanı müdahaleleri kaymaya yol
+# açabilir. Periyodik olarak gerçek değerler yeniden sayılır. Sayma ve yeniden yazma tek
+# transaction'da, sayaç tablosu kilitliyken yapılır: arada commit edilen bir bump silinmez,
+# bump'lar düzeltme bitene kadar bekler.
+def _lock_stats(db):
+    table = models.ComplaintStat.__table__
+    if db.get_bind().dialect.name == "postgresql":
+        # bump'ların upsert'i (ROW EXCLUSIVE) ile çakışır, okumalarla çakışmaz
+        db.execute(text("LOCK TABLE complaint_stats IN SHARE ROW EXCLUSIVE MODE"))
+    else:
+        # SQLite'ta boş bir UPDATE yazma kilidini alır; Session da bundan sonra yazar bağlantısından okur
+        db.execute(update(table).where(false()).values(count=table.c.count))
+
+
+def reconcile(db):
+    _lock_stats(db)
+    # Arşivdeki bildirimler de sayılır (arşivleme sayaçları değiştirmez, bkz. archive.py)
+    c = archive.complaints_source(archived=True).c
+    expected = Counter()
+    expected[("total", "all")] = db.execute(select(func.count(c.id))).scalar() or 0
+    for dimension in STAT_DIMENSIONS:
+        column = c[dimension]
+        for value, count in db.execute(select(column, func.count(c.id)).where(column.isnot(None)).group_by(column)):
+            if value:
+                expected[(dimension, value)] = count
+
+    since = datetime.now(timezone.utc) - timedelta(days=DAY_BUCKET_RETENTION_DAYS)
+    for (created_at,) in db.execute(select(c.created_at).where(c.created_at >= since)):
+        expected[("day", local_date(created_at).isoformat())] += 1
+
+    table = models.ComplaintStat.__table__
+    db.execute(delete(table))
+    if expected:
+        db.execute(table.insert(), [{"dimension": d, "key": k, "count": n} for (d, k), n in expected.items()])
+    db.commit()
+    return len(expected)
+
+
+def reconcile_upvotes(db):
+    # Destek sayacı tamponda bekleyip süreç çökünce yazılamamış olabilir; kaynak doğruluk
+    # complaint_upvotes. Sadece eksik sayaçlar yükseltilir (tablodan önceki eski destekler
+    # satırsız sayılmıştı) ve son UPVOTE_QUIET_SECONDS'ta desteklenenlere dokunulmaz: tamponda
+    # hâlâ yazılmayı bekleyen artış iki kez sayılmasın.
+    complaints = models.Complaint.__table__
+    upvotes = models.ComplaintUpvote.__table__
+    quiet_since = datetime.now(timezone.utc) - timedelta(seconds=UPVOTE_QUIET_SECONDS)
+    counted = (
+        select(func.count()).select_from(upvotes)
+        .where(upvotes.c.complaint_id == complaints.c.id).scalar_subquery()
+    )
+    recent = select(upvotes.c.complaint_id).where(
+        upvotes.c.complaint_id == complaints.c.id, upvotes.c.created_at >= quiet_since
+    ).exists()
+    fixed = db.execute(
+        update(complaints).where(func.coalesce(complaints.c.upvotes, 0) < counted, ~recent).values(upvotes=counted)
+    ).rowcount
+    db.commit()
+    return fixed
+
+
+def _reconcile_job():
+    # Her shard kendi sayaçlarını kendi bildirimlerinden sayar
+    db = SessionLocal()
+    try:
+        return sum(reconcile(shard_db) + reconcile_upvotes(shard_db) for shard_db in shards.each(db))
+    finally:
+        db.close()
+
+
+def _fill_empty_job():
+    # Açılışta (her Render uyanışında) tam sayım yazmaları kilitlemesin: sadece sayaç tablosu boş
+    # olan shard'lar (yeni kurulum) sayılır, gerisi aralıklı düzeltmeye kalır
+    db = SessionLocal()
+    try:
+        table = models.ComplaintStat.__table__
+        return sum(
+            reconcile(shard_db) for shard_db in shards.each(db)
+            if shard_db.execute(select(table.c.key).limit(1)).first() is None
+        )
+    finally:
+        db.close()
+
+
+jobs.register("stats-reconcile", RECONCILE_INTERVAL_SECONDS, _reconcile_job, run_on_start=_fill_empty_job)
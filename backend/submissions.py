@@ -0,0 +1,93 @@
+import re
+
+from sqlalchemy import select
+
+import models
+import stats
+import rollups
+import plates
+import fuzzy_plates
+import shards
+import readmodel
+from database import dialect_insert
+
+COMPLAINTS = models.Complaint.__table__
+
+# Tek istekte gönderilebilecek en fazla bildirim (çevrimdışı senkronizasyon)
+MAX_BATCH = 100
+
+
+# --- BİLDİRİM EKLEME ---
+# Tekli, toplu ve çevrimdışı kuyruktan gelen bildirimler aynı yoldan yazılır: tek bir çok satırlı
+# INSERT ... ON CONFLICT (client_id) DO NOTHING RETURNING. Aynı client_id ile tekrar gönderilen
+# bildirim yeniden eklenmez (idempotent); client_id'siz bildirimler her zaman eklenir.
+def insert_complaints(db, items):
+    values = [
+        dict(item, plate_normalized=plates.normalize_plate(item.get("plate")))
+        for item in items
+    ]
+    created = db.execute(
+        dialect_insert(db, COMPLAINTS)
+        .values(values)
+        .on_conflict_do_nothing(index_elements=[COMPLAINTS.c.client_id])
+        .returning(*COMPLAINTS.c)
+    ).all()
+    deltas = []
+    for row in created:
+        deltas += stats.complaint_deltas(row, 1)
+    stats.bump(db, deltas)
+    return created
+
+
+# --- BELEDİYE ---
+# Uygulama belediyeyi göndermezse konum metninden çıkarılır; iş kuyruğu ve shard yönlendirmesi buna bakar.
+# "... 34728 Kadıköy/İstanbul" ya da Nominatim'in "..., Çankaya, Ankara, İç Anadolu Bölgesi, 06420, Türkiye"
+# biçimi: ülke, posta kodu ve bölge atılınca sondan ikinci parça ilçe (belediye), sonuncusu il.
+DISTRICT_SLASH = re.compile(r"([^\s,/\d][^,/\d]*?)\s*/\s*[^,/]+$")
+
+
+def municipality_from_location(location):
+    if not location:
+        return None
+    location = location.strip()
+    match = DISTRICT_SLASH.search(location)
+    if match:
+        return match.group(1).strip()
+    parts = [part.strip() for part in location.split(",")]
+    parts = [
+        part for part in parts
+        if part and not part.replace(".", "").replace("-", "").strip().isdigit()
+        and part not in ("Türkiye", "Turkey") and not part.endswith("Bölgesi")
+    ]
+    if len(parts) < 3:  # "39.9, 32.8" ya da sadece il: belli değil
+        return None
+    return parts[-2]
+
+
+def with_municipality(item):
+    if item.get("municipality"):
+        return item
+    return dict(item, municipality=municipality_from_location(item.get("location")))
+
+
+def by_shard(items):
+    # Her bildirim belediyesinin shard'ına; taşınmakta olan belediyeninkiler None altında (günlüğe)
+    groups = {}
+    for item in items:
+        municipality = item.get("municipality")
+        shard = None if shards.is_frozen(municipality) else shards.shard_for(municipality)
+        groups.setdefault(shard, []).append(item)
+    return groups
+
+
+def find_by_client_ids(db, client_ids):
+    return db.execute(select(*COMPLAINTS.c).where(COMPLAINTS.c.client_id.in_(client_ids))).all()
+
+
+def after_commit(rows):
+    # Commit'ten sonra: bellek içi tamponlar, önbellek ve indeksler
+    for row in rows:
+        rollups.buffer.add(rollups.complaint_deltas(row, 1))
+        fuzzy_plates.index.add(row.plate_normalized)
+    plates.invalidate(*rows)
+    readmodel.model.apply(*rows)
@@ -0,0 +1,103 @@
+import json
+import math
+
+
+# --- T-DIGEST ---
+# Yüzdelik (p50/p90/p99 ...) tahmini için küçük, birleştirilebilir bir özet (Dunning'in
+# "merging digest" yaklaşımı). Veri kuyruklarda (çok hızlı / çok geç çözülen) daha hassas tutulur;
+# boyutu `compression` ile sınırlıdır, veri miktarıyla büyümez. İki digest merge() ile
+# birleştirilebildiği için ay/belediye/kategori başına ayrı tutulup okuma anında toplanabilir.
+class TDigest:
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.centroids = []  # (ortalama, ağırlık), ortalamaya göre sıralı
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer = []
+
+    def add(self, value, weight=1):
+        self._buffer.append((value, weight))
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= self.compression * 5:
+            self._compress()
+
+    def merge(self, other):
+        other._compress()
+        if not other.centroids:
+            return self
+        self._buffer.extend(other.centroids)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        points = sorted(self.centroids + self._buffer)
+        self._buffer = []
+        total = sum(w for _, w in points)
+
+        merged = []
+        before = 0  # mevcut centroid'den önceki toplam ağırlık
+        mean, weight = points[0]
+        for value, w in points[1:]:
+            q = (before + (weight + w) / 2) / total
+            # Kuyruklarda (q ~ 0 veya 1) centroid'ler küçük, ortada büyük olabilir (k1 ölçeği)
+            limit = 2 * total * math.sqrt(q * (1 - q)) / self.compression
+            if weight + w <= max(limit, 1):
+                mean += (value - mean) * w / (weight + w)
+                weight += w
+            else:
+                merged.append((mean, weight))
+                before += weight
+                mean, weight = value, w
+        merged.append((mean, weight))
+        self.centroids = merged
+
+    def quantile(self, q):
+        self._compress()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+
+        # (kümülatif ağırlık, değer) noktaları arasında doğrusal interpolasyon
+        knots = [(0, self.min)]
+        before = 0
+        for mean, weight in self.centroids:
+            knots.append((before + weight / 2, mean))
+            before += weight
+        knots.append((before, self.max))
+
+        target = q * before
+        for (x0, y0), (x1, y1) in zip(knots, knots[1:]):
+            if target <= x1:
+                if x1 == x0:
+                    return y1
+                return y0 + (y1 - y0) * (target - x0) / (x1 - x0)
+        return self.max
+
+    def to_json(self):
+        self._compress()
+        return json.dumps({
+            "compression": self.compression,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "centroids": self.centroids,
+        })
+
+    @classmethod
+    def from_json(cls, data):
+        raw = json.loads(data)
+        digest = cls(raw["compression"])
+        digest.centroids = [tuple(c) for c in raw["centroids"]]
+        digest.count = sum(w for _, w in digest.centroids)
+        if digest.count:
+            digest.min = raw["min"]
+            digest.max = raw["max"]
+        return digest
@@ -0,0 +1,39 @@
+import asyncio
+
+import httpx
+
+import main
+import officials
+import query_budget
+
+# Testlerde istekler test ile aynı context'te (ASGITransport) çalışır, böylece
+# query_budget.count_statements() endpoint'in ifadelerini görür. Lifespan (arka plan işleri) çalışmaz.
+
+
+def call(method, url, **kwargs):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, url, **kwargs)
+
+    with query_budget.count_statements() as counter:
+        response = asyncio.run(run())
+    return response, counter
+
+
+def complaint(title, **extra):
+    return {"title": title, "description": "Durakta beklemeden geçti.", "category": "Ulaşım",
+            "location": "Kızılay", "plate": "06 ABC 123", "lat": 39.92, "lng": 32.85,
+            "user_identifier": "vatandas@mail.com", "municipality": "Çankaya", **extra}
+
+
+def login(email, official_of=None):
+    call("POST", "/register", json={"email": email, "password": "parola"})
+    if official_of:
+        db = main.SessionLocal()
+        try:
+            officials.grant(db, email, official_of)
+        finally:
+            db.close()
+    response, _ = call("POST", "/login", data={"username": email, "password": "parola"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
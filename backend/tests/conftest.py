@@ -0,0 +1,34 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Uygulama modülleri import edilirken engine kurulduğu için ortam önce ayarlanır: geçici bir
+# SQLite dosyası, sorgu sayacı açık. Göreli yollar (uploads/, günlük dosyası) da geçici klasörde.
+_tmp = tempfile.mkdtemp(prefix="kentinsesi-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ.pop("DATABASE_SHARDS", None)
+os.environ.pop("DATABASE_REPLICA_URL", None)
+os.environ["QUERY_BUDGET"] = "1"
+os.environ["QUERY_BUDGET_STRICT"] = "0"
+os.environ["READ_MODEL"] = "0"  # bütçeler veritabanı yolu için
+os.chdir(_tmp)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# İkinci bir SQLite shard'ı ("ege"); test boyunca shard listesine eklenir
+@pytest.fixture
+def extra_shard(tmp_path, monkeypatch):
+    import migrations
+    import shards
+
+    shard = shards._parse(f"ege=sqlite:///{tmp_path / 'ege.db'}")[1]
+    monkeypatch.setattr(shards, "SHARDS", [shards.MAIN, shard])
+    monkeypatch.setattr(shards, "BY_NAME", {shards.MAIN.name: shards.MAIN, shard.name: shard})
+    monkeypatch.setattr(shards, "_directory", None)
+    migrations.migrate()
+    migrations.migrate(shard.engine)
+    yield shard
+    shard.engine.dispose()
+    shard.read_engine.dispose()
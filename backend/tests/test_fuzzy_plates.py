@@ -0,0 +1,51 @@
+import fuzzy_plates
+import main
+import migrations
+
+
+def test_search_finds_two_edits_away():
+    index = fuzzy_plates.FuzzyPlateIndex()
+    for plate in ("06ABC123", "06ABD124", "34XYZ99"):
+        index.add(plate)
+    index.compact()
+    assert index.search("06ABC123", max_dist=2) == [
+        {"plate": "06ABC123", "distance": 0}, {"plate": "06ABD124", "distance": 2},
+    ]
+    assert index.search("06ABC123", max_dist=1) == [{"plate": "06ABC123", "distance": 0}]
+
+
+def test_changes_during_rebuild_are_kept(monkeypatch):
+    migrations.migrate()
+    index = fuzzy_plates.FuzzyPlateIndex()
+    index.add("35KLM456")
+    build = index._build
+
+    def build_while_writing(db):
+        fresh = build(db)
+        # Okuma bittikten sonra, indeks yerine konmadan gelen değişiklikler
+        index.add("07YENI01")
+        index.remove("35KLM456")
+        return fresh
+
+    monkeypatch.setattr(index, "_build", build_while_writing)
+    db = main.SessionLocal()
+    try:
+        index.load(db)
+    finally:
+        db.close()
+    assert index.search("07YENI01", max_dist=0) == [{"plate": "07YENI01", "distance": 0}]
+    assert index.search("35KLM456", max_dist=0) == []
+
+
+def test_compaction_merges_delta_into_sorted_array():
+    index = fuzzy_plates.FuzzyPlateIndex()
+    index.add("06ABC123")
+    index.compact()
+    index.add("06ABC124")
+    assert index.compact_if_needed() == 0  # eşiğin altında: delta olduğu gibi aranır
+    assert index.search("06ABC12", max_dist=1) == [
+        {"plate": "06ABC123", "distance": 1}, {"plate": "06ABC124", "distance": 1},
+    ]
+    index.compact()
+    assert not index.delta and list(index.packed) == sorted(index.packed)
+    assert len(index.search("06ABC12", max_dist=1)) == 2
@@ -0,0 +1,33 @@
+import pytest
+from sqlalchemy import create_engine, select
+
+import migrations
+import models
+import plates
+
+
+def test_startup_refuses_a_schema_that_is_behind(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'eski.db'}")
+    with pytest.raises(RuntimeError, match="python migrations.py"):
+        migrations.check_on_startup(engine)
+
+    monkeypatch.setattr(migrations, "MIGRATE_ON_STARTUP", True)
+    assert migrations.check_on_startup(engine) == migrations.HEAD
+    monkeypatch.setattr(migrations, "MIGRATE_ON_STARTUP", False)
+    assert migrations.check_on_startup(engine) == migrations.HEAD
+
+
+def test_vehicle_plates_are_normalized_without_collisions(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'araclar.db'}")
+    migrations.migrate(engine)
+    vehicles = models.Vehicle.__table__
+    with engine.begin() as conn:
+        conn.execute(vehicles.insert(), [
+            {"plate": "34 abç 123", "serial_no": "S1"},
+            {"plate": "34ABC123", "serial_no": "S1"},  # zaten normalize: plakayı o tutar, kopya silinir
+            {"plate": "06-xyz-99", "serial_no": "S2"},
+            {"plate": "06 XYZ 99", "serial_no": "S3"},  # farklı araç: elle bakılsın diye dokunulmaz
+        ])
+        assert plates.normalize_vehicle_plates(conn) == (1, 1)
+        rows = dict(conn.execute(select(vehicles.c.plate, vehicles.c.serial_no)).all())
+    assert rows == {"34ABC123": "S1", "06XYZ99": "S2", "06 XYZ 99": "S3"}
@@ -0,0 +1,73 @@
+import pytest
+
+import migrations
+import query_budget
+import upvotes
+from client import call, complaint, login
+
+# Her endpoint query_budget.ENDPOINT_BUDGETS'taki ifade sayısını aşmamalı (bkz. client.call).
+
+
+@pytest.fixture(scope="module")
+def setup():
+    migrations.migrate()
+    official = login("yetkili@belediye.gov.tr", official_of="Çankaya")
+    citizen = login("vatandas@mail.com")
+    first, _ = call("POST", "/complaints/", json=complaint("ilk"))
+    second, _ = call("POST", "/complaints/", json=complaint("ikinci"))
+    vehicle, _ = call("POST", "/vehicles/", json={"plate": "06 XYZ 001", "serial_no": "1"})
+    return {
+        "official": official, "citizen": citizen,
+        "first": first.json()["id"], "second": second.json()["id"], "vehicle": vehicle.json()["id"],
+    }
+
+
+def requests(ids):
+    # (metod, route, url, istek argümanları)
+    return [
+        ("POST", "/complaints/", "/complaints/", {"json": complaint("yeni")}),
+        ("POST", "/complaints/batch", "/complaints/batch", {"json": {"complaints": [
+            complaint("toplu 1", client_id="c-1"), complaint("toplu 2", client_id="c-2"),
+        ]}}),
+        ("GET", "/complaints/", "/complaints/?limit=20", {}),
+        ("GET", "/complaints/{complaint_id}", f"/complaints/{ids['first']}?archived=true", {}),
+        ("POST", "/complaints/bulk_status", "/complaints/bulk_status", {
+            "headers": ids["official"], "json": {"ids": [ids["first"], ids["second"]], "status": "İnceleniyor"},
+        }),
+        ("GET", "/queue/next", "/queue/next", {"headers": ids["official"]}),
+        ("PUT", "/complaints/{complaint_id}/status", f"/complaints/{ids['first']}/status",
+         {"json": {"status": "İşlemde", "note": "ekip yolda"}}),
+        ("POST", "/complaints/{complaint_id}/upvote", f"/complaints/{ids['second']}/upvote",
+         {"headers": ids["citizen"]}),
+        ("DELETE", "/complaints/{complaint_id}", f"/complaints/{ids['second']}", {}),
+        ("POST", "/vehicles/", "/vehicles/", {"json": {"plate": "06 XYZ 002", "serial_no": "2"}}),
+        ("GET", "/vehicles/", "/vehicles/", {}),
+        ("DELETE", "/vehicles/{vehicle_id}", f"/vehicles/{ids['vehicle']}", {}),
+        ("GET", "/vehicles/overview", "/vehicles/overview", {}),
+        ("GET", "/vehicles/{plate}/complaints", "/vehicles/06ABC123/complaints", {}),
+        ("GET", "/plates/fuzzy", "/plates/fuzzy?q=06ABC124", {}),
+        ("GET", "/rank/{user_identifier}", "/rank/vatandas@mail.com", {}),
+        ("GET", "/leaderboard", "/leaderboard", {}),
+        ("GET", "/stats", "/stats", {}),
+        ("GET", "/stats/open", "/stats/open", {}),
+        ("GET", "/bootstrap", "/bootstrap", {"headers": ids["citizen"]}),
+        ("GET", "/analytics/timeseries", "/analytics/timeseries", {}),
+        ("GET", "/analytics/sla", "/analytics/sla", {}),
+        ("GET", "/export/complaints", "/export/complaints", {"headers": ids["official"]}),
+        ("POST", "/register", "/register", {"json": {"email": "yeni@mail.com", "password": "parola"}}),
+        ("POST", "/login", "/login", {"data": {"username": "yeni@mail.com", "password": "parola"}}),
+    ]
+
+
+def test_every_budget_is_exercised(setup):
+    covered = {(method, route) for method, route, _, _ in requests(setup)}
+    assert covered == set(query_budget.ENDPOINT_BUDGETS)
+
+
+def test_endpoints_stay_within_budget(setup):
+    for method, route, url, kwargs in requests(setup):
+        response, counter = call(method, url, **kwargs)
+        assert response.status_code < 400, (method, url, response.status_code, response.text)
+        budget = query_budget.ENDPOINT_BUDGETS[(method, route)]
+        assert counter.count <= budget, f"{method} {route}: {counter.count} > {budget}\n" + "\n".join(counter.statements)
+    upvotes.flush_all()
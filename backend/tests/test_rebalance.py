@@ -0,0 +1,73 @@
+import logging
+
+import pytest
+from sqlalchemy import select
+
+import journal
+import models
+import rebalance
+import shards
+from client import call, complaint
+
+
+def municipality_titles(shard, municipality):
+    db = shard.session_factory()
+    try:
+        return db.execute(
+            select(models.Complaint.title).where(models.Complaint.municipality == municipality)
+        ).scalars().all()
+    finally:
+        db.close()
+
+
+def test_journal_replays_onto_the_new_shard(tmp_path, extra_shard):
+    call("POST", "/complaints/", json=complaint("taşınacak", municipality="Bornova"))
+    db = shards.MAIN.session_factory()
+    try:
+        rebalance.set_directory(db, "Bornova", shards.MAIN.name, moving=True)
+    finally:
+        db.close()
+    shards.refresh_directory()
+    # Taşıma sırasında gelen bildirim günlükte bekler
+    wal = journal.ComplaintJournal(str(tmp_path / "journal.jsonl"))
+    wal.append([complaint("günlükte bekleyen", municipality="Bornova", client_id="tasima-1")])
+    assert wal.drain() == 0
+
+    assert rebalance.move("Bornova", extra_shard.name, wait=0) == 1
+    shards.refresh_directory()
+    # Shard aktarım anında yeniden çözülür: günlük kaydı yeni shard'a yazılır
+    assert wal.drain() == 1
+    assert sorted(municipality_titles(extra_shard, "Bornova")) == ["günlükte bekleyen", "taşınacak"]
+    assert municipality_titles(shards.MAIN, "Bornova") == []
+
+
+def test_failed_move_is_logged_and_can_be_aborted(monkeypatch, caplog, extra_shard):
+    call("POST", "/complaints/", json=complaint("iptal", municipality="Buca"))
+
+    def broken(*args):
+        raise RuntimeError("hedef shard'a yazılamadı")
+
+    monkeypatch.setattr(rebalance, "move_batch", broken)
+    with caplog.at_level(logging.ERROR, logger="kentinsesi.rebalance"), pytest.raises(RuntimeError):
+        rebalance.move("Buca", extra_shard.name, wait=0)
+    assert any(record.levelno == logging.ERROR and "Buca" in record.getMessage() for record in caplog.records)
+    shards.refresh_directory()
+    assert shards.is_frozen("Buca")
+
+    assert rebalance.abort("Buca")
+    shards.refresh_directory()
+    assert not shards.is_frozen("Buca")
+    assert municipality_titles(shards.MAIN, "Buca") == ["iptal"]
+
+
+def test_abort_refuses_once_rows_are_copied(extra_shard):
+    call("POST", "/complaints/", json=complaint("kopyalandı", municipality="Karşıyaka"))
+    assert rebalance.move("Karşıyaka", extra_shard.name, wait=0) == 1
+    db = shards.MAIN.session_factory()
+    try:
+        # Kopyalama bitmiş ama dizin güncellenmeden kesilmiş gibi
+        rebalance.set_directory(db, "Karşıyaka", shards.MAIN.name, moving=True)
+    finally:
+        db.close()
+    with pytest.raises(ValueError):
+        rebalance.abort("Karşıyaka")
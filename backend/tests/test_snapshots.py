@@ -0,0 +1,61 @@
+import os
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import insert, update
+
+import main
+import migrations
+import models
+import snapshots
+from client import call, complaint
+from stats import local_datetime
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def test_month_written_while_current_is_rewritten_once(tmp_path, monkeypatch):
+    migrations.migrate()
+    monkeypatch.setattr(snapshots, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(snapshots, "CLOSE_GRACE", timedelta(0))
+    complaint_id = call("POST", "/complaints/", json=complaint("geçen ay"))[0].json()["id"]
+    this_month = local_datetime(None).replace(day=1, hour=12)
+    last_month = this_month - timedelta(days=1)
+    month = f"{last_month.year:04d}-{last_month.month:02d}"
+
+    db = main.SessionLocal()
+    try:
+        db.execute(update(models.Complaint).where(models.Complaint.id == complaint_id).values(created_at=last_month))
+        db.commit()
+
+        def written():
+            return [p["month"] for p in snapshots.write_snapshots(db) if p["table"] == "complaints"]
+
+        assert month in written()
+        # Bölüm geçen ay, ay henüz bitmemişken yazılmış olsun: eksik sayılır ve yeniden yazılır
+        path = snapshots.partition_path("complaints", last_month.year, last_month.month)
+        os.utime(path, (last_month.timestamp(), last_month.timestamp()))
+        assert month in written()
+        assert month not in written()
+    finally:
+        db.close()
+
+
+def test_partitions_include_every_shard(tmp_path, monkeypatch, extra_shard):
+    monkeypatch.setattr(snapshots, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    call("POST", "/complaints/", json=complaint("ana shard"))
+    shard_db = extra_shard.session_factory()
+    try:
+        shard_db.execute(insert(models.Complaint).values(title="ege shard", description="-", municipality="Bornova"))
+        shard_db.commit()
+    finally:
+        shard_db.close()
+
+    db = main.SessionLocal()
+    try:
+        snapshots.write_snapshots(db)
+    finally:
+        db.close()
+    now = local_datetime(None)
+    titles = pq.read_table(snapshots.partition_path("complaints", now.year, now.month)).column("title").to_pylist()
+    assert "ana shard" in titles and "ege shard" in titles
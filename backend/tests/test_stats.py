@@ -0,0 +1,89 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update, func
+
+import main
+import migrations
+import models
+import stats
+from client import call, complaint
+
+
+def national_stats():
+    db = main.SessionLocal()
+    try:
+        return stats.read_national_stats(db)
+    finally:
+        db.close()
+
+
+def complaint_count():
+    db = main.SessionLocal()
+    try:
+        return db.execute(select(func.count(models.Complaint.id))).scalar()
+    finally:
+        db.close()
+
+
+def test_reconcile_keeps_bumps_committed_during_recount():
+    migrations.migrate()
+    call("POST", "/complaints/", json=complaint("önce"))
+    db = main.SessionLocal()
+    try:
+        stats._lock_stats(db)
+        # Düzeltme sayarken gelen bildirim kilidi bekler; sayılmadan yazılıp silinmemeli
+        writer = threading.Thread(target=call, args=("POST", "/complaints/"), kwargs={"json": complaint("arada")})
+        writer.start()
+        writer.join(timeout=0.5)
+        assert writer.is_alive()
+        stats.reconcile(db)
+    finally:
+        db.close()
+    writer.join()
+    assert national_stats()["total"] == complaint_count()
+
+
+def test_status_change_counts_old_status_once():
+    migrations.migrate()
+    complaint_id = call("POST", "/complaints/", json=complaint("durum"))[0].json()["id"]
+    before = national_stats()["by_status"]
+    for _ in range(2):
+        call("PUT", f"/complaints/{complaint_id}/status", json={"status": "İnceleniyor"})
+    after = national_stats()["by_status"]
+    assert after["Beklemede"] == before["Beklemede"] - 1
+    assert after["İnceleniyor"] == before.get("İnceleniyor", 0) + 1
+
+
+def day_rows():
+    db = main.SessionLocal()
+    try:
+        table = models.ComplaintStat.__table__
+        return dict(db.execute(select(table.c.key, table.c.count).where(table.c.dimension == "day")).all())
+    finally:
+        db.close()
+
+
+def test_deleting_old_complaint_leaves_day_buckets_alone():
+    migrations.migrate()
+    complaint_id = call("POST", "/complaints/", json=complaint("eski"))[0].json()["id"]
+    long_ago = datetime.now(timezone.utc) - timedelta(days=stats.DAY_BUCKET_RETENTION_DAYS + 3)
+    db = main.SessionLocal()
+    try:
+        db.execute(update(models.Complaint).where(models.Complaint.id == complaint_id).values(created_at=long_ago))
+        db.commit()
+    finally:
+        db.close()
+    before = day_rows()
+    call("DELETE", f"/complaints/{complaint_id}")
+    assert day_rows() == before
+    assert all(count >= 0 for count in day_rows().values())
+
+
+def test_startup_fill_skips_populated_counters(monkeypatch):
+    migrations.migrate()
+    call("POST", "/complaints/", json=complaint("açılış"))
+    recounted = []
+    monkeypatch.setattr(stats, "reconcile", lambda db: recounted.append(db) or 0)
+    stats._fill_empty_job()
+    assert recounted == []
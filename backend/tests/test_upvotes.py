@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update, select
+
+import main
+import migrations
+import models
+import stats
+import upvotes
+from client import call, complaint, login
+
+
+def upvote_count(complaint_id):
+    db = main.SessionLocal()
+    try:
+        return db.execute(select(models.Complaint.upvotes).where(models.Complaint.id == complaint_id)).scalar()
+    finally:
+        db.close()
+
+
+def test_upvote_is_per_authenticated_user():
+    migrations.migrate()
+    voter = login("destekci@mail.com")
+    complaint_id = call("POST", "/complaints/", json=complaint("destek"))[0].json()["id"]
+
+    assert call("POST", f"/complaints/{complaint_id}/upvote")[0].status_code == 401
+    assert call("POST", f"/complaints/{complaint_id}/upvote", headers=voter)[0].json() == {"upvoted": True}
+    # Gövdede başka bir kimlik göndermek ikinci destek saymaz
+    second = call("POST", f"/complaints/{complaint_id}/upvote", headers=voter, json={"user_identifier": "baska"})
+    assert second[0].json() == {"upvoted": False}
+    upvotes.flush_all()
+    assert upvote_count(complaint_id) == 1
+
+
+def test_reconcile_recounts_lost_increments():
+    migrations.migrate()
+    voter = login("kayip@mail.com")
+    complaint_id = call("POST", "/complaints/", json=complaint("kayıp sayaç"))[0].json()["id"]
+    call("POST", f"/complaints/{complaint_id}/upvote", headers=voter)
+    upvotes.buffer._pending.clear()  # süreç çöktü: tampondaki artış yazılamadı
+
+    db = main.SessionLocal()
+    try:
+        assert stats.reconcile_upvotes(db) == 0  # son destek çok yeni, tampon hâlâ yazabilir
+        long_ago = datetime.now(timezone.utc) - timedelta(seconds=stats.UPVOTE_QUIET_SECONDS * 2)
+        db.execute(update(models.ComplaintUpvote).values(created_at=long_ago))
+        db.commit()
+        assert stats.reconcile_upvotes(db) == 1
+    finally:
+        db.close()
+    assert upvote_count(complaint_id) == 1
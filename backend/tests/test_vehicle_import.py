@@ -0,0 +1,23 @@
+import migrations
+from client import call
+
+
+def upload(content):
+    return call("POST", "/vehicles/import", files={"file": ("araclar.csv", content, "text/csv")})[0]
+
+
+def test_unreadable_csv_names_the_line():
+    migrations.migrate()
+    response = upload(b"plate,serial_no\n35ABC123,S1\n35ABD12\xff3,S2\n")
+    assert response.status_code == 400
+    assert "3. satırı okunamadı (UTF-8 değil)" in response.json()["detail"]
+
+    response = upload(b'plate,serial_no\n35ABC123,"S"1\n')
+    assert response.status_code == 400
+    assert "2. satırı okunamadı" in response.json()["detail"]
+
+
+def test_valid_csv_still_imports():
+    migrations.migrate()
+    response = upload("\ufeffplate,serial_no\n35 abç 124,S3\n".encode("utf-8"))
+    assert response.json() == {"imported": 1, "error_count": 0, "errors": []}
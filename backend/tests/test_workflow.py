@@ -0,0 +1,51 @@
+import migrations
+from client import call, complaint, login
+
+
+def test_queue_gets_municipality_from_location():
+    migrations.migrate()
+    official = login("yetkili@mamak.bel.tr", official_of="Mamak")
+    # Uygulama belediye göndermiyor, sadece Nominatim adresi
+    payload = complaint("kuyruk", location="Tuzluçayır, Mamak, Ankara, İç Anadolu Bölgesi, 06620, Türkiye")
+    del payload["municipality"]
+    complaint_id = call("POST", "/complaints/", json=payload)[0].json()["id"]
+
+    claimed = call("GET", "/queue/next", headers=official)[0]
+    assert claimed.status_code == 200
+    assert claimed.json()["id"] == complaint_id
+
+
+def test_bulk_transition_accepts_legacy_statuses():
+    migrations.migrate()
+    official = login("yetkili2@mamak.bel.tr", official_of="Mamak")
+    complaint_id = call("POST", "/complaints/", json=complaint("eski durum", municipality="Mamak"))[0].json()["id"]
+    call("PUT", f"/complaints/{complaint_id}/status", json={"status": "İşleniyor"})
+
+    response = call("POST", "/complaints/bulk_status", headers=official,
+                    json={"ids": [complaint_id], "status": "Çözüldü"})[0]
+    assert response.json()["updated"] == [complaint_id]
+    # Eski adla gönderilen hedef durum yeni adıyla yazılır
+    response = call("POST", "/complaints/bulk_status", headers=official,
+                    json={"ids": [complaint_id], "status": "İşleniyor"})[0]
+    assert response.json()["updated"] == [complaint_id]
+    assert call("GET", f"/complaints/{complaint_id}")[0].json()["status"] == "İşlemde"
+
+
+def test_officials_only_touch_their_own_municipality():
+    migrations.migrate()
+    official = login("yetkili3@mamak.bel.tr", official_of="Mamak")
+    other = call("POST", "/complaints/", json=complaint("başka belediye", municipality="Keçiören"))[0].json()["id"]
+
+    response = call("POST", "/complaints/bulk_status", headers=official,
+                    json={"ids": [other], "status": "İnceleniyor"})[0]
+    assert response.json() == {"updated": [], "not_found": [other], "invalid_transition": []}
+    assert call("GET", f"/complaints/{other}")[0].json()["status"] == "Beklemede"
+
+
+def test_register_cannot_grant_official_role():
+    migrations.migrate()
+    call("POST", "/register", json={"email": "sahte2@mail.com", "password": "parola",
+                                    "role": "BELEDIYE_YETKILISI", "municipality": "Mamak"})
+    response, _ = call("POST", "/login", data={"username": "sahte2@mail.com", "password": "parola"})
+    forged = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert call("GET", "/queue/next", headers=forged)[0].status_code == 403
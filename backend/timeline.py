@@ -0,0 +1,59 @@
+from sqlalchemy import insert, select
+
+import models
+
+# Bildirimler bu durumla açılır (Complaint.status varsayılanı)
+INITIAL_STATUS = models.Complaint.__table__.c.status.default.arg
+RESOLVED_STATUS = "Çözüldü"
+
+EVENTS = models.ComplaintStatusEvent.__table__
+COMPLAINTS = models.Complaint.__table__
+
+
+def record_status_event(db, complaint_id, status, note=None, is_official=True):
+    # Çağıranın transaction'ında çalışır; commit'i çağıran yapar
+    db.execute(
+        insert(EVENTS).values(complaint_id=complaint_id, status=status, note=note, is_official=is_official)
+    )
+
+
+def read_complaint_detail(db, complaint_id, complaints=COMPLAINTS, events=EVENTS):
+    # Bildirim + tüm durum geçmişi tek sorguda: complaints LEFT JOIN status_events,
+    # (complaint_id, ts) indeksi sayesinde olaylar sıralı okunur. Arşivdeki bildirim için
+    # arşiv tabloları verilir (bkz. archive.py).
+    rows = db.execute(
+        select(
+            *complaints.c,
+            events.c.id.label("event_id"),
+            events.c.status.label("event_status"),
+            events.c.note.label("event_note"),
+            events.c.is_official.label("event_is_official"),
+            events.c.ts.label("event_ts"),
+        )
+        .select_from(complaints.outerjoin(events, events.c.complaint_id == complaints.c.id))
+        .where(complaints.c.id == complaint_id)
+        .order_by(events.c.ts, events.c.id)
+    ).all()
+    if not rows:
+        return None
+
+    detail = {column.name: rows[0]._mapping[column] for column in complaints.c}
+    timeline = [{
+        "id": None,
+        "status": INITIAL_STATUS,
+        "note": None,
+        "timestamp": detail["created_at"],
+        "is_official": False,
+    }]
+    for row in rows:
+        if row.event_id is None:
+            continue
+        timeline.append({
+            "id": row.event_id,
+            "status": row.event_status,
+            "note": row.event_note,
+            "timestamp": row.event_ts,
+            "is_official": bool(row.event_is_official),
+        })
+    detail["timeline"] = timeline
+    return detail
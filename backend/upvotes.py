@@ -0,0 +1,77 @@
+import os
+import logging
+import threading
+from collections import Counter
+
+from sqlalchemy import update, case
+
+import models
+import jobs
+import shards
+import readmodel
+
+logger = logging.getLogger("kentinsesi.upvotes")
+
+# Kaç saniyede bir biriken destekler veritabanına yazılsın
+FLUSH_INTERVAL_SECONDS = float(os.getenv("UPVOTE_FLUSH_INTERVAL", "2"))
+
+
+# --- DESTEK SAYACI TAMPONU ---
+# Her destek için `complaints` satırını ayrı ayrı güncellemek, viral bir bildirimde herkesi
+# aynı satırın kilidinde sıraya sokar. Bunun yerine artışlar bellekte toplanır ve periyodik
+# olarak tek bir UPDATE ile `upvotes = upvotes + CASE id WHEN .. THEN n END` şeklinde (atomik) yazılır.
+# Kaynak doğruluk `complaint_upvotes` tablosudur; süreç çökerse yazılamayan artışlar sayaç düzeltme
+# işinde oradan yeniden sayılır (bkz. stats.reconcile_upvotes).
+# Shard başına bir tampon: her UPDATE sadece kendi shard'ına gider, biri yazılamazsa diğerleri etkilenmez.
+class UpvoteBuffer:
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self._pending = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, complaint_id, n=1):
+        with self._lock:
+            self._pending[complaint_id] += n
+
+    def pending(self, complaint_id):
+        with self._lock:
+            return self._pending.get(complaint_id, 0)
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, Counter()
+        if not batch:
+            return 0
+
+        stmt = (
+            update(models.Complaint.__table__)
+            .where(models.Complaint.id.in_(list(batch)))
+            .values(upvotes=models.Complaint.upvotes + case(dict(batch), value=models.Complaint.id, else_=0))
+        )
+        db = self.session_factory()
+        try:
+            db.execute(stmt)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Yazılamayanları kaybetme, bir sonraki turda tekrar denensin
+            with self._lock:
+                self._pending.update(batch)
+            logger.exception("Destek sayaçları yazılamadı")
+            return 0
+        finally:
+            db.close()
+        readmodel.model.add_upvotes(batch)
+        return len(batch)
+
+
+buffers = {shard.name: UpvoteBuffer(shard.session_factory) for shard in shards.SHARDS}
+buffer = buffers[shards.MAIN.name]
+
+
+def flush_all():
+    return sum(b.flush() for b in buffers.values())
+
+
+# Kapanışta bekleyen artışlar son bir kez yazılır
+jobs.register("upvote-flusher", FLUSH_INTERVAL_SECONDS, flush_all, run_on_stop=True)
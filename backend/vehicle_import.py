@@ -0,0 +1,134 @@
+import io
+import csv
+import logging
+from itertools import islice
+
+from sqlalchemy import text
+
+import models
+from database import dialect_insert
+from plates import normalize_plate, is_valid_plate
+
+CHUNK_SIZE = 1000
+
+# Yanıtta en fazla bu kadar satır hatası döner (toplam sayı ayrıca verilir)
+MAX_REPORTED_ERRORS = 1000
+
+VEHICLES = models.Vehicle.__table__
+
+logger = logging.getLogger("kentinsesi.vehicle_import")
+
+
+class UnreadableCSV(ValueError):
+    # Dosya bir satırdan sonra okunamadı (UTF-8 değil / bozuk tırnak); önceki parçalar yüklenmiş olabilir
+    def __init__(self, message, plates):
+        super().__init__(message)
+        self.plates = plates
+
+_STAGE_TABLE = """
+CREATE TEMP TABLE IF NOT EXISTS vehicle_import_stage (plate TEXT, serial_no TEXT)
+ON COMMIT DELETE ROWS
+"""
+_MERGE_STAGE = """
+INSERT INTO vehicles (plate, serial_no)
+SELECT plate, serial_no FROM vehicle_import_stage
+ON CONFLICT (plate) DO UPDATE SET serial_no = EXCLUDED.serial_no
+"""
+
+
+def _validate(rows, start_line):
+    # Geçerli satırlar (plaka başına son satır kazanır) ve satır hataları
+    valid, errors = {}, []
+    for line, row in enumerate(rows, start_line):
+        raw_plate = (row.get("plate") or "").strip()
+        serial_no = (row.get("serial_no") or "").strip()
+        plate = normalize_plate(raw_plate)
+        if not is_valid_plate(plate):
+            errors.append({"row": line, "plate": raw_plate, "error": "Geçersiz plaka"})
+        elif not serial_no:
+            errors.append({"row": line, "plate": raw_plate, "error": "serial_no boş"})
+        else:
+            valid[plate] = serial_no
+    return valid, errors
+
+
+def _load_copy(db, chunk):
+    # Postgres + psycopg2: COPY ile geçici tabloya akıt, oradan tek INSERT ... ON CONFLICT
+    db.execute(text(_STAGE_TABLE))
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(chunk.items())
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert("COPY vehicle_import_stage (plate, serial_no) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+    db.execute(text(_MERGE_STAGE))
+
+
+def _load_executemany(db, chunk):
+    # SQLite (ve COPY olmayan sürücüler): toplu VALUES ile upsert
+    stmt = dialect_insert(db, VEHICLES)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VEHICLES.c.plate],
+        set_={"serial_no": stmt.excluded.serial_no},
+    )
+    db.execute(stmt, [{"plate": plate, "serial_no": serial_no} for plate, serial_no in chunk.items()])
+
+
+# --- CSV İLE TOPLU ARAÇ YÜKLEME ---
+# Dosya satır satır okunur, CHUNK_SIZE'lık parçalar halinde doğrulanır ve yüklenir; her parça
+# kendi transaction'ında commit edilir. Hatalı satırlar raporlanır ama yüklemeyi durdurmaz.
+# Aynı plaka zaten varsa serial_no güncellenir (upsert).
+def _decoded_lines(binary_file, position):
+    # Satır satır çözülür ki UTF-8 hatası tam satır numarasıyla raporlansın (position[0]: fiziksel satır)
+    for raw in binary_file:
+        position[0] += 1
+        yield raw.decode("utf-8-sig" if position[0] == 1 else "utf-8")
+
+
+def import_vehicles(db, binary_file):
+    use_copy = db.get_bind().dialect.driver == "psycopg2"
+    position = [0]
+    # strict: kapanmamış / bozuk tırnak sessizce sonraki satırları yutmasın, hata versin
+    reader = csv.DictReader(_decoded_lines(binary_file, position), strict=True)
+    imported, plates, errors, error_count = 0, [], [], 0
+
+    def unreadable(exc):
+        done = f"; önceki {imported} araç yüklendi" if imported else ""
+        reason = "UTF-8 değil" if isinstance(exc, UnicodeDecodeError) else "bozuk tırnak / CSV biçimi"
+        return UnreadableCSV(f"CSV'nin {position[0]}. satırı okunamadı ({reason}){done}", plates)
+
+    try:
+        fieldnames = reader.fieldnames
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise unreadable(e)
+    if not fieldnames or "plate" not in fieldnames or "serial_no" not in fieldnames:
+        raise ValueError("CSV başlığında plate ve serial_no sütunları olmalı")
+
+    line = 2  # 1. satır başlık
+    while True:
+        try:
+            rows = list(islice(reader, CHUNK_SIZE))
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise unreadable(e)
+        if not rows:
+            break
+        chunk, chunk_errors = _validate(rows, line)
+        if chunk:
+            try:
+                (_load_copy if use_copy else _load_executemany)(db, chunk)
+                db.commit()
+                imported += len(chunk)
+                plates.extend(chunk)
+            except Exception:
+                db.rollback()
+                # Veritabanı hatasının ayrıntısı istemciye değil loga
+                logger.exception("Araç yükleme: %d-%d arası satırlar yüklenemedi", line, line + len(rows) - 1)
+                chunk_errors.append({"row": line, "plate": None, "error": f"{line}-{line + len(rows) - 1} arası yüklenemedi"})
+        error_count += len(chunk_errors)
+        errors.extend(chunk_errors[:MAX_REPORTED_ERRORS - len(errors)])
+        line += len(rows)
+
+    return {"imported": imported, "error_count": error_count, "errors": errors}, plates
@@ -0,0 +1,75 @@
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import auth
+from database import SessionLocal
+
+logger = logging.getLogger("kentinsesi.warmup")
+
+WARMUP_ENABLED = os.getenv("WARMUP", "1") == "1"
+# Trafik almadan önce engine başına açılacak havuz bağlantısı sayısı (en fazla pool_size)
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", "3"))
+
+# aşama -> süre (ms); GET /metrics/startup ve bench_startup.py okur
+timings = {}
+ready = False
+
+
+def _timed(name, fn):
+    started = time.perf_counter()
+    try:
+        fn()
+    except Exception:
+        # Isınma açılışı durdurmaz (ör. veritabanı uyanmadıysa); bedeli ilk istek öder
+        logger.exception("Isınma adımı başarısız: %s", name)
+    timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def open_connections(engine, count):
+    # Bağlantılar paralel açılır (TCP + TLS + Neon'un uyanması) ve havuza geri bırakılır
+    size = getattr(engine.pool, "size", lambda: count)()
+    count = min(count, size)
+    if count <= 0:
+        return
+    with ThreadPoolExecutor(max_workers=count, thread_name_prefix="warmup-conn") as executor:
+        futures = [executor.submit(engine.connect) for _ in range(count)]
+    errors = [future.exception() for future in futures if future.exception() is not None]
+    for future in futures:
+        if future.exception() is None:
+            future.result().close()
+    if errors:
+        raise errors[0]
+
+
+def _with_session(fn):
+    def run():
+        db = SessionLocal()
+        try:
+            fn(db)
+        finally:
+            db.close()
+    return run
+
+
+# --- SOĞUK BAŞLANGIÇ ISINMASI ---
+# Render instance'ı uyanınca ilk istekler bağlantı kurma, bcrypt backend'inin yüklenmesi ve ilk
+# sorguların derlenmesi bedelini ödüyordu. main.py'nin lifespan'i trafik kabul etmeden önce bunu
+# çalıştırır (uvicorn portu lifespan bitince dinlemeye başlar):
+#   1. her engine'de (yazar, okuyucular) WARMUP_CONNECTIONS kadar havuz bağlantısı açılır
+#   2. bcrypt backend'i yüklenir ve primers (akış, sıralama vb. sorgular) kendi Session'larıyla
+#      paralel çalışır; SQLAlchemy derleme önbelleği, serileştiriciler ve önbellekler dolar
+# Aşama süreleri timings'e yazılır.
+def run(engines, primers):
+    global ready
+    started = time.perf_counter()
+    if WARMUP_ENABLED:
+        _timed("connections", lambda: [open_connections(engine, WARMUP_CONNECTIONS) for engine in engines])
+        with ThreadPoolExecutor(max_workers=len(primers) + 1, thread_name_prefix="warmup") as executor:
+            executor.submit(_timed, "password_backend", auth.load_password_backend)
+            for name, fn in primers.items():
+                executor.submit(_timed, name, _with_session(fn))
+    timings["warmup"] = round((time.perf_counter() - started) * 1000, 1)
+    ready = True
+    logger.info("Isınma tamamlandı: %s", timings)
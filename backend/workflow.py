@@ -0,0 +1,106 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update, insert, func, or_
+
+import models
+import stats
+from timeline import INITIAL_STATUS, RESOLVED_STATUS
+
+# --- DURUM MAKİNESİ ---
+# Toplu geçişlerde hangi durumdan hangisine geçilebileceği. (Tekli PUT /status uyumluluk için
+# serbest bırakıldı; mobil uygulama eski durum adlarını da gönderebiliyor.)
+REJECTED_STATUS = "Reddedildi"
+ALLOWED_TRANSITIONS = {
+    INITIAL_STATUS: {"İnceleniyor", "İşlemde", RESOLVED_STATUS, REJECTED_STATUS},
+    "İnceleniyor": {INITIAL_STATUS, "İşlemde", RESOLVED_STATUS, REJECTED_STATUS},
+    "İşlemde": {"İnceleniyor", RESOLVED_STATUS, REJECTED_STATUS},
+    RESOLVED_STATUS: {"İşlemde"},  # yeniden açma
+    REJECTED_STATUS: {"İnceleniyor"},  # yeniden açma
+}
+# Mobil uygulamanın eski durum adları; geçiş kurallarında karşılıkları gibi davranır
+LEGACY_STATUSES = {"İşleniyor": "İşlemde", "Çözdük": RESOLVED_STATUS}
+STATUSES = set(ALLOWED_TRANSITIONS) | set(LEGACY_STATUSES)
+
+# Kuyruktan çekilebilecek (henüz kimsenin üzerinde çalışmadığı) durumlar
+QUEUE_STATUSES = (INITIAL_STATUS, "İnceleniyor")
+
+# Bu süreden uzun süredir üstlenilmiş ama kapanmamış bildirim tekrar kuyruğa düşer
+CLAIM_TTL = timedelta(minutes=int(os.getenv("QUEUE_CLAIM_TTL_MINUTES", "60")))
+
+MAX_BULK_IDS = 500
+
+COMPLAINTS = models.Complaint.__table__
+
+
+def canonical_status(status):
+    return LEGACY_STATUSES.get(status, status)
+
+
+def can_transition(old_status, new_status):
+    return canonical_status(new_status) in ALLOWED_TRANSITIONS.get(canonical_status(old_status), ())
+
+
+def bulk_transition(db, ids, new_status, municipality, note=None):
+    # 1) Satırları kilitle ve eski durumları oku, 2) geçerli olanları tek UPDATE ile güncelle,
+    # 3) sayaçlar ve 4) durum geçmişi birer çok satırlı ifade. id sayısından bağımsız 4 ifade.
+    ids = list(dict.fromkeys(ids))
+    new_status = canonical_status(new_status)
+    current = dict(db.execute(
+        select(COMPLAINTS.c.id, COMPLAINTS.c.status)
+        .where(COMPLAINTS.c.id.in_(ids), COMPLAINTS.c.municipality == municipality)
+        .order_by(COMPLAINTS.c.id)
+        .with_for_update()
+    ).all())
+    not_found = [i for i in ids if i not in current]
+    invalid = [i for i in ids if i in current and not can_transition(current[i], new_status)]
+    valid = [i for i in ids if i in current and can_transition(current[i], new_status)]
+    if not valid:
+        return [], current, not_found, invalid
+
+    rows = db.execute(
+        update(COMPLAINTS)
+        .where(COMPLAINTS.c.id.in_(valid), COMPLAINTS.c.municipality == municipality)
+        .values(status=new_status)
+        .returning(*COMPLAINTS.c)
+    ).all()
+
+    deltas = []
+    for row in rows:
+        deltas += [("status", current[row.id], -1), ("status", new_status, 1)]
+    stats.bump(db, deltas)
+    events = models.ComplaintStatusEvent.__table__
+    db.execute(insert(events).values([
+        {"complaint_id": row.id, "status": new_status, "note": note, "is_official": True}
+        for row in rows
+    ]))
+    return rows, current, not_found, invalid
+
+
+# --- İŞ KUYRUĞU ---
+# Yetkilinin belediyesindeki en eski, kimsenin üstlenmediği bildirimi tek ifadede üstlenir:
+# UPDATE ... WHERE id = (SELECT ... LIMIT 1 FOR UPDATE SKIP LOCKED) RETURNING ...
+# Postgres'te başka bir yetkilinin kilitlediği satır atlanır, kimse kimseyi beklemez.
+# SQLite FOR UPDATE desteklemez (SQLAlchemy ifadeyi kilitsiz üretir); orada tek yazıcı olduğu için
+# WHERE'deki "üstlenilmemiş" koşulu aynı bildirimin iki kişiye verilmesini engeller.
+def claim_next(db, official):
+    cutoff = datetime.now(timezone.utc) - CLAIM_TTL
+    unclaimed = or_(COMPLAINTS.c.assigned_to.is_(None), COMPLAINTS.c.assigned_at < cutoff)
+    next_id = (
+        select(COMPLAINTS.c.id)
+        .where(
+            COMPLAINTS.c.municipality == official.municipality,
+            COMPLAINTS.c.status.in_(QUEUE_STATUSES),
+            unclaimed,
+        )
+        .order_by(COMPLAINTS.c.created_at, COMPLAINTS.c.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    return db.execute(
+        update(COMPLAINTS)
+        .where(COMPLAINTS.c.id == next_id, unclaimed)
+        .values(assigned_to=official.email, assigned_at=func.now())
+        .returning(*COMPLAINTS.c)
+    ).first()
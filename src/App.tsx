@@ -49,8 +49,10 @@ const getRankInfo = (count: number) => {
 };
 
 // --- YARDIMCI FONKSİYONLAR ---
+// Backend'deki plates.normalize_plate ile aynı kural: Türkçe harfler ASCII karşılığına çevrilir
+const TURKISH_TO_ASCII: Record<string, string> = { 'Ş': 'S', 'Ğ': 'G', 'Ü': 'U', 'Ö': 'O', 'Ç': 'C', 'İ': 'I' };
 const formatAndValidatePlate = (text: string) => {
-  let clean = text.toUpperCase().replace(/[^A-Z0-9]/g, '');
+  let clean = text.toUpperCase().replace(/[ŞĞÜÖÇİ]/g, (ch) => TURKISH_TO_ASCII[ch]).replace(/[^A-Z0-9]/g, '');
   if (clean.length > 8) clean = clean.slice(0, 8);
   
   // Gelişmiş Türkiye Plaka Formatı Kuralı:
@@ -88,7 +90,6 @@ const AuthScreen: React.FC<{ onAuthSuccess: (token: string) => void }> = ({ onAu
   const [isLogin, setIsLogin] = useState(true);
   const [email, setEmail] = useState('');
   const [password, setPassword] = useState('');
-  const [role, setRole] = useState<UserRole>('VATANDAS');
   const [loading, setLoading] = useState(false);
 
   const handleSubmit = async (e: React.FormEvent) => {
@@ -118,7 +119,7 @@ const AuthScreen: React.FC<{ onAuthSuccess: (token: string) => void }> = ({ onAu
         const res = await fetch('https://kentinsesi.onrender.com/register', {
           method: 'POST',
           headers: { 'Content-Type': 'application/json' },
-          body: JSON.stringify({ email, password, role })
+          body: JSON.stringify({ email, password })
         });
 
         if (res.ok) {
@@ -158,16 +159,6 @@ const AuthScreen: React.FC<{ onAuthSuccess: (token: string) => void }> = ({ onAu
             className="w-full p-4 bg-zinc-50 dark:bg-zinc-800 border border-zinc-200 dark:border-zinc-700 rounded-xl dark:text-white outline-none focus:border-red-500 transition-all"
           />
 
-          {!isLogin && (
-            <select
-              value={role} onChange={(e) => setRole(e.target.value as UserRole)}
-              className="w-full p-4 bg-zinc-50 dark:bg-zinc-800 border border-zinc-200 dark:border-zinc-700 rounded-xl dark:text-white outline-none font-bold text-zinc-700 dark:text-zinc-300"
-            >
-              <option value="VATANDAS">Vatandaş (Bireysel)</option>
-              <option value="BELEDIYE_YETKILISI">Kurumsal / Belediye</option>
-            </select>
-          )}
-
           <button disabled={loading} type="submit" className="w-full py-4 bg-gradient-to-r from-red-600 to-red-700 text-white rounded-xl font-bold shadow-lg active:scale-95 transition-all">
             {loading ? 'Bekleniyor...' : (isLogin ? 'Giriş Yap' : 'Kayıt Ol')}
           </button>
@@ -202,7 +193,7 @@ const ReportModal: React.FC<{ isOpen: boolean; onClose: () => void; onSubmit: (d
 
   const fetchAddress = async (lat: number, lng: number) => {
       setFormData((prev: any) => ({ ...prev, lat, lng }));
-      try { const res = await fetch(`https://nominatim.openstreetmap.org/reverse?format=json&lat=${lat}&lon=${lng}`); const data = await res.json(); setFormData((prev: any) => ({ ...prev, location: data.display_name })); } catch (e) { setFormData((prev: any) => ({ ...prev, location: `${lat}, ${lng}` })); }
+      try { const res = await fetch(`https://nominatim.openstreetmap.org/reverse?format=json&lat=${lat}&lon=${lng}`); const data = await res.json(); setFormData((prev: any) => ({ ...prev, location: data.display_name, municipality: data.address?.town || data.address?.county || data.address?.city_district })); } catch (e) { setFormData((prev: any) => ({ ...prev, location: `${lat}, ${lng}` })); }
   };
   const handleGetLocation = () => { setIsLocating(true); navigator.geolocation.getCurrentPosition((p) => { fetchAddress(p.coords.latitude, p.coords.longitude); setIsLocating(false); }, () => { alert("Konum alınamadı."); setIsLocating(false); }); };
   const handleManualSelect = (lat: number, lng: number) => { fetchAddress(lat, lng); setIsMapPickerOpen(false); };